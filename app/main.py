@@ -1,15 +1,25 @@
 import sys
 import os
+import threading
 import streamlit as st
-from PIL import Image
-from routes import analyze_accent_from_url
-import pandas as pd
-import plotly.express as px
+import time
+from routes import (
+    submit_analysis,
+    get_analysis_job,
+    worker_status,
+    worker_memory,
+    previous_analysis,
+    analysis_history,
+    history_stats,
+    start_workers,
+)
 from datetime import datetime
-from model_downloader import download_model_if_needed
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+# Heavy modules (pandas, plotly, torch, whisper, speechbrain) are imported on
+# first use: Streamlit re-runs this whole script on every widget interaction.
+
 # --- Download required models if needed ---
 models_to_download = [
     {
@@ -36,9 +46,26 @@ models_to_download = [
     },
 ]
 
-# Download models at startup
-for model in models_to_download:
-    download_model_if_needed(model["path"], model["url"], model["description"])
+
+@st.cache_resource(show_spinner=False)
+def start_model_downloads():
+    """
+    Downloads missing models, then starts the analysis workers, once per
+    process and off the page-render path.
+    """
+
+    def download_all():
+        from model_downloader import download_models
+
+        download_models(models_to_download)
+        start_workers()
+
+    thread = threading.Thread(target=download_all, daemon=True)
+    thread.start()
+    return thread
+
+
+start_model_downloads()
 
 # --- Page Config ---
 st.set_page_config(page_title="REMWaste Accent Detector", page_icon="♻️", layout="wide")
@@ -154,6 +181,25 @@ with st.sidebar:
         "Try a sample video: [British Accent](https://www.youtube.com/watch?v=swb7lMQHkVE)"
     )
     st.markdown("Contact: [info@remwaste.com](mailto:info@remwaste.com)")
+    workers = worker_status()
+    if not workers["started"]:
+        st.caption("⚪ Models load once downloaded")
+    elif workers["loading"]:
+        st.caption("🟡 Models loading...")
+    elif workers["ready_workers"]:
+        st.caption(
+            f"🟢 Models ready ({workers['ready_workers']}/{workers['workers']} workers)"
+        )
+    else:
+        st.caption("🟡 Workers warming up...")
+    # Reads /proc for every worker, so only while the panel is switched on
+    if st.toggle("🧠 Show worker memory"):
+        memory = worker_memory()
+        st.caption(
+            f"Total PSS {memory['total_pss_mb']} MB, "
+            f"unique {memory['total_unique_mb']} MB"
+        )
+        st.json(memory["processes"])
 
 # --- Header ---
 st.markdown(
@@ -175,6 +221,20 @@ with col1:
         placeholder="https://example.com/video.mp4",
         help="Paste a public video URL (e.g., YouTube, Loom, MP4)",
     )
+    analysis_modes = {
+        "Full analysis": "full",
+        "Accent only (fastest)": "accent_only",
+        "Accent first, transcript after": "deferred",
+    }
+    analysis_mode = st.radio(
+        "Analysis mode",
+        list(analysis_modes),
+        help="Transcribing the whole video is the slowest step",
+    )
+    reuse_previous = st.checkbox(
+        "Reuse a previous result for this URL",
+        help="Show the stored analysis instead of analyzing the video again",
+    )
     if st.button("🚀 Analyze", use_container_width=True):
         st.session_state["analyze"] = True
         st.session_state["video_url"] = video_url
@@ -182,13 +242,91 @@ with col1:
         st.session_state["analyze"] = True
         st.session_state["video_url"] = "https://www.youtube.com/watch?v=swb7lMQHkVE"
 
+job_states = {
+    "queued": "🕒 Waiting for a free worker...",
+    "downloading": "📥 Downloading audio...",
+    "analyzing": "🚧 Analyzing the video...",
+}
+poll_again = False
+
 with col2:
     if (
         st.session_state.get("analyze")
         and st.session_state.get("video_url", "").strip()
     ):
-        with st.spinner("🚧 Analyzing the video..."):
-            result = analyze_accent_from_url(st.session_state["video_url"])
+        mode = analysis_modes[analysis_mode]
+        previous = (
+            previous_analysis(st.session_state["video_url"], mode=mode)
+            if reuse_previous
+            else None
+        )
+        st.session_state["reused"] = previous
+        st.session_state["job_id"] = (
+            None
+            if previous
+            else submit_analysis(st.session_state["video_url"], mode=mode)
+        )
+        st.session_state["analyze"] = False
+    elif st.session_state.get("analyze"):
+        st.warning("⚠️ Please enter a valid video URL.")
+        st.session_state["analyze"] = False
+
+    reused = st.session_state.get("reused")
+    if st.session_state.get("job_id") or reused:
+        job = (
+            {"state": "done", "url": reused["url"], "result": reused["result"]}
+            if reused
+            else get_analysis_job(st.session_state["job_id"])
+        )
+        result = job["result"] if job and job["state"] == "done" else None
+        if reused:
+            st.info(
+                f"♻️ Stored result from "
+                f"{datetime.fromtimestamp(reused['created']):%Y-%m-%d %H:%M}"
+            )
+
+        if job is None:
+            st.session_state["job_id"] = None
+        elif job["state"] == "failed":
+            st.error(f"❌ Error: {job['error']}")
+            st.session_state["job_id"] = None
+        elif job["state"] != "done":
+            st.info(job_states[job["state"]])
+            poll_again = True
+
+            # Show what is known so far while the rest is still running
+            partial = job.get("partial") or {}
+            if "language" in partial:
+                st.markdown(
+                    f"<p>🌐 <b>Language Detected:</b> <span class='rem-badge' style='background:#e3f2fd;color:#1976d2'>{partial['language']}</span> ({partial['language_score']}% sure)</p>",
+                    unsafe_allow_html=True,
+                )
+            if "accent" in partial:
+                st.markdown(
+                    f"<h4>🗣️ Accent Detected: <span class='rem-badge'>{partial['accent']}</span> ({partial['confidence']}%)</h4>",
+                    unsafe_allow_html=True,
+                )
+            if partial.get("segments"):
+                st.markdown(
+                    "<div class='rem-section-title'><span class='emoji'>📝</span>Transcript so far</div>",
+                    unsafe_allow_html=True,
+                )
+                st.code(
+                    "\n".join(
+                        f"[{segment['start']:.0f}s] {segment['text'].strip()}"
+                        for segment in partial["segments"]
+                    ),
+                    language="text",
+                )
+
+        transcript_status = result.get("transcript_status", "done") if result else None
+        if transcript_status == "pending" and not reused:
+            # Keep polling until the deferred transcript arrives
+            poll_again = True
+        transcript_text = {
+            "pending": "⏳ Transcribing in the background...",
+            "skipped": "Transcript skipped in accent-only mode.",
+        }.get(transcript_status, result["transcript"] if result else "")
 
         if result:
             st.markdown("<div class='rem-card'>", unsafe_allow_html=True)
@@ -239,6 +377,9 @@ with col2:
                 "Others": "#607d8b",
             }
 
+            import pandas as pd
+            import plotly.express as px
+
             scores_df = pd.DataFrame(
                 result["all_scores"].items(), columns=["Accent", "Probability"]
             ).sort_values("Probability", ascending=False)
@@ -291,7 +432,10 @@ with col2:
                 "<div class='rem-section-title'><span class='emoji'>📝</span>Transcript</div>",
                 unsafe_allow_html=True,
             )
-            st.code(result["transcript"], language="text")
+            if transcript_status == "done":
+                st.code(transcript_text, language="text")
+            else:
+                st.caption(transcript_text)
 
             st.markdown(
                 "<div class='rem-section-title'><span class='emoji'>📄</span>Summary</div>",
@@ -299,11 +443,15 @@ with col2:
             )
             st.info(result["summary"])
 
+            if result.get("timings"):
+                with st.expander("⏱️ Stage timings"):
+                    st.json(result["timings"])
+
             # Enhanced report download
             report_content = f"""REMWaste Accent Analysis Report
             
 Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-Video URL: {st.session_state["video_url"]}
+Video URL: {job["url"]}
 
 RESULTS
 -------
@@ -316,7 +464,7 @@ Accent Probability Distribution:
 
 TRANSCRIPT
 ----------
-{result["transcript"]}
+{transcript_text}
 
 SUMMARY
 -------
@@ -328,10 +476,71 @@ SUMMARY
                 file_name=f"accent_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
             )
             st.markdown("</div>", unsafe_allow_html=True)
-        st.session_state["analyze"] = False
-    elif st.session_state.get("analyze"):
-        st.warning("⚠️ Please enter a valid video URL.")
-        st.session_state["analyze"] = False
+
+# --- Analysis history ---
+# Loaded only on demand, and not while a job is being polled every second
+if st.toggle("🗂️ Show analysis history"):
+    if poll_again:
+        st.caption("History shows once the current analysis is done.")
+    else:
+        import pandas as pd
+        import plotly.express as px
+
+        totals = history_stats()
+        st.caption(f"{totals['analyses']} analyses stored")
+        filter_col1, filter_col2 = st.columns(2)
+        accent_filter = filter_col1.selectbox(
+            "Accent", ["All"] + [accent for accent in totals["accents"] if accent]
+        )
+        language_filter = filter_col2.selectbox(
+            "Language",
+            ["All"] + [language for language in totals["languages"] if language],
+        )
+
+        # Pages are keyset cursors; keep the ones we came through to go back
+        filters = (accent_filter, language_filter)
+        if st.session_state.get("history_filters") != filters:
+            st.session_state["history_filters"] = filters
+            st.session_state["history_cursors"] = [None]
+        cursors = st.session_state["history_cursors"]
+        page = analysis_history(
+            limit=20,
+            before=cursors[-1],
+            accent=None if accent_filter == "All" else accent_filter,
+            language=None if language_filter == "All" else language_filter,
+        )
+        if page["rows"]:
+            history_df = pd.DataFrame(page["rows"])
+            history_df["created"] = pd.to_datetime(history_df["created"], unit="s")
+            st.dataframe(
+                history_df[
+                    ["id", "created", "url", "mode", "accent", "confidence", "language"]
+                ],
+                use_container_width=True,
+                hide_index=True,
+            )
+        else:
+            st.caption("No analyses yet.")
+
+        newer_col, older_col = st.columns(2)
+        if newer_col.button("⬅️ Newer", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+        if older_col.button("Older ➡️", disabled=page["next"] is None):
+            cursors.append(page["next"])
+            st.rerun()
+
+        if totals["distribution"]:
+            st.plotly_chart(
+                px.bar(
+                    pd.DataFrame(totals["distribution"]),
+                    x="day",
+                    y="analyses",
+                    color="accent",
+                    title="Accents per day",
+                ),
+                use_container_width=True,
+            )
 
 # --- Watermark (optional) ---
 if os.path.exists(logo_path):
@@ -348,3 +557,8 @@ st.markdown(
     """,
     unsafe_allow_html=True,
 )
+
+# --- Poll the background job until it finishes ---
+if poll_again:
+    time.sleep(1)
+    st.rerun()
@@ -1,55 +1,286 @@
 import os
+import json
+import hashlib
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from filelock import FileLock
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_PATH = os.path.join(ROOT_DIR, "models", "manifest.json")
+CHUNK_SIZE = 1024 * 1024
 
-def download_model_if_needed(model_path, model_url, description=None):
+
+class ChecksumError(RuntimeError):
+    """Raised when a downloaded file does not match its expected SHA-256 or size."""
+
+
+def _manifest_key(model_path):
+    path = os.path.abspath(model_path)
+    if path.startswith(ROOT_DIR + os.sep):
+        path = os.path.relpath(path, ROOT_DIR)
+    return path.replace("\\", "/")
+
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """
+    Loads the checksum manifest.
+
+    Returns:
+        dict: Model path (relative to the repository root) -> dict with the
+            file's 'sha256' hex digest and 'size' in bytes. Entries written
+            as a bare digest string are read as {'sha256': digest}.
+    """
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return {
+        key: entry if isinstance(entry, dict) else {"sha256": entry}
+        for key, entry in manifest.items()
+    }
+
+
+def _record_checksum(key, digest, size, manifest_path=MANIFEST_PATH):
+    # Read-modify-write under a lock so concurrent downloads don't clobber entries
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with FileLock(manifest_path + ".lock"):
+        manifest = load_manifest(manifest_path)
+        manifest[key] = {"sha256": digest, "size": size}
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def sha256_file(path):
+    """Returns the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _verified_marker(model_path):
+    stat = os.stat(model_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _remote_size(model_url):
+    """Returns the size the server reports for `model_url`, or None."""
+    try:
+        r = requests.head(model_url, allow_redirects=True, timeout=(10, 30))
+        r.raise_for_status()
+    except requests.RequestException as e:
+        logger.warning(f"Could not get the size of {model_url}: {e}")
+        return None
+    # Hugging Face reports the LFS file size separately from the redirect body
+    size = r.headers.get("x-linked-size") or r.headers.get("content-length")
+    return int(size) if size else None
+
+
+def _is_intact(model_path, expected_sha256, expected_size=None):
+    """
+    Checks an existing model file against its expected size and checksum.
+
+    A sidecar `.sha256` file remembers the size/mtime a digest was computed
+    for, so large checkpoints are only hashed once. With no known checksum
+    only the size is checked.
+    """
+    if expected_size is not None and os.path.getsize(model_path) != expected_size:
+        return False
+    if expected_sha256 is None:
+        return True
+
+    sidecar = model_path + ".sha256"
+    marker = _verified_marker(model_path)
+    if os.path.exists(sidecar):
+        with open(sidecar, "r") as f:
+            if f.read().split() == [marker, expected_sha256]:
+                return True
+
+    digest = sha256_file(model_path)
+    if digest != expected_sha256:
+        return False
+    with open(sidecar, "w") as f:
+        f.write(f"{marker} {digest}")
+    return True
+
+
+def _fetch(model_url, part_path, model_name, retries=3):
+    """
+    Streams `model_url` into `part_path`, resuming with HTTP Range requests.
+
+    Whatever is already in `part_path` is kept and only the remaining bytes
+    are requested, both across retries and across process restarts.
+
+    Returns:
+        int: Full size of the file as reported by the server, or None.
+    """
+    for attempt in range(1, retries + 1):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            with requests.get(
+                model_url, stream=True, headers=headers, timeout=(10, 60)
+            ) as r:
+                if r.status_code == 416:  # Nothing left to fetch
+                    return None
+                r.raise_for_status()
+                if offset and r.status_code != 206:
+                    logger.info(f"Server ignored range for {model_name}, restarting")
+                    offset = 0
+
+                length = int(r.headers.get("content-length", 0))
+                total_size = offset + length if length else None
+                if offset:
+                    logger.info(f"Resuming {model_name} from byte {offset}")
+
+                with open(part_path, "ab" if offset else "wb") as f:
+                    dl = offset
+                    next_log = 0.1
+                    for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        dl += len(chunk)
+                        if total_size and dl / total_size >= next_log:  # Log every 10%
+                            logger.info(
+                                f"Downloading {model_name}: {dl}/{total_size} bytes"
+                            )
+                            next_log += 0.1
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                if total_size and dl < total_size:
+                    raise IOError(f"Connection closed at {dl}/{total_size} bytes")
+                return total_size
+        except (requests.RequestException, IOError) as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"Download of {model_name} interrupted ({e}), retrying")
+
+
+def download_model_if_needed(
+    model_path,
+    model_url,
+    description=None,
+    sha256=None,
+    size=None,
+    manifest_path=MANIFEST_PATH,
+):
     """
     Downloads a model file if it doesn't exist locally.
 
+    The file is streamed to `<model_path>.part` (resuming a previous partial
+    download if there is one), checked against its SHA-256 and only then
+    renamed into place, so a crash never leaves a truncated checkpoint at
+    `model_path`. An existing file with no known checksum is still checked
+    against its known size, or else the size the server reports, so a
+    truncated file is downloaded again. A file lock makes concurrent
+    processes wait for a single download instead of fetching the same file
+    twice.
+
     Args:
         model_path: Path where the model should be stored
         model_url: URL to download the model from
         description: Optional description of the model for logging
+        sha256: Expected SHA-256; defaults to the manifest entry. Files with
+            no known checksum have theirs recorded in the manifest on first
+            download and are verified against it from then on.
+        size: Expected size in bytes; defaults to the manifest entry.
+        manifest_path: Checksum manifest to read and update
+
+    Returns:
+        bool: True if the model was downloaded, False otherwise.
     """
     model_name = description or os.path.basename(model_path)
+    key = _manifest_key(model_path)
 
     try:
-        if not os.path.exists(model_path):
-            logger.info(f"Downloading {model_name} model...")
-            os.makedirs(os.path.dirname(model_path), exist_ok=True)
-
-            with requests.get(model_url, stream=True) as r:
-                r.raise_for_status()
-                total_size = int(r.headers.get("content-length", 0))
-
-                with open(model_path, "wb") as f:
-                    if total_size == 0:  # No content length header
-                        f.write(r.content)
-                    else:
-                        dl = 0
-                        for chunk in r.iter_content(chunk_size=8192):
-                            dl += len(chunk)
-                            f.write(chunk)
-                            done = int(50 * dl / total_size)
-                            if done % 5 == 0:  # Log every 10%
-                                logger.info(
-                                    f"Downloading {model_name}: {dl}/{total_size} bytes"
-                                )
-
-            logger.info(f"{model_name} model downloaded successfully to {model_path}")
-            return True
-        else:
+        entry = load_manifest(manifest_path).get(key, {})
+        expected = sha256 or entry.get("sha256")
+        expected_size = size or entry.get("size")
+        if os.path.exists(model_path) and expected is None and expected_size is None:
+            expected_size = _remote_size(model_url)
+        if os.path.exists(model_path) and _is_intact(
+            model_path, expected, expected_size
+        ):
             logger.info(f"{model_name} model already exists at {model_path}")
             return False
+
+        os.makedirs(os.path.dirname(model_path), exist_ok=True)
+        with FileLock(model_path + ".lock"):
+            # Another process may have finished the download while we waited
+            if os.path.exists(model_path) and _is_intact(
+                model_path, expected, expected_size
+            ):
+                logger.info(f"{model_name} model already exists at {model_path}")
+                return False
+
+            logger.info(f"Downloading {model_name} model...")
+            part_path = model_path + ".part"
+            expected_size = _fetch(model_url, part_path, model_name) or expected_size
+
+            actual_size = os.path.getsize(part_path)
+            if expected_size is not None and actual_size != expected_size:
+                os.remove(part_path)
+                raise ChecksumError(
+                    f"Size mismatch for {model_name}: {actual_size} != {expected_size}"
+                )
+            digest = sha256_file(part_path)
+            if expected and digest != expected:
+                os.remove(part_path)
+                raise ChecksumError(
+                    f"SHA-256 mismatch for {model_name}: {digest} != {expected}"
+                )
+
+            os.replace(part_path, model_path)
+            with open(model_path + ".sha256", "w") as f:
+                f.write(f"{_verified_marker(model_path)} {digest}")
+            if not expected:
+                logger.warning(
+                    f"No known checksum for {model_name}, recording {digest}"
+                )
+                _record_checksum(key, digest, actual_size, manifest_path)
+
+        logger.info(f"{model_name} model downloaded successfully to {model_path}")
+        return True
     except Exception as e:
         logger.error(f"Error downloading {model_name} model: {str(e)}")
         return False
 
 
+def download_models(models, max_workers=4, manifest_path=MANIFEST_PATH):
+    """
+    Downloads several models concurrently.
+
+    Args:
+        models: List of dicts with 'path', 'url' and optional 'description',
+            'sha256' and 'size' keys
+        max_workers: Maximum number of parallel downloads
+        manifest_path: Checksum manifest to read and update
+
+    Returns:
+        dict: Model path -> True if it was downloaded, False otherwise.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            model["path"]: pool.submit(
+                download_model_if_needed,
+                model["path"],
+                model["url"],
+                model.get("description"),
+                model.get("sha256"),
+                model.get("size"),
+                manifest_path,
+            )
+            for model in models
+        }
+    return {path: future.result() for path, future in futures.items()}
+
+
 def setup_models():
     """
     Downloads all required models if they don't exist locally.
@@ -86,9 +317,8 @@ def setup_models():
         # Add more models as needed
     ]
 
-    # Download each model if needed
-    for model in models:
-        download_model_if_needed(model["path"], model["url"], model["description"])
+    # Download the models in parallel
+    download_models(models)
 
 
 if __name__ == "__main__":
@@ -4,29 +4,53 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import streamlit as st
-from core.audio_downloader import process_video_url
-from core.accent_analyzer import AccentAnalyzer
+from core.history import get_history
+from core.jobs import get_job_manager, QueueFullError
 
 
-def analyze_accent_from_url(video_url: str):
+@st.cache_resource(show_spinner=False)
+def _job_manager():
+    # One worker pool per process, shared by every session and rerun; it is
+    # started by `start_workers` once the models are downloaded
+    return get_job_manager()
+
+
+def start_workers():
+    """
+    Starts the analysis workers without waiting for their models to load.
+
+    Called from the app's background download thread, outside any session,
+    so it uses the job manager directly rather than `_job_manager`.
+    """
+    get_job_manager().start()
+
+
+def analyze_accent_from_url(video_url: str, mode: str = "full"):
     """
     Orchestrates the full analysis pipeline from video URL.
 
     Args:
-        video_url (str): Direct MP4 or Loom link.
+        video_url (str): Direct MP4 or Loom link, local path or file:// URL.
+        mode (str): 'full' or 'accent_only', see `AccentAnalyzer`.
 
     Returns:
         dict: Analysis result with accent, confidence, etc.
     """
+    # Imported here so the page renders without loading torch/whisper
+    from core.audio_downloader import fetch_audio
+    from core.accent_analyzer import AccentAnalyzer
+
     st.info("Downloading and processing video...")
 
     try:
-        # 1. Extract audio from video
-        audio_path = process_video_url(video_url)
+        # 1. Stream the audio track into memory
+        timings = {}
+        audio = fetch_audio(video_url, timings=timings)
 
         # 2. Analyze accent
-        analyzer = AccentAnalyzer()
-        result = analyzer.analyze(audio_path)
+        analyzer = AccentAnalyzer(mode=mode)
+        result = analyzer.analyze(audio, timings=timings)
+        get_history().record(video_url, result, mode=mode)
 
         return result
 
@@ -35,3 +59,88 @@ def analyze_accent_from_url(video_url: str):
         print(f"🔴 Exception raised: {e}")
 
         return None
+
+
+def submit_analysis(video_url: str, mode: str = "full"):
+    """
+    Queues a video URL for background analysis.
+
+    Args:
+        video_url (str): Direct MP4 or Loom link, local path or file:// URL.
+        mode (str): 'full', 'accent_only' or 'deferred', see `AccentAnalyzer`.
+
+    Returns:
+        str: Job id to poll with `get_analysis_job`, or None if the queue
+             is full.
+    """
+    try:
+        return _job_manager().submit(video_url, mode=mode)
+    except QueueFullError as e:
+        st.warning(f"⏳ The analyzer is busy: {e}")
+        return None
+
+
+def get_analysis_job(job_id: str):
+    """
+    Returns the current record of a background analysis job.
+
+    Returns:
+        dict: Job with 'state' (queued, downloading, analyzing, done or
+              failed), 'url', 'error' and 'result', or None if unknown.
+    """
+    try:
+        return _job_manager().status(job_id)
+    except KeyError:
+        return None
+
+
+# The sidebar reads these on every rerun, including each 1 s job poll, so
+# they are cached briefly rather than recomputed each time
+@st.cache_data(ttl=5, show_spinner=False)
+def worker_status():
+    """Returns job queue and worker readiness stats."""
+    return _job_manager().stats()
+
+
+@st.cache_data(ttl=10, show_spinner=False)
+def worker_memory():
+    """Returns unique and shared memory of the app and each worker process."""
+    return _job_manager().memory()
+
+
+def previous_analysis(video_url: str, mode: str = "full"):
+    """
+    Returns the newest stored analysis of a URL in a mode.
+
+    Returns:
+        dict: History record with 'id', 'created', 'url', ... and the full
+              'result', or None if the URL was never analyzed that way.
+    """
+    return get_history().latest(url=video_url, mode=mode)
+
+
+def history_record(record_id: int):
+    """Returns one stored analysis with its full result, or None."""
+    return get_history().get(record_id)
+
+
+def analysis_history(limit: int = 20, before: int = None, **filters):
+    """
+    Returns one page of past analyses, newest first.
+
+    Args:
+        limit (int): Page size.
+        before (int): The previous page's 'next' cursor.
+        **filters: Exact matches on 'url', 'audio_id', 'accent', 'language'
+            or 'mode'; None values are ignored.
+
+    Returns:
+        dict: {'rows': [record, ...], 'next': cursor or None}
+    """
+    return get_history().query(limit=limit, before=before, **filters)
+
+
+def history_stats():
+    """Returns history totals and the per-day accent distribution."""
+    history = get_history()
+    return {**history.stats(), "distribution": history.accent_distribution()}
@@ -0,0 +1,186 @@
+import os
+import sys
+import json
+import logging
+import argparse
+import statistics
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.fixtures import ensure_fixtures
+from benchmarks.run_benchmarks import PeakRSS, RESULTS_DIR, time_stage
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+PRECISIONS = ("fp32", "int8")
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level edit distance divided by the reference length."""
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    row = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        previous, row[0] = row[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            previous, row[j] = row[j], min(
+                row[j] + 1, row[j - 1] + 1, previous + (ref_word != hyp_word)
+            )
+    return row[-1] / max(len(ref), 1)
+
+
+def load_models(precision: str) -> dict:
+    """
+    Loads the Whisper model at a precision and sizes it.
+
+    The ECAPA encoder is not compared: it has no Linear layers, so it
+    always runs in fp32 (see `services.quantization`).
+    """
+    from services.model_registry import get_whisper_model
+    from services.quantization import model_bytes
+
+    with PeakRSS() as rss:
+        whisper_model = get_whisper_model(precision=precision)
+    return {
+        "whisper": whisper_model,
+        "memory": {
+            "whisper_weights_mb": round(model_bytes(whisper_model) / 1024**2, 1),
+            "load_rss_mb": round((rss.peak - rss.start) / 1024**2, 1),
+        },
+    }
+
+
+def measure(models: dict, audio, language: str, repeat: int) -> dict:
+    """Times language detection and transcription of one input."""
+    import whisper
+
+    whisper_model = models["whisper"]
+    mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio))
+
+    def detect():
+        _, probs = whisper_model.detect_language(mel.to(whisper_model.device))
+        return max(probs, key=probs.get)
+
+    def transcribe():
+        return whisper_model.transcribe(audio, language=language or "en")["text"]
+
+    detected, detect_time = time_stage(detect, repeat)
+    text, transcribe_time = time_stage(transcribe, repeat)
+    return {
+        "language": detected,
+        "transcript": text,
+        "timings": {
+            "detect_language": detect_time,
+            "transcribe": transcribe_time,
+        },
+    }
+
+
+def run(inputs: list, repeat: int = 1) -> dict:
+    """
+    Runs every input through fp32 and int8 Whisper and compares them.
+
+    Returns:
+        dict: {'meta', 'memory', 'inputs', 'summary'} where summary holds
+            median speedups, memory saved, language agreement and WER.
+    """
+    import torch
+    from core.audio_downloader import decode_audio
+
+    models = {precision: load_models(precision) for precision in PRECISIONS}
+
+    records = []
+    for path in inputs:
+        logger.info(f"Comparing precisions on {path}")
+        audio = decode_audio(path)
+        outputs = {}
+        for precision in PRECISIONS:
+            language = outputs["fp32"]["language"] if outputs else None
+            outputs[precision] = measure(models[precision], audio, language, repeat)
+
+        fp32, int8 = outputs["fp32"], outputs["int8"]
+        records.append(
+            {
+                "input": path,
+                "language": {"fp32": fp32["language"], "int8": int8["language"]},
+                "transcript_wer": round(
+                    word_error_rate(fp32["transcript"], int8["transcript"]), 4
+                ),
+                "speedup": {
+                    stage: round(
+                        fp32["timings"][stage]["wall_s"]
+                        / max(int8["timings"][stage]["wall_s"], 1e-9),
+                        2,
+                    )
+                    for stage in fp32["timings"]
+                },
+                "timings": {"fp32": fp32["timings"], "int8": int8["timings"]},
+            }
+        )
+
+    memory = {precision: models[precision]["memory"] for precision in PRECISIONS}
+    summary = {
+        "language_agreement": statistics.mean(
+            r["language"]["fp32"] == r["language"]["int8"] for r in records
+        ),
+        "median_transcript_wer": statistics.median(
+            r["transcript_wer"] for r in records
+        ),
+        "median_speedup": {
+            stage: statistics.median(r["speedup"][stage] for r in records)
+            for stage in records[0]["speedup"]
+        },
+        "weights_saved_mb": round(
+            sum(
+                memory["fp32"][k] - memory["int8"][k]
+                for k in memory["fp32"]
+                if "weights" in k
+            ),
+            1,
+        ),
+    }
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "torch": torch.__version__,
+            "torch_threads": torch.get_num_threads(),
+            "quantized_engine": torch.backends.quantized.engine,
+        },
+        "memory": memory,
+        "inputs": records,
+        "summary": summary,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare int8 dynamic quantization against fp32"
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="Audio or video files; defaults to the 5s and 1m synthetic fixtures",
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("-o", "--output", help="JSON results file")
+    args = parser.parse_args(argv)
+
+    inputs = args.inputs or [
+        fixture["wav"] for fixture in ensure_fixtures(["5s", "1m"], mp4=False).values()
+    ]
+    report = run(inputs, args.repeat)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"precision_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Precision comparison written to {output}")
+    print(json.dumps(report["summary"], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
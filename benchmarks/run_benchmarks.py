@@ -0,0 +1,264 @@
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.fixtures import LENGTHS, ensure_fixtures
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+STAGES = [
+    "extract_audio_from_video",
+    "decode",
+    "vad",
+    "preprocess_audio",
+    "preprocess_batch",
+    "whisper_mel_detect_language",
+    "transcribe",
+    "encode_batch",
+    "accent_graph",
+    "classifier_head",
+]
+
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Not Linux: fall back to the lifetime peak, which only ever grows
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PeakRSS:
+    """Samples RSS on a background thread while a stage runs."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.start = self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.start = self.peak = _rss_bytes()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def time_stage(fn, repeat: int):
+    """
+    Runs `fn` `repeat` times and measures it.
+
+    Returns:
+        tuple: (last output of fn, measurement dict)
+    """
+    wall, cpu, peaks, deltas = [], [], [], []
+    output = None
+    for _ in range(repeat):
+        with PeakRSS() as rss:
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            output = fn()
+            wall.append(time.perf_counter() - wall_start)
+            cpu.append(time.process_time() - cpu_start)
+        peaks.append(rss.peak)
+        deltas.append(rss.peak - rss.start)
+    return output, {
+        "wall_s": round(statistics.median(wall), 4),
+        "wall_min_s": round(min(wall), 4),
+        "cpu_s": round(statistics.median(cpu), 4),
+        "peak_rss_mb": round(max(peaks) / 1024**2, 1),
+        "rss_delta_mb": round(max(deltas) / 1024**2, 1),
+        "repeat": repeat,
+    }
+
+
+def run(labels, stages, repeat: int = 3) -> dict:
+    """
+    Times every pipeline stage on each synthetic fixture.
+
+    Models are loaded (and warmed) before timing so that load cost is not
+    counted against any stage.
+
+    Returns:
+        dict: {'meta': {...}, 'results': {fixture: {stage: measurement}}}
+    """
+    import torch
+    import whisper
+    from core.audio_downloader import decode_audio, extract_audio_from_video
+    from core.vad import select_speech
+    from services.accent_classifier_hf import AccentClassifier
+    from services.model_registry import get_whisper_model, warmup
+
+    fixtures = ensure_fixtures(labels, mp4="extract_audio_from_video" in stages)
+    warmup()
+    classifier = AccentClassifier()
+    whisper_model = get_whisper_model()
+
+    results = {}
+    for label in labels:
+        fixture = fixtures[label]
+        logger.info(f"Benchmarking {label} fixture")
+        timings = {}
+        state = {}
+
+        def measure(stage, fn):
+            if stage not in stages:
+                return
+            output, timings[stage] = time_stage(fn, repeat)
+            logger.info(f"  {stage}: {timings[stage]['wall_s']}s")
+            return output
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            measure(
+                "extract_audio_from_video",
+                lambda: extract_audio_from_video(fixture["mp4"], temp_dir),
+            )
+
+        state["audio"] = decode_audio(fixture["wav"])
+        measure("decode", lambda: decode_audio(fixture["wav"]))
+        measure("vad", lambda: select_speech(state["audio"]))
+
+        state["clip"] = classifier.preprocess_audio(state["audio"], 16000)
+        measure(
+            "preprocess_audio",
+            lambda: classifier.preprocess_audio(state["audio"], 16000),
+        )
+        # Up to 32 overlapping 10-second windows in one batch, as in ingestion
+        windows = [
+            state["audio"][start : start + 160000]
+            for start in range(0, max(1, len(state["audio"]) - 80000), 80000)
+        ][:32]
+        measure("preprocess_batch", lambda: classifier.preprocess_clips(windows, 16000))
+
+        def detect_language():
+            audio = whisper.pad_or_trim(state["audio"])
+            mel = whisper.log_mel_spectrogram(audio).to(whisper_model.device)
+            return whisper_model.detect_language(mel)
+
+        measure("whisper_mel_detect_language", detect_language)
+        measure(
+            "transcribe",
+            lambda: whisper_model.transcribe(state["audio"], language="en"),
+        )
+
+        waveform = torch.from_numpy(state["clip"]).unsqueeze(0)
+
+        def encode():
+            with torch.no_grad():
+                return classifier.model.encode_batch(waveform)
+
+        embeddings = encode()
+        measure("encode_batch", encode)
+        # Encoder plus head through the configured ACCENT_BACKEND
+        measure("accent_graph", lambda: classifier.graph(waveform, torch.ones(1)))
+        measure("classifier_head", lambda: classifier._posteriors(embeddings[:, 0]))
+
+        results[label] = timings
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "host": socket.gethostname(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "torch_threads": torch.get_num_threads(),
+            "accent_backend": type(classifier.graph).name,
+            "fixture_seconds": {label: LENGTHS[label] for label in labels},
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Lists stages whose median wall time regressed past `threshold`.
+
+    Returns:
+        list[str]: One human-readable line per regression.
+    """
+    regressions = []
+    for label, stages in current["results"].items():
+        for stage, measurement in stages.items():
+            before = baseline.get("results", {}).get(label, {}).get(stage)
+            if not before or before["wall_s"] <= 0:
+                continue
+            ratio = measurement["wall_s"] / before["wall_s"]
+            if ratio > 1 + threshold:
+                regressions.append(
+                    f"{label}/{stage}: {before['wall_s']}s -> "
+                    f"{measurement['wall_s']}s (+{(ratio - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage pipeline benchmarks")
+    parser.add_argument(
+        "--lengths",
+        default="5s,1m",
+        help=f"Comma-separated fixture lengths from {list(LENGTHS)}",
+    )
+    parser.add_argument(
+        "--stages", default=",".join(STAGES), help="Comma-separated stages to time"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="JSON results file")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="Relative slowdown reported as a regression",
+    )
+    args = parser.parse_args(argv)
+
+    labels = args.lengths.split(",")
+    report = run(labels, set(args.stages.split(",")), args.repeat)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Benchmark results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for line in regressions:
+            logger.warning(f"Regression: {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,55 @@
 from services.whisper_service import WhisperTranscriber
 from services.accent_classifier_hf import AccentClassifier
 from services.language_detector import LanguageDetector
-import librosa
+from core.audio_downloader import decode_audio, fetch_audio, SAMPLE_RATE
+from core.cache import get_cache, audio_hash
+from core.embedding_store import EmbeddingStore, embedding_key
+from core.history import get_history
+from core.vad import VAD_VERSION, SpeechMap, select_speech
+from core.metrics import metrics, stage, record_model_loads, write_prometheus
+from services.batching import set_torch_threads, threads_per_share
+from services.progressive import STOP_CONFIDENCE, STOP_MARGIN, TIME_BUDGET
+from services.model_registry import (
+    SHARE_WEIGHTS,
+    encoder_key,
+    head_key,
+    load_events,
+    share_models,
+    whisper_key,
+)
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import argparse
+import multiprocessing
+import json
+import os
+import sys
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Models in use, named as in the registry (size, source and precision)
+WHISPER_KEY = whisper_key()
+ENCODER_KEY = encoder_key()
+
+# Bump when a change to the pipeline should invalidate cached results
+PIPELINE_VERSION = f"v1|{WHISPER_KEY}|{ENCODER_KEY}"
+
+# Analysis modes: transcribe everything, skip the transcript, or return the
+# accent first and transcribe in the background
+FULL = "full"
+ACCENT_ONLY = "accent_only"
+DEFERRED = "deferred"
+MODES = (FULL, ACCENT_ONLY, DEFERRED)
+
+# Transcript states reported in results
+TRANSCRIPT_DONE = "done"
+TRANSCRIPT_PENDING = "pending"
+TRANSCRIPT_SKIPPED = "skipped"
+
+# Finished deferred transcriptions an analyzer keeps for `transcript` calls
+KEEP_TRANSCRIPTIONS = 32
+
 
 class AccentAnalysisResult:
     def __init__(
@@ -17,6 +60,10 @@ class AccentAnalysisResult:
         language_score: float,
         transcript: str,
         all_scores: dict,
+        timeline: list = None,
+        transcript_status: str = TRANSCRIPT_DONE,
+        audio_id: str = None,
+        windows_used: int = None,
     ):
         self.accent = accent
         self.confidence = confidence
@@ -24,6 +71,10 @@ class AccentAnalysisResult:
         self.language_score = language_score
         self.transcript = transcript
         self.all_scores = all_scores
+        self.timeline = timeline
+        self.transcript_status = transcript_status
+        self.audio_id = audio_id
+        self.windows_used = windows_used
 
     def to_dict(self):
         # Create a detailed summary including all accent scores
@@ -33,62 +84,172 @@ class AccentAnalysisResult:
             f"All accent scores: {scores_text}"
         )
 
-        return {
+        result = {
             "accent": self.accent,
             "confidence": self.confidence,
             "language": self.language,
             "language_score": self.language_score,
             "transcript": self.transcript,
+            "transcript_status": self.transcript_status,
             "all_scores": self.all_scores,
             "summary": summary,
+            "audio_id": self.audio_id,
         }
+        if self.timeline is not None:
+            result["timeline"] = self.timeline
+        if self.windows_used is not None:
+            result["windows_used"] = self.windows_used
+        return result
 
 
 class AccentAnalyzer:
-    def __init__(self):
+    """
+    Runs the accent analysis pipeline on an audio file.
+
+    Models are fetched from `services.model_registry`, so constructing an
+    analyzer is cheap once the process has loaded them.
+
+    Args:
+        windowed (bool): Judge the accent over the whole recording with
+            overlapping windows instead of its first 10 seconds.
+        progressive (bool): Embed one window of speech at a time and stop
+            once the averaged posterior is confident or the time budget is
+            spent (see `services.progressive`); takes precedence over
+            `windowed`. Results report 'windows_used'.
+        max_windows (int): Cap on windows embedded per recording.
+        use_cache (bool): Reuse Whisper output, embeddings and final results
+            cached on disk for audio that has been analyzed before.
+        store_embeddings (bool): Append each clip embedding to the
+            `EmbeddingStore`, keyed by audio hash, encoder and audio mode
+            (see `embedding_key`), so the archive can be re-scored later.
+        vad (bool): Cut silence and non-speech out of the recording (see
+            `core.vad`) before it reaches Whisper and the accent encoder.
+            Transcript and timeline timestamps still refer to the original.
+        mode (str): 'full' transcribes the whole recording before returning.
+            'accent_only' runs language detection on one 30-second window
+            plus the accent path and skips the transcript. 'deferred'
+            returns the accent like 'accent_only' and transcribes in a
+            background thread; fetch the text later with `transcript`.
+    """
+
+    def __init__(
+        self,
+        windowed: bool = False,
+        progressive: bool = False,
+        max_windows: int = 32,
+        use_cache: bool = True,
+        store_embeddings: bool = True,
+        vad: bool = True,
+        mode: str = FULL,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown analysis mode {mode!r}, use {MODES}")
+        self.windowed = windowed
+        self.progressive = progressive
+        self.vad = vad
+        self.mode = mode
+        self.max_windows = max_windows
+        self.embedding_store = EmbeddingStore() if store_embeddings else None
+        self.features_cache = get_cache("features") if use_cache else None
+        self.results_cache = get_cache("results") if use_cache else None
+        # Model loads triggered from here on are reported by the next analyze()
+        self._reported_loads = len(load_events())
         self.accent_classifier = AccentClassifier()
+        # Results depend on the head's weights, embeddings do not
+        self._head_key = head_key(self.accent_classifier.classifier)
         self.language_detector = LanguageDetector()
         self.transcriber = WhisperTranscriber()
+        # Background transcriptions of the deferred mode, by audio id
+        self._transcriptions = {}
+        self._transcription_pool = None
 
-    def analyze(self, audio_path: str) -> dict:
-        try:
-            # Transcribe and detect language
-            transcription_result = self.transcriber.transcribe(audio_path)
-            language = transcription_result["language"]
-            language_conf = transcription_result["language_confidence"]
-            transcript = transcription_result["text"]
-
-            # Only proceed if the speaker is speaking English
-            if language != "en" or language_conf < 80:
-                return {
-                    "accent": "Non-English or unclear",
-                    "confidence": 0.0,
-                    "language": language,
-                    "language_score": language_conf,
-                    "transcript": transcript,
-                    "summary": "The language detected is not English or is unclear.",
-                    "all_scores": {},
-                }
-
-            # Load audio and get accent classification
-            audio, sr = librosa.load(audio_path, sr=16000)
-            accent, confidence, all_scores = self.accent_classifier.predict(audio, sr)
-
-            # Create result object
-            result = AccentAnalysisResult(
-                accent=accent,
-                confidence=confidence,
-                language=language,
-                language_score=language_conf,
-                transcript=transcript,
-                all_scores=all_scores,
+    def _config_key(self, mode: str = None, streamed: bool = False) -> str:
+        if self.progressive:
+            # The time budget can end the run early too, so it shapes the result
+            accent_mode = (
+                f"progressive-{self.max_windows}-{STOP_CONFIDENCE}-{STOP_MARGIN}"
+                f"-{TIME_BUDGET}"
             )
+        elif self.windowed:
+            accent_mode = f"windowed-{self.max_windows}"
+        else:
+            accent_mode = "clip"
+        config = (
+            f"{PIPELINE_VERSION}|{self._head_key}|{accent_mode}|{self._audio_mode()}"
+        )
+        mode = mode or self.mode
+        if mode != FULL:
+            return f"{config}|{mode}"
+        # Streamed transcripts are cut into windows differently from Whisper's
+        return f"{config}|stream" if streamed else config
+
+    def _audio_mode(self) -> str:
+        return f"vad-{VAD_VERSION}" if self.vad else "raw"
+
+    def _cached_feature(self, key: str, compute, valid=lambda value: True):
+        """Returns a feature from the features cache, computing it on a miss."""
+        if self.features_cache is None:
+            return compute()
+        value = self.features_cache.get(key)
+        if value is None:
+            value = compute()
+            if valid(value):
+                self.features_cache.set(key, value)
+        return value
+
+    def analyze(self, audio, timings: dict = None) -> dict:
+        """
+        Analyzes the accent of a recording.
+
+        Args:
+            audio (str | np.ndarray): Path to an audio file, or a mono 16 kHz
+                float32 buffer that has already been decoded.
+            timings (dict): Stage timings collected upstream (for example by
+                `fetch_audio`), merged into the result's 'timings'.
+
+        Returns:
+            dict: Analysis result with accent, confidence, etc. Its 'timings'
+                entry holds per-stage wall/CPU time, 'audio_seconds' and the
+                'model_loads' that happened since the previous call.
+        """
+        for event in self._analyze_events(audio, timings, stream=False):
+            pass
+        return event["result"]
+
+    def analyze_stream(self, audio, timings: dict = None):
+        """
+        Analyzes a recording, yielding partial results as they are ready.
 
-            return result.to_dict()
+        Events are dicts with a 'stage' key, in this order:
+            'language': 'language' and 'language_score', from the first
+                30-second window.
+            'accent': 'accent', 'confidence', 'all_scores' and, when
+                windowed, 'timeline'.
+            'segment': one per transcript segment, under 'segment', as each
+                30-second window is transcribed ('full' mode only).
+            'done': the complete 'result', as `analyze` returns it.
+        A cached result, a non-English recording or an error skips straight
+        to 'done'. Time to the first events does not grow with the length
+        of the recording.
+
+        Args:
+            audio (str | np.ndarray): See `analyze`.
+            timings (dict): See `analyze`.
+
+        Yields:
+            dict: Partial results, ending with the 'done' event.
+        """
+        return self._analyze_events(audio, timings, stream=True)
+
+    def _analyze_events(self, audio, timings: dict, stream: bool):
+        timings = dict(timings or {})
+        try:
+            with stage("analyze_total", timings):
+                result = yield from self._analyze(audio, timings, stream)
 
         except Exception as e:
             logger.error(f"Error in accent analysis: {str(e)}")
-            return {
+            result = {
                 "accent": "Error",
                 "confidence": 0.0,
                 "language": "unknown",
@@ -96,10 +257,554 @@ class AccentAnalyzer:
                 "transcript": str(e),
                 "summary": f"An error occurred during analysis: {str(e)}",
                 "all_scores": {},
+                "error": str(e),
+            }
+
+        loads = load_events(self._reported_loads)
+        self._reported_loads += len(loads)
+        timings["model_loads"] = record_model_loads(loads)
+
+        outcome = {"Error": "error", "Non-English or unclear": "non_english"}
+        metrics.inc(
+            "accent_analyses_total", outcome=outcome.get(result["accent"], "ok")
+        )
+        try:
+            write_prometheus()
+        except OSError as e:
+            logger.warning(f"Could not write metrics file: {str(e)}")
+
+        # Copy so cached results never carry the timings of one request
+        yield {"stage": "done", "result": {**result, "timings": timings}}
+
+    def _analyze(self, audio, timings: dict, stream: bool):
+        # Decode once and share the buffer with every model stage
+        if isinstance(audio, str):
+            with stage("decode", timings):
+                audio = decode_audio(audio)
+
+        timings["audio_seconds"] = round(len(audio) / SAMPLE_RATE, 2)
+        metrics.observe(
+            "accent_audio_seconds",
+            timings["audio_seconds"],
+            buckets=(5, 30, 60, 300, 600, 1800, 3600, 7200),
+        )
+
+        # Only full runs transcribe while streaming; other modes match analyze
+        streamed = stream and self.mode == FULL
+        with stage("cache_lookup", timings):
+            digest = audio_hash(audio)
+            result_key = f"{digest}|{self._config_key(streamed=streamed)}"
+            cached = None
+            if self.results_cache is not None:
+                # A full result answers every mode
+                cached = self.results_cache.get(
+                    f"{digest}|{self._config_key(FULL, streamed)}"
+                )
+                if cached is None and self.mode != FULL:
+                    cached = self.results_cache.get(result_key)
+        if cached is not None and cached.get("transcript_status") == TRANSCRIPT_PENDING:
+            cached = self.transcript(cached, wait=False)
+        # A pending result nobody is transcribing any more is recomputed
+        if cached is not None and (
+            cached.get("transcript_status") != TRANSCRIPT_PENDING
+            or cached["audio_id"] in self._transcriptions
+        ):
+            logger.info(f"Result cache hit for audio {digest[:12]}")
+            return cached
+
+        # Keep only speech; features are cached per original audio and mode
+        if self.vad:
+            with stage("vad", timings):
+                speech, speech_map = select_speech(audio, SAMPLE_RATE)
+        else:
+            speech, speech_map = audio, SpeechMap.identity(len(audio), SAMPLE_RATE)
+        timings["speech_seconds"] = round(len(speech) / SAMPLE_RATE, 2)
+        feature_key = f"{digest}|{self._audio_mode()}"
+
+        # Gate on the language of the first 30-second window
+        with stage("language_detection", timings):
+            language, language_prob = self._cached_feature(
+                f"{feature_key}|language|{WHISPER_KEY}",
+                lambda: self.language_detector.detect(speech),
+                valid=lambda value: value[0] != "unknown",
+            )
+        language_conf = round(language_prob * 100, 2)
+
+        # Only proceed if the speaker is speaking English
+        if language != "en" or language_conf < 80:
+            result = {
+                "accent": "Non-English or unclear",
+                "confidence": 0.0,
+                "language": language,
+                "language_score": language_conf,
+                "transcript": "",
+                "transcript_status": TRANSCRIPT_SKIPPED,
+                "summary": "The language detected is not English or is unclear.",
+                "all_scores": {},
+                "audio_id": digest,
+            }
+            if self.results_cache is not None:
+                self.results_cache.set(result_key, result)
+            return result
+        yield {
+            "stage": "language",
+            "language": language,
+            "language_score": language_conf,
+        }
+
+        # Get accent classification from the same decoded buffer
+        timeline = windows_used = None
+        if self.progressive:
+            # Stops on its own evidence, so nothing is worth caching per window
+            with stage("accent_embedding", timings):
+                accent, confidence, all_scores, timeline, windows_used = (
+                    self._predict_progressive(speech, speech_map)
+                )
+        elif self.windowed:
+            with stage("accent_embedding", timings):
+                spans, embeddings = self._cached_feature(
+                    f"{feature_key}|windows-{self.max_windows}|{ENCODER_KEY}",
+                    lambda: self._embed_windows(speech, speech_map),
+                )
+            with stage("accent_classification", timings):
+                accent, confidence, all_scores, timeline = (
+                    self.accent_classifier.classify_windows(spans, embeddings)
+                )
+        else:
+            with stage("accent_embedding", timings):
+                embedding = self._cached_feature(
+                    f"{feature_key}|embedding|{ENCODER_KEY}",
+                    lambda: self.accent_classifier.embed(speech, SAMPLE_RATE),
+                )
+                if self.embedding_store is not None:
+                    self.embedding_store.append(
+                        embedding_key(digest, ENCODER_KEY, self._audio_mode()),
+                        embedding,
+                    )
+            with stage("accent_classification", timings):
+                accent, confidence, all_scores = (
+                    self.accent_classifier.classify_embedding(embedding)
+                )
+        partial = {"accent": accent, "confidence": confidence, "all_scores": all_scores}
+        if timeline is not None:
+            partial["timeline"] = timeline
+        if windows_used is not None:
+            partial["windows_used"] = windows_used
+        yield {"stage": "accent", **partial}
+
+        # Transcribe reusing the detected language, unless the mode skips it
+        transcript_key = f"{feature_key}|transcript|{WHISPER_KEY}|{language}"
+        if streamed:
+            transcript_key = f"{transcript_key}|stream"
+        transcript, transcript_status = "", TRANSCRIPT_SKIPPED
+        cached_transcript = None
+        if self.features_cache is not None and (self.mode != FULL or stream):
+            # A transcript from an earlier full run costs nothing to include
+            cached_transcript = self.features_cache.get(transcript_key)
+        if streamed:
+            with stage("transcription", timings):
+                transcription = cached_transcript
+                if transcription is None:
+                    transcription = yield from self._stream_transcript(
+                        transcript_key, speech, language, speech_map
+                    )
+                else:
+                    for segment in transcription["segments"]:
+                        yield {"stage": "segment", "segment": segment}
+            transcript, transcript_status = transcription["text"], TRANSCRIPT_DONE
+        elif self.mode == FULL:
+            with stage("transcription", timings):
+                transcript = self._cached_transcript(
+                    transcript_key, speech, language, speech_map
+                )["text"]
+            transcript_status = TRANSCRIPT_DONE
+        elif cached_transcript is not None:
+            transcript = cached_transcript["text"]
+            transcript_status = TRANSCRIPT_DONE
+        elif self.mode == DEFERRED:
+            transcript_status = TRANSCRIPT_PENDING
+
+        # Create result object
+        result = AccentAnalysisResult(
+            accent=accent,
+            confidence=confidence,
+            language=language,
+            language_score=language_conf,
+            transcript=transcript,
+            all_scores=all_scores,
+            timeline=timeline,
+            transcript_status=transcript_status,
+            audio_id=digest,
+            windows_used=windows_used,
+        ).to_dict()
+
+        if self.results_cache is not None:
+            self.results_cache.set(result_key, result)
+        if transcript_status == TRANSCRIPT_PENDING:
+            self._defer_transcription(
+                result, transcript_key, speech, language, speech_map
+            )
+        return result
+
+    def _stream_transcript(self, key: str, speech, language: str, speech_map):
+        """Yields segment events while transcribing, then returns the result."""
+        segments = []
+        for segment in self.transcriber.transcribe_stream(speech, language):
+            segment = speech_map.remap_segments([segment])[0]
+            segments.append(segment)
+            yield {"stage": "segment", "segment": segment}
+        transcription = {
+            "text": "".join(segment["text"] for segment in segments),
+            "language": language,
+            "segments": segments,
+            "language_confidence": None,
+        }
+        if self.features_cache is not None:
+            self.features_cache.set(key, transcription)
+        return transcription
+
+    def _cached_transcript(self, key: str, speech, language: str, speech_map) -> dict:
+        return self._cached_feature(
+            key,
+            lambda: self._transcribe(speech, language, speech_map),
+            valid=lambda value: value["language"] != "unknown",
+        )
+
+    def _defer_transcription(
+        self, result, transcript_key, speech, language, speech_map
+    ):
+        """Transcribes in the background and caches the completed result."""
+
+        def run():
+            transcription = self._cached_transcript(
+                transcript_key, speech, language, speech_map
+            )
+            if self.results_cache is not None:
+                # Stored as a full result, which every mode looks up first
+                self.results_cache.set(
+                    f"{result['audio_id']}|{self._config_key(FULL)}",
+                    {
+                        **result,
+                        "transcript": transcription["text"],
+                        "transcript_status": TRANSCRIPT_DONE,
+                    },
+                )
+            return transcription
+
+        if self._transcription_pool is None:
+            # One at a time: transcripts queue behind each other, not the CPU
+            self._transcription_pool = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="deferred-transcript"
+            )
+        self._prune_transcriptions()
+        self._transcriptions[result["audio_id"]] = self._transcription_pool.submit(run)
+        logger.info(f"Deferred transcription of audio {result['audio_id'][:12]}")
+
+    def _prune_transcriptions(self):
+        # Long-lived worker analyzers would otherwise keep every transcript;
+        # pending ones stay, finished ones beyond the newest few are dropped
+        finished = [
+            key for key, future in self._transcriptions.items() if future.done()
+        ]
+        for audio_id in finished[: max(0, len(finished) - KEEP_TRANSCRIPTIONS)]:
+            del self._transcriptions[audio_id]
+
+    def transcription(self, audio_id: str):
+        """
+        Returns the background transcription of a deferred analysis.
+
+        Args:
+            audio_id (str): The 'audio_id' of a result with
+                'transcript_status' 'pending'.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the Whisper result dict
+                ('text', 'segments', ...), or None if this analyzer has no
+                transcription for the audio. Only the `KEEP_TRANSCRIPTIONS`
+                most recent finished ones are kept; older transcripts are
+                served from the caches.
+        """
+        return self._transcriptions.get(audio_id)
+
+    def transcript(self, result: dict, wait: bool = True) -> dict:
+        """
+        Fills in the transcript of a deferred result.
+
+        Args:
+            result (dict): A result returned by `analyze`.
+            wait (bool): Block until a pending transcription finishes.
+
+        Returns:
+            dict: `result` with 'transcript' and 'transcript_status' updated.
+        """
+        future = self.transcription(result.get("audio_id"))
+        if future is not None and (wait or future.done()):
+            transcription = future.result()
+            return {
+                **result,
+                "transcript": transcription["text"],
+                "transcript_status": TRANSCRIPT_DONE,
             }
+        return result
+
+    def _transcribe(self, speech, language: str, speech_map: SpeechMap) -> dict:
+        """Transcribes the speech buffer with segment times in the original."""
+        result = self.transcriber.transcribe(speech, language=language)
+        result["segments"] = speech_map.remap_segments(result["segments"])
+        return result
+
+    def _predict_progressive(self, speech, speech_map: SpeechMap) -> tuple:
+        """Progressive accent inference with timeline spans in the original."""
+        accent, confidence, all_scores, timeline, windows_used, reason = (
+            self.accent_classifier.predict_progressive(
+                speech, SAMPLE_RATE, max_windows=self.max_windows
+            )
+        )
+        metrics.observe(
+            "accent_progressive_windows",
+            windows_used,
+            buckets=(1, 2, 3, 4, 8, 16, 32),
+            reason=reason,
+        )
+        for window in timeline:
+            window["start"] = round(speech_map.to_original(window["start"]), 2)
+            window["end"] = round(speech_map.to_original(window["end"], end=True), 2)
+        return accent, confidence, all_scores, timeline, windows_used
+
+    def _embed_windows(self, speech, speech_map: SpeechMap) -> tuple:
+        """Embeds windows of the speech buffer with spans in the original."""
+        spans, embeddings = self.accent_classifier.embed_windows(
+            speech, SAMPLE_RATE, max_windows=self.max_windows
+        )
+        spans = [
+            (
+                round(speech_map.to_original(start), 2),
+                round(speech_map.to_original(end, end=True), 2),
+            )
+            for start, end in spans
+        ]
+        return spans, embeddings
 
 
 def detect_accent(audio_path):
     analyzer = AccentAnalyzer()
     result = analyzer.analyze(audio_path)
     return result["accent"], result["confidence"], result["summary"]
+
+
+MEDIA_EXTENSIONS = {".wav", ".mp3", ".m4a", ".flac", ".ogg", ".mp4", ".mkv", ".webm"}
+
+# Analyzer held by each batch worker process, set up by _init_batch_worker
+_batch_analyzer = None
+
+
+def _init_batch_worker(
+    windowed: bool,
+    use_cache: bool,
+    threads: int = None,
+    mode: str = FULL,
+    shared: dict = None,
+    progressive: bool = False,
+):
+    """Warms the models once per batch worker process, loading any not shared."""
+    global _batch_analyzer
+    from services.model_registry import adopt_models, warmup
+
+    if threads:
+        set_torch_threads(threads)
+    adopt_models(shared or {})
+    warmup()
+    _batch_analyzer = AccentAnalyzer(
+        windowed=windowed, progressive=progressive, use_cache=use_cache, mode=mode
+    )
+
+
+def _analyze_input(source: str) -> dict:
+    """Analyzes one path or URL inside a batch worker."""
+    try:
+        timings = {}
+        audio = fetch_audio(source, timings=timings)
+        result = _batch_analyzer.analyze(audio, timings=timings)
+        status = "error" if result["accent"] == "Error" else "ok"
+        return {"input": source, "status": status, **result}
+    except Exception as e:
+        return {"input": source, "status": "error", "error": str(e)}
+
+
+def collect_inputs(source: str) -> list:
+    """
+    Lists the inputs of a batch run.
+
+    Args:
+        source (str): A directory, scanned recursively for audio and video
+            files, or a manifest file with one path or URL per line
+            (blank lines and lines starting with '#' are ignored).
+
+    Returns:
+        list[str]: Inputs in a stable order.
+    """
+    if os.path.isdir(source):
+        inputs = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                if os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS:
+                    inputs.append(os.path.abspath(os.path.join(root, name)))
+        return sorted(inputs)
+
+    with open(source, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def completed_inputs(output_path: str) -> set:
+    """Returns inputs that already have a successful record in the JSONL file."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Line cut short by a crash; it will be redone
+            if record.get("status") == "ok":
+                done.add(record["input"])
+    return done
+
+
+def run_batch(
+    source: str,
+    output_path: str,
+    workers: int = 2,
+    windowed: bool = False,
+    use_cache: bool = True,
+    mode: str = FULL,
+    progressive: bool = False,
+) -> dict:
+    """
+    Analyzes many recordings in parallel and streams results to JSONL.
+
+    The models are loaded once and shared with the worker processes.
+    Results are appended to `output_path` as soon as they finish, and
+    inputs that already have a successful record there are skipped, so an
+    interrupted run can simply be started again. Successful results are
+    also added to the analysis history.
+
+    Args:
+        source (str): Directory or manifest file, see `collect_inputs`.
+        output_path (str): JSONL file to append results to.
+        workers (int): Number of worker processes.
+        windowed (bool): Use windowed whole-recording accent inference.
+        use_cache (bool): Use the on-disk feature and result caches.
+        mode (str): 'full' or 'accent_only'; a batch run has nobody to
+            hand a deferred transcript to.
+        progressive (bool): Stop embedding windows once the accent is clear.
+
+    Returns:
+        dict: Counts of 'total', 'skipped', 'ok' and 'error' inputs.
+    """
+    inputs = collect_inputs(source)
+    done = completed_inputs(output_path)
+    todo = [item for item in inputs if item not in done]
+    counts = {
+        "total": len(inputs),
+        "skipped": len(inputs) - len(todo),
+        "ok": 0,
+        "error": 0,
+    }
+    logger.info(f"Batch: {len(todo)} to analyze, {counts['skipped']} already done")
+    if not todo:
+        return counts
+
+    # Start on a fresh line if the previous run died mid-write
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        with open(output_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    else:
+        needs_newline = False
+
+    # Load the models once here; the workers share these weights
+    context = multiprocessing.get_context()
+    history = get_history()
+    shared = {}
+    if SHARE_WEIGHTS:
+        shared = share_models(context.get_start_method())
+
+    with open(output_path, "a", encoding="utf-8") as out, ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_batch_worker,
+        initargs=(
+            windowed,
+            use_cache,
+            threads_per_share(workers),
+            mode,
+            shared,
+            progressive,
+        ),
+    ) as pool:
+        if needs_newline:
+            out.write("\n")
+        futures = [pool.submit(_analyze_input, item) for item in todo]
+        for future in as_completed(futures):
+            record = future.result()
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            counts[record["status"]] += 1
+            if record["status"] == "ok":
+                result = {
+                    k: v for k, v in record.items() if k not in ("input", "status")
+                }
+                history.record(record["input"], result, mode=mode)
+            logger.info(
+                f"[{counts['ok'] + counts['error']}/{len(todo)}] "
+                f"{record['input']}: {record.get('accent', record.get('error'))}"
+            )
+
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.accent_analyzer")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser(
+        "batch", help="Analyze a directory or manifest of paths/URLs in parallel"
+    )
+    batch.add_argument("source", help="Directory or manifest file (one input per line)")
+    batch.add_argument("-o", "--output", required=True, help="JSONL results file")
+    batch.add_argument("-j", "--workers", type=int, default=2)
+    batch.add_argument(
+        "--windowed", action="store_true", help="Score the whole recording"
+    )
+    batch.add_argument(
+        "--progressive",
+        action="store_true",
+        help="Embed windows until the accent is clear or the time budget ends",
+    )
+    batch.add_argument("--no-cache", action="store_true", help="Bypass disk caches")
+    batch.add_argument(
+        "--mode",
+        choices=[FULL, ACCENT_ONLY],
+        default=FULL,
+        help="'accent_only' skips the transcript",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "batch":
+        counts = run_batch(
+            args.source,
+            args.output,
+            workers=args.workers,
+            windowed=args.windowed,
+            progressive=args.progressive,
+            use_cache=not args.no_cache,
+            mode=args.mode,
+        )
+        print(json.dumps(counts))
+        return 0 if counts["error"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,22 @@
 import os
 import uuid
+import wave
 import logging
 import tempfile
-from moviepy.editor import VideoFileClip
 import subprocess
-import shutil
+import numpy as np
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+from core.cache import get_cache
+from core.metrics import stage
 
 # Logger setup
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+SAMPLE_RATE = 16000
+
 
 def download_video(video_url: str, download_dir: str) -> str:
     """
@@ -61,6 +68,8 @@ def extract_audio_from_video(video_path: str, output_dir: str) -> str:
     logger.info(f"Extracting audio from: {video_path}")
 
     try:
+        from moviepy.editor import VideoFileClip
+
         clip = VideoFileClip(video_path)
         clip.audio.write_audiofile(audio_path, fps=16000, nbytes=2, codec="pcm_s16le")
         clip.close()
@@ -72,25 +81,226 @@ def extract_audio_from_video(video_path: str, output_dir: str) -> str:
     return audio_path
 
 
-def process_video_url(video_url: str) -> str:
+def decode_audio(audio_path: str, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decodes an audio file once into a mono float32 buffer.
+
+    The buffer is meant to be shared by every model stage so that the file
+    is not decoded again by Whisper or librosa.
+
+    Args:
+        audio_path (str): Path to any audio/video file ffmpeg can read.
+        sr (int): Target sample rate.
+
+    Returns:
+        np.ndarray: Mono float32 samples in [-1, 1] at `sr` Hz.
+    """
+    if not os.path.isfile(audio_path):
+        raise FileNotFoundError(f"Audio file does not exist: {audio_path}")
+
+    logger.info(f"Decoding audio: {audio_path}")
+    result = subprocess.run(
+        _pcm_command(audio_path, sr), stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+
+    if result.returncode != 0:
+        logger.error("Failed to decode audio")
+        raise RuntimeError(result.stderr.decode())
+
+    return _pcm_to_float(result.stdout)
+
+
+def _pcm_command(source: str, sr: int) -> list:
+    """Builds an ffmpeg command that writes mono 16-bit PCM to stdout."""
+    return [
+        "ffmpeg",
+        "-nostdin",
+        "-threads",
+        "0",
+        "-i",
+        source,
+        "-vn",
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-acodec",
+        "pcm_s16le",
+        "-ar",
+        str(sr),
+        "-",
+    ]
+
+
+def _pcm_to_float(pcm: bytes) -> np.ndarray:
+    """Converts raw 16-bit PCM bytes to float32 samples in [-1, 1]."""
+    return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+
+
+def _local_path(video_url: str):
+    """Returns the filesystem path for local paths and file:// URLs, else None."""
+    parsed = urlparse(video_url)
+    if parsed.scheme == "file":
+        return url2pathname(parsed.path)
+    # Bare paths (including Windows drive letters) are read directly
+    if os.path.exists(video_url):
+        return video_url
+    return None
+
+
+def fetch_audio(
+    video_url: str, sr: int = SAMPLE_RATE, use_cache: bool = True, timings=None
+) -> np.ndarray:
+    """
+    Streams only the audio of a video into an in-memory PCM buffer.
+
+    Remote URLs are fetched with yt-dlp's best audio-only format and piped
+    straight into ffmpeg, so no video file or intermediate WAV is written.
+    Local paths and file:// URLs are decoded directly.
+
+    Decoded audio for remote URLs is kept in the "media" cache tier, so a
+    link that was submitted before is not downloaded again.
+
+    Args:
+        video_url (str): Public video URL, local path or file:// URL.
+        sr (int): Target sample rate.
+        use_cache (bool): Read and populate the media cache for remote URLs.
+        timings (dict): If given, receives the 'fetch_audio' stage timing.
+
+    Returns:
+        np.ndarray: Mono float32 samples in [-1, 1] at `sr` Hz.
+    """
+    with stage("fetch_audio", timings):
+        return _fetch_audio(video_url, sr, use_cache)
+
+
+def _fetch_audio(video_url: str, sr: int, use_cache: bool) -> np.ndarray:
+    local_path = _local_path(video_url)
+    if local_path is not None:
+        return decode_audio(local_path, sr)
+
+    media_cache = get_cache("media") if use_cache else None
+    cache_key = f"{video_url}|{sr}"
+    if media_cache is not None:
+        audio = media_cache.get(cache_key)
+        if audio is not None:
+            logger.info(f"Media cache hit for URL: {video_url}")
+            return audio
+
+    logger.info(f"Streaming audio from URL: {video_url}")
+
+    # yt-dlp progress output goes to a temp file so its pipe can never fill up
+    with tempfile.TemporaryFile() as download_log:
+        downloader = subprocess.Popen(
+            [
+                "yt-dlp",
+                "-f",
+                "bestaudio/best",
+                "--quiet",
+                "--no-progress",
+                video_url,
+                "-o",
+                "-",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=download_log,
+        )
+        decoder = subprocess.Popen(
+            _pcm_command("pipe:0", sr),
+            stdin=downloader.stdout,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        # Let yt-dlp receive SIGPIPE if ffmpeg exits early
+        downloader.stdout.close()
+        pcm, decode_errors = decoder.communicate()
+        downloader.wait()
+
+        if downloader.returncode != 0:
+            download_log.seek(0)
+            logger.error("Failed to download audio stream")
+            raise RuntimeError(download_log.read().decode(errors="replace"))
+
+    if decoder.returncode != 0:
+        logger.error("Failed to decode audio stream")
+        raise RuntimeError(decode_errors.decode(errors="replace"))
+
+    audio = _pcm_to_float(pcm)
+    logger.info(f"Streamed {len(audio) / sr:.1f}s of audio")
+    if media_cache is not None:
+        media_cache.set(cache_key, audio)
+    return audio
+
+
+def write_wav(audio: np.ndarray, path: str, sr: int = SAMPLE_RATE) -> str:
+    """Writes mono float32 samples in [-1, 1] as a 16-bit PCM WAV file."""
+    pcm = (np.clip(audio, -1.0, 32767 / 32768) * 32768).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sr)
+        f.writeframes(pcm.tobytes())
+    return path
+
+
+def _spool_wav(audio: np.ndarray, spool, timings=None) -> str:
+    # Written inside the spool directory so adding it is only a rename
+    with stage("spool_audio", timings):
+        fd, path = tempfile.mkstemp(suffix=".wav", dir=spool.directory)
+        os.close(fd)
+        try:
+            return write_wav(audio, path)
+        except BaseException:
+            os.remove(path)
+            raise
+
+
+def process_video_url(video_url: str, timings=None, persist: bool = True):
     """
-    Complete process: download video and return WAV path.
+    Complete process: fetch a video's audio, optionally keeping it on disk.
+
+    The audio is always streamed into memory with `fetch_audio`; no video
+    file or intermediate WAV is written.
 
     Args:
         video_url (str): The public video URL.
+        timings (dict): If given, receives per-stage wall/CPU timings.
+        persist (bool): Also write the audio as a WAV into the audio spool
+            (see `core.spool`) and return its path. The file is not leased
+            and may be evicted later; use `spooled_audio` to hold it while
+            a job reads it. Otherwise the decoded buffer is returned and
+            nothing touches the disk.
 
     Returns:
-        str: Path to processed WAV audio.
+        str | np.ndarray: Absolute path of the spooled WAV, or the decoded
+            mono float32 buffer when `persist` is False.
+    """
+    audio = fetch_audio(video_url, timings=timings)
+    if not persist:
+        return audio
+
+    from core.spool import get_spool
+
+    spool = get_spool()
+    final_audio_path = spool.add(_spool_wav(audio, spool, timings))
+    logger.info(f"Final audio path: {final_audio_path}")
+    return final_audio_path
+
+
+@contextmanager
+def spooled_audio(video_url: str, timings=None):
     """
-    samples_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "samples")
-    os.makedirs(samples_dir, exist_ok=True)
-    with tempfile.TemporaryDirectory() as temp_dir:
-        video_path = download_video(video_url, temp_dir)
-        audio_path = extract_audio_from_video(video_path, temp_dir)
-        # Copy audio to samples dir
-        final_audio_path = os.path.join(samples_dir, f"{uuid.uuid4()}.wav")
-        shutil.copy2(audio_path, final_audio_path)
-        # Always return an absolute, normalized path
-        final_audio_path = os.path.abspath(os.path.normpath(final_audio_path))
-        logger.info(f"Final audio path: {final_audio_path}")
-        return final_audio_path
+    Fetches a video's audio into the audio spool as a WAV and leases it.
+
+    For callers that need a file rather than a buffer: the file cannot be
+    evicted until the block exits, so hold it for the whole job.
+
+    Yields:
+        str: Absolute path of the spooled WAV.
+    """
+    from core.spool import get_spool
+
+    audio = fetch_audio(video_url, timings=timings)
+    spool = get_spool()
+    with spool.hold(_spool_wav(audio, spool, timings)) as path:
+        yield path
@@ -0,0 +1,240 @@
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+import logging
+import threading
+import numpy as np
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+CACHE_DIR = os.environ.get(
+    "ACCENT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache"),
+)
+
+# Byte budget per tier: decoded audio, model features, final results
+TIER_LIMITS = {
+    "media": 2 * 1024**3,
+    "features": 512 * 1024**2,
+    "results": 64 * 1024**2,
+}
+
+# Largest single entry per tier; 128 MiB is about 35 minutes of 16 kHz audio
+ENTRY_LIMITS = {
+    "media": 128 * 1024**2,
+    "features": 32 * 1024**2,
+    "results": 4 * 1024**2,
+}
+
+# Reads record LRU touches and hit/miss counts in memory and write them in
+# one transaction once this many are pending or this many seconds passed
+TOUCH_BATCH = 64
+TOUCH_INTERVAL = 5.0
+
+
+class DiskCache:
+    """
+    Size-bounded LRU cache stored in a SQLite file.
+
+    SQLite's file locking makes the cache safe to share between several
+    worker processes; each process (and thread) keeps its own connection.
+    Values are pickled, and the least recently used entries are evicted
+    once the total stored size exceeds `max_bytes`. Values larger than
+    `max_entry_bytes` are not stored.
+
+    `get` only reads, so readers never wait for each other. The access
+    times and hit/miss counts it produces are written in batches (see
+    `flush`), before every `set` and `stats`, so LRU order and counters
+    lag reads by at most `TOUCH_BATCH` reads or `TOUCH_INTERVAL` seconds.
+    """
+
+    def __init__(self, path: str, max_bytes: int, max_entry_bytes: int = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes or max_bytes, max_bytes)
+        self._local = threading.local()
+        self._touches = {}
+        self._counts = {"hits": 0, "misses": 0}
+        self._flushed = time.monotonic()
+        self._touch_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._transaction() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB, size INTEGER, accessed REAL)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross fork boundaries or threads
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        # Take the write lock up front so concurrent writers queue on `timeout`
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def _count(self, db, name: str, value: int = 1):
+        db.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, value),
+        )
+
+    def get(self, key: str, default=None):
+        """Returns the cached value for `key`, or `default` on a miss."""
+        # A single autocommit SELECT: a read transaction, no write lock
+        row = (
+            self._connect()
+            .execute("SELECT value FROM entries WHERE key = ?", (key,))
+            .fetchone()
+        )
+        with self._touch_lock:
+            if row is None:
+                self._counts["misses"] += 1
+            else:
+                self._counts["hits"] += 1
+                self._touches[key] = time.time()
+            due = (
+                len(self._touches) >= TOUCH_BATCH
+                or time.monotonic() - self._flushed >= TOUCH_INTERVAL
+            )
+        if due:
+            self.flush()
+        return default if row is None else pickle.loads(row[0])
+
+    def flush(self):
+        """Writes access times and hit/miss counts recorded by `get`."""
+        with self._touch_lock:
+            touches, self._touches = self._touches, {}
+            counts, self._counts = self._counts, {"hits": 0, "misses": 0}
+            self._flushed = time.monotonic()
+        if not touches and not any(counts.values()):
+            return
+        with self._transaction() as db:
+            self._write_touches(db, touches, counts)
+
+    def _write_touches(self, db, touches: dict, counts: dict):
+        db.executemany(
+            "UPDATE entries SET accessed = MAX(accessed, ?) WHERE key = ?",
+            [(accessed, key) for key, accessed in touches.items()],
+        )
+        for name, value in counts.items():
+            if value:
+                self._count(db, name, value)
+
+    def set(self, key: str, value):
+        """Stores `value` under `key` and evicts LRU entries over budget."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_entry_bytes:
+            logger.warning(
+                f"Not caching {key}: {len(blob)} bytes exceeds the "
+                f"{self.max_entry_bytes}-byte entry limit"
+            )
+            return
+        # Pending touches go in first so eviction sees recent reads
+        self.flush()
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+            self._evict(db)
+
+    def _evict(self, db):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute(
+            "SELECT key, size FROM entries ORDER BY accessed"
+        ).fetchall():
+            db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._count(db, "evictions")
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> dict:
+        """Returns entry count, stored bytes and hit/miss/eviction counters."""
+        self.flush()
+        db = self._connect()
+        entries, size = db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        counters = dict(db.execute("SELECT name, value FROM counters"))
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "max_entry_bytes": self.max_entry_bytes,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+        }
+
+    def clear(self):
+        with self._touch_lock:
+            self._touches = {}
+            self._counts = {"hits": 0, "misses": 0}
+        with self._transaction() as db:
+            db.execute("DELETE FROM entries")
+            db.execute("DELETE FROM counters")
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(tier: str) -> DiskCache:
+    """
+    Returns the process-wide cache for a tier.
+
+    Tiers:
+        media: URL -> decoded audio buffer
+        features: audio hash -> ECAPA embeddings and Whisper output
+        results: audio hash + model/config version -> final result dict
+    """
+    with _caches_lock:
+        if tier not in _caches:
+            _caches[tier] = DiskCache(
+                os.path.join(CACHE_DIR, f"{tier}.sqlite"),
+                TIER_LIMITS[tier],
+                ENTRY_LIMITS[tier],
+            )
+        return _caches[tier]
+
+
+def audio_hash(audio: np.ndarray) -> str:
+    """Content hash of a decoded audio buffer."""
+    return hashlib.sha256(
+        np.ascontiguousarray(audio, dtype=np.float32).tobytes()
+    ).hexdigest()
+
+
+def cache_stats() -> dict:
+    """Returns stats for every cache tier."""
+    return {tier: get_cache(tier).stats() for tier in TIER_LIMITS}
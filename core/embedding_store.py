@@ -0,0 +1,206 @@
+import os
+import logging
+import numpy as np
+from filelock import FileLock
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+EMBEDDINGS_DIR = os.environ.get(
+    "ACCENT_EMBEDDINGS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "embeddings"),
+)
+
+
+def embedding_key(audio_id: str, encoder: str, audio_mode: str) -> str:
+    """
+    Store key of an embedding: the audio hash plus the encoder (including
+    its precision) and the audio mode (VAD or raw) that produced it, since
+    embeddings from different configurations are not comparable.
+    """
+    return f"{audio_id}|{encoder}|{audio_mode}"
+
+
+def head_weights(head) -> tuple:
+    """
+    Reads a linear head for `EmbeddingStore.rescore`.
+
+    Args:
+        head: Path of a state_dict saved with `torch.save`, or a state_dict
+            (torch tensors or arrays) with 'weight' and 'bias'.
+
+    Returns:
+        tuple: (weight, bias) as float32 arrays.
+    """
+    if isinstance(head, (str, os.PathLike)):
+        import torch
+
+        head = torch.load(head, map_location="cpu")
+    weight, bias = head["weight"], head["bias"]
+    if hasattr(weight, "detach"):
+        weight, bias = weight.detach().cpu().numpy(), bias.detach().cpu().numpy()
+    return np.asarray(weight, dtype=np.float32), np.asarray(bias, dtype=np.float32)
+
+
+class EmbeddingStore:
+    """
+    Append-only store of ECAPA embeddings keyed by `embedding_key`.
+
+    Embeddings live in a raw float32 matrix file that is memory-mapped for
+    reading; row `i` belongs to the key on line `i` of the index file.
+    Rows are written before their index line, so a reader never sees a key
+    without its embedding. A file lock serializes writers across processes.
+    """
+
+    def __init__(self, directory: str = EMBEDDINGS_DIR, dim: int = 192):
+        self.directory = directory
+        self.dim = dim
+        self.matrix_path = os.path.join(directory, "embeddings.f32")
+        self.index_path = os.path.join(directory, "index.txt")
+        os.makedirs(directory, exist_ok=True)
+        self._lock = FileLock(os.path.join(directory, "store.lock"))
+        self._keys = []
+        self._rows = {}
+        self._index_offset = 0
+
+    def _refresh(self):
+        # Pick up rows appended by this or other processes since last read
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partially written line; read it next time
+                key = line[:-1].decode("utf-8")
+                self._rows[key] = len(self._keys)
+                self._keys.append(key)
+                self._index_offset += len(line)
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        self._refresh()
+        return key in self._rows
+
+    def keys(self) -> list:
+        """Returns the keys in row order."""
+        self._refresh()
+        return list(self._keys)
+
+    def append(self, key: str, embedding) -> int:
+        """
+        Adds an embedding unless the key is already stored.
+
+        Args:
+            key (str): Audio content hash, or an `embedding_key`.
+            embedding (np.ndarray): Embedding of shape (dim,).
+
+        Returns:
+            int: Row index of the key.
+        """
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if embedding.shape[0] != self.dim:
+            raise ValueError(
+                f"Expected {self.dim}-dim embedding, got {embedding.shape}"
+            )
+
+        with self._lock:
+            self._refresh()
+            if key in self._rows:
+                return self._rows[key]
+
+            with open(self.matrix_path, "ab") as f:
+                # Drop any partial row left by a crashed writer
+                f.truncate(len(self._keys) * self.dim * 4)
+                f.write(embedding.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.index_path, "ab") as f:
+                f.write(key.encode("utf-8") + b"\n")
+            self._refresh()
+            return self._rows[key]
+
+    def matrix(self) -> np.ndarray:
+        """Returns a read-only memory map of all stored embeddings (n, dim)."""
+        n = len(self)
+        if n == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.memmap(
+            self.matrix_path, dtype=np.float32, mode="r", shape=(n, self.dim)
+        )
+
+    def get(self, key: str):
+        """Returns the embedding for `key`, or None if it is not stored."""
+        self._refresh()
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        return np.array(self.matrix()[row])
+
+    def rescore(
+        self,
+        weight,
+        bias,
+        labels: dict,
+        confidence_threshold: float,
+        chunk_rows=65536,
+        config: str = None,
+    ) -> dict:
+        """
+        Re-applies a linear classification head to every stored embedding.
+
+        The whole archive is scored as one matmul per chunk of rows, so a
+        changed head, label map or threshold does not require re-encoding.
+
+        Args:
+            weight (np.ndarray): Head weights of shape (num_labels, dim).
+            bias (np.ndarray): Head bias of shape (num_labels,).
+            labels (dict): Row index of the logits -> label name.
+            confidence_threshold (float): Minimum top probability (0-1).
+            chunk_rows (int): Rows scored per matmul, bounds peak memory.
+            config (str): Only score keys ending in '|<config>', for
+                example '<encoder>|<audio mode>'; see `embedding_key`.
+
+        Returns:
+            dict: {
+                'keys': list of keys in row order,
+                'accent': array of labels ("Uncertain" below the threshold),
+                'confidence': array of top probabilities (0-100%),
+                'probs': array of shape (n, num_labels)
+            }
+        """
+        weight = np.asarray(weight, dtype=np.float32)
+        bias = np.asarray(bias, dtype=np.float32)
+        matrix = self.matrix()
+        keys = self.keys()[: len(matrix)]
+        rows = np.arange(len(keys))
+        if config is not None:
+            rows = np.array(
+                [i for i, key in enumerate(keys) if key.endswith(f"|{config}")],
+                dtype=np.int64,
+            )
+            keys = [keys[i] for i in rows]
+
+        probs = np.empty((len(rows), len(bias)), dtype=np.float32)
+        for start in range(0, len(rows), chunk_rows):
+            # Copies only this chunk of rows out of the memory map
+            logits = matrix[rows[start : start + chunk_rows]] @ weight.T + bias
+            logits -= logits.max(axis=1, keepdims=True)
+            chunk = np.exp(logits)
+            probs[start : start + chunk_rows] = chunk / chunk.sum(axis=1, keepdims=True)
+
+        top = probs.argmax(axis=1)
+        confidence = probs[np.arange(len(top)), top]
+        names = np.array([labels[i] for i in range(len(bias))] + ["Uncertain"])
+        accent = names[np.where(confidence >= confidence_threshold, top, len(bias))]
+
+        logger.info(f"Re-scored {len(keys)} stored embeddings")
+        return {
+            "keys": keys,
+            "accent": accent,
+            "confidence": np.round(confidence * 100, 2),
+            "probs": probs,
+        }
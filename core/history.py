@@ -0,0 +1,312 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+HISTORY_PATH = os.environ.get(
+    "ACCENT_HISTORY_PATH",
+    os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), "history", "analyses.sqlite"
+    ),
+)
+
+# Columns a history query can filter on
+FILTERS = ("url", "audio_id", "accent", "language", "mode")
+
+# Accent of a failed analysis; such results are not history
+ERROR_ACCENT = "Error"
+
+# Columns of a record without its full result
+_SUMMARY = (
+    "id, created, url, audio_id, mode, accent, confidence, language, "
+    "language_score, transcript_status"
+)
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS analyses ("
+    "id INTEGER PRIMARY KEY, created REAL NOT NULL, url TEXT, audio_id TEXT, "
+    "mode TEXT, accent TEXT, confidence REAL, language TEXT, "
+    "language_score REAL, transcript_status TEXT, result TEXT NOT NULL)",
+    # Each filter index ends in id, so filtered pages come straight off it
+    "CREATE INDEX IF NOT EXISTS analyses_url ON analyses(url, id)",
+    "CREATE INDEX IF NOT EXISTS analyses_audio_id ON analyses(audio_id, id)",
+    "CREATE INDEX IF NOT EXISTS analyses_accent ON analyses(accent, id)",
+    "CREATE INDEX IF NOT EXISTS analyses_language ON analyses(language, id)",
+    "CREATE INDEX IF NOT EXISTS analyses_mode ON analyses(mode, id)",
+    "CREATE INDEX IF NOT EXISTS analyses_created ON analyses(created)",
+    # Per-day counts kept up to date on write, so aggregates never scan rows.
+    # A missing accent or language is stored as '', since NULLs never conflict
+    "CREATE TABLE IF NOT EXISTS daily ("
+    "day TEXT, accent TEXT, language TEXT, analyses INTEGER, "
+    "confidence_sum REAL, PRIMARY KEY (day, accent, language))",
+]
+
+
+def _day(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+class HistoryStore:
+    """
+    Every finished analysis, kept in a SQLite file for later queries.
+
+    Rows hold the URL, audio hash, mode, the headline fields of the result
+    and the full result as JSON. Pages are read newest first with keyset
+    pagination (pass the previous page's 'next' cursor as `before`), so a
+    page costs the same at row ten million as at row ten. Aggregates read
+    a per-day rollup that is updated in the same transaction as each
+    insert. Like `DiskCache`, each process and thread keeps its own
+    connection, so the store can be shared by several processes.
+    """
+
+    def __init__(self, path: str = HISTORY_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._transaction() as db:
+            for statement in _SCHEMA:
+                db.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross fork boundaries or threads
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def record(self, url: str, result: dict, mode: str = "full", created=None) -> int:
+        """
+        Stores one analysis result.
+
+        Failed analyses (accent 'Error') are not stored.
+
+        Args:
+            url (str): The analyzed URL or path.
+            result (dict): Result returned by `AccentAnalyzer.analyze`.
+            mode (str): Analysis mode the result was produced in.
+            created (float): Unix time of the analysis, defaults to now.
+
+        Returns:
+            int: Id of the new row, or None if the result was not stored.
+        """
+        if result.get("accent") == ERROR_ACCENT:
+            logger.info(f"Not recording failed analysis of {url}")
+            return None
+        created = time.time() if created is None else created
+        with self._transaction() as db:
+            row_id = db.execute(
+                "INSERT INTO analyses (created, url, audio_id, mode, accent, "
+                "confidence, language, language_score, transcript_status, result) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    created,
+                    url,
+                    result.get("audio_id"),
+                    mode,
+                    result.get("accent"),
+                    result.get("confidence"),
+                    result.get("language"),
+                    result.get("language_score"),
+                    result.get("transcript_status"),
+                    json.dumps(result, ensure_ascii=False),
+                ),
+            ).lastrowid
+            db.execute(
+                "INSERT INTO daily VALUES (?, COALESCE(?, ''), COALESCE(?, ''), 1, ?) "
+                "ON CONFLICT(day, accent, language) DO UPDATE SET "
+                "analyses = analyses + 1, "
+                "confidence_sum = confidence_sum + excluded.confidence_sum",
+                (
+                    _day(created),
+                    result.get("accent"),
+                    result.get("language"),
+                    result.get("confidence") or 0.0,
+                ),
+            )
+        return row_id
+
+    def update_result(self, row_id: int, result: dict):
+        """Replaces a stored result, e.g. once a deferred transcript is in."""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE analyses SET result = ?, transcript_status = ? WHERE id = ?",
+                (
+                    json.dumps(result, ensure_ascii=False),
+                    result.get("transcript_status"),
+                    row_id,
+                ),
+            )
+
+    @staticmethod
+    def _row(row, with_result: bool) -> dict:
+        record = {key: row[key] for key in row.keys() if key != "result"}
+        if with_result:
+            record["result"] = json.loads(row["result"])
+        return record
+
+    def get(self, row_id: int) -> dict:
+        """Returns one record with its full result, or None."""
+        row = (
+            self._connect()
+            .execute("SELECT * FROM analyses WHERE id = ?", (row_id,))
+            .fetchone()
+        )
+        return None if row is None else self._row(row, with_result=True)
+
+    def latest(self, **filters) -> dict:
+        """
+        Returns the newest successful record matching `filters`, with its
+        result. Failed analyses stored by older versions are skipped.
+        """
+        page = self.query(limit=1, with_results=True, errors=False, **filters)
+        return page["rows"][0] if page["rows"] else None
+
+    def query(
+        self,
+        limit: int = 50,
+        before: int = None,
+        since: float = None,
+        until: float = None,
+        with_results: bool = False,
+        errors: bool = True,
+        **filters,
+    ) -> dict:
+        """
+        Returns one page of records, newest first.
+
+        Args:
+            limit (int): Page size.
+            before (int): Cursor from the previous page's 'next'.
+            since (float): Only analyses at or after this Unix time.
+            until (float): Only analyses before this Unix time.
+            with_results (bool): Include each full result dict.
+            errors (bool): Include failed analyses (accent 'Error').
+            **filters: Exact matches on 'url', 'audio_id', 'accent',
+                'language' or 'mode'.
+
+        Returns:
+            dict: {'rows': [record, ...], 'next': cursor or None}
+        """
+        unknown = set(filters) - set(FILTERS)
+        if unknown:
+            raise ValueError(
+                f"Unknown history filters {sorted(unknown)}, use {FILTERS}"
+            )
+
+        clauses, params = [], []
+        for column, value in filters.items():
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if not errors:
+            clauses.append("accent IS NOT ?")
+            params.append(ERROR_ACCENT)
+        if before is not None:
+            clauses.append("id < ?")
+            params.append(before)
+        if since is not None:
+            clauses.append("created >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        columns = "*" if with_results else _SUMMARY
+        rows = (
+            self._connect()
+            .execute(
+                f"SELECT {columns} FROM analyses {where} ORDER BY id DESC LIMIT ?",
+                params + [limit + 1],
+            )
+            .fetchall()
+        )
+        page = [self._row(row, with_results) for row in rows[:limit]]
+        return {
+            "rows": page,
+            "next": page[-1]["id"] if len(rows) > limit else None,
+        }
+
+    def accent_distribution(self, since: float = None, until: float = None) -> list:
+        """
+        Counts analyses per day (UTC) and accent from the rollup.
+
+        Returns:
+            list[dict]: {'day', 'accent', 'analyses', 'mean_confidence'},
+                oldest day first.
+        """
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("day >= ?")
+            params.append(_day(since))
+        if until is not None:
+            clauses.append("day <= ?")
+            params.append(_day(until))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = (
+            self._connect()
+            .execute(
+                "SELECT day, NULLIF(accent, '') AS accent, SUM(analyses) AS analyses, "
+                "SUM(confidence_sum) / SUM(analyses) AS mean_confidence "
+                f"FROM daily {where} GROUP BY day, 2 ORDER BY day, 2",
+                params,
+            )
+            .fetchall()
+        )
+        return [
+            {**dict(row), "mean_confidence": round(row["mean_confidence"], 2)}
+            for row in rows
+        ]
+
+    def stats(self) -> dict:
+        """Returns total analyses and counts per accent and per language."""
+        db = self._connect()
+
+        def counts(column):
+            return dict(
+                db.execute(
+                    f"SELECT NULLIF({column}, ''), SUM(analyses) FROM daily "
+                    "GROUP BY 1 ORDER BY SUM(analyses) DESC"
+                ).fetchall()
+            )
+
+        accents = counts("accent")
+        return {
+            "analyses": sum(accents.values()),
+            "accents": accents,
+            "languages": counts("language"),
+        }
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_history() -> HistoryStore:
+    """Returns the process-wide history store, creating it on first use."""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = HistoryStore()
+        return _history
@@ -0,0 +1,394 @@
+import os
+import time
+import uuid
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from core.history import get_history
+from core.memory import memory_report
+from services.batching import threads_per_share
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Job states, in the order a job moves through them
+QUEUED = "queued"
+DOWNLOADING = "downloading"
+ANALYZING = "analyzing"
+DONE = "done"
+FAILED = "failed"
+
+# Per-worker-process state, set up by _init_worker
+_worker_states = None
+_worker_analyzers = {}
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+def _init_worker(states, threads: int = None, shared: dict = None):
+    """Warms the models once in each worker process, loading any not shared."""
+    global _worker_states
+    from services.batching import set_torch_threads
+    from services.model_registry import adopt_models, warmup
+
+    _worker_states = states
+    if threads:
+        set_torch_threads(threads)
+    adopt_models(shared or {})
+    report = warmup()
+    _worker_analyzer()
+    states[f"worker:{os.getpid()}"] = report["ready"]
+
+
+def _worker_analyzer(mode: str = "full"):
+    """Returns this worker's analyzer for a mode; they share the models."""
+    from core.accent_analyzer import AccentAnalyzer
+
+    if mode not in _worker_analyzers:
+        _worker_analyzers[mode] = AccentAnalyzer(mode=mode)
+    return _worker_analyzers[mode]
+
+
+def _ping():
+    return os.getpid()
+
+
+def _set_state(job_id: str, state: str):
+    job = dict(_worker_states[job_id])
+    job["state"] = state
+    job["updated"] = time.time()
+    _worker_states[job_id] = job
+
+
+def _publish_partial(job_id: str, event: dict):
+    """Adds a partial result from `analyze_stream` to the job record."""
+    job = dict(_worker_states[job_id])
+    partial = dict(job.get("partial") or {"segments": []})
+    if event["stage"] == "segment":
+        partial["segments"] = partial["segments"] + [event["segment"]]
+    else:
+        partial.update({k: v for k, v in event.items() if k != "stage"})
+    job["partial"] = partial
+    job["updated"] = time.time()
+    _worker_states[job_id] = job
+
+
+def _transcript_key(job_id: str) -> str:
+    return f"transcript:{job_id}"
+
+
+def _publish_transcript(job_id: str, future):
+    """
+    Records a deferred transcript once it is ready.
+
+    It goes under its own key rather than into the job record, which the
+    parent rewrites in `_finish` and could otherwise overwrite.
+    """
+    try:
+        transcript = {"status": "done", "text": future.result()["text"]}
+    except Exception as e:
+        logger.error(f"Deferred transcript of job {job_id} failed: {str(e)}")
+        transcript = {"status": "skipped", "text": ""}
+    _worker_states[_transcript_key(job_id)] = transcript
+
+
+def _run_job(job_id: str, video_url: str, mode: str = "full") -> dict:
+    """Runs one analysis inside a worker process."""
+    from core.audio_downloader import fetch_audio
+
+    timings = {}
+    _set_state(job_id, DOWNLOADING)
+    audio = fetch_audio(video_url, timings=timings)
+
+    _set_state(job_id, ANALYZING)
+    analyzer = _worker_analyzer(mode)
+    for event in analyzer.analyze_stream(audio, timings=timings):
+        if event["stage"] == "done":
+            result = event["result"]
+        else:
+            # Language, accent and transcript segments show up as they finish
+            _publish_partial(job_id, event)
+    if result.get("transcript_status") == "pending":
+        # The job is done once the accent is in; the transcript follows
+        future = analyzer.transcription(result["audio_id"])
+        future.add_done_callback(lambda f: _publish_transcript(job_id, f))
+    return result
+
+
+def _shared_models(start_method: str) -> dict:
+    """Loads the models once in this process for the workers to share."""
+    from services.model_registry import SHARE_WEIGHTS, share_models
+
+    if not SHARE_WEIGHTS:
+        return {}
+    try:
+        return share_models(start_method)
+    except Exception as e:
+        logger.error(f"Could not load shared models, workers load their own: {e}")
+        return {}
+
+
+class JobManager:
+    """
+    Runs accent analyses in a bounded pool of worker processes.
+
+    Nothing is started until `start` (or the first `submit`): then a
+    background thread loads the models once in this process and shares them
+    with the workers (see `services.model_registry.share_models`), which keep
+    them warm. Reading `stats` or `memory` never loads a model. Callers get a
+    job id back from `submit` right away, even while the models are still
+    loading, and poll `status` for progress; once `max_pending` jobs are
+    queued or running, further submissions are rejected with
+    `QueueFullError`.
+
+    Args:
+        max_workers (int): Number of worker processes.
+        max_pending (int): Maximum number of unfinished jobs.
+        keep_finished (int): Finished jobs kept for polling before the
+            oldest are forgotten.
+    """
+
+    def __init__(
+        self, max_workers: int = 2, max_pending: int = 8, keep_finished: int = 256
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._finished = deque()
+        self._keep_finished = keep_finished
+        self._manager = None
+        self._states = {}
+        self._starter = None
+        self._executor = None
+        self._waiting = []  # Jobs submitted before the workers started
+        self._results = {}
+        self._history_ids = {}  # Deferred jobs whose transcript is still due
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Starts the workers in the background and returns right away.
+
+        The models are loaded by a background thread, never under `_lock`;
+        jobs submitted meanwhile wait in the queue. Calling it again does
+        nothing.
+        """
+        with self._lock:
+            if self._starter is not None:
+                return
+            # The job records live here, so the manager process is forked
+            # now, before any model is loaded
+            self._manager = multiprocessing.Manager()
+            self._states = self._manager.dict()
+            self._starter = threading.Thread(
+                target=self._start, name="job-manager-start", daemon=True
+            )
+            self._starter.start()
+
+    def _start(self):
+        """Loads the shared models, starts the workers and sends them the queue."""
+        context = multiprocessing.get_context()
+        # Each worker gets an equal share of the cores for torch and uses
+        # the weights loaded here rather than its own copy
+        executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(
+                self._states,
+                threads_per_share(self.max_workers),
+                _shared_models(context.get_start_method()),
+            ),
+        )
+        # Start every worker now so they warm up side by side
+        for _ in range(self.max_workers):
+            executor.submit(_ping)
+        with self._lock:
+            self._executor = executor
+            waiting, self._waiting = self._waiting, []
+        for job in waiting:
+            self._dispatch(*job)
+
+    def _dispatch(self, job_id: str, video_url: str, mode: str):
+        future = self._executor.submit(_run_job, job_id, video_url, mode)
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+
+    def submit(self, video_url: str, mode: str = "full") -> str:
+        """
+        Queues a video URL for analysis.
+
+        Starts the workers if `start` was not called yet, without waiting
+        for them.
+
+        Args:
+            video_url (str): Direct MP4 or Loom link, local path or URL.
+            mode (str): Analysis mode, see `AccentAnalyzer`. In 'deferred'
+                mode the job is done once the accent is known and the
+                result's transcript fills in on a later `status` call.
+
+        Returns:
+            str: Job id to pass to `status`.
+
+        Raises:
+            QueueFullError: If `max_pending` jobs are already unfinished.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(
+                    f"{self._pending} jobs are already waiting, try again shortly"
+                )
+            self._pending += 1
+        self.start()
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._states[job_id] = {
+            "id": job_id,
+            "url": video_url,
+            "mode": mode,
+            "state": QUEUED,
+            "submitted": now,
+            "updated": now,
+            "error": None,
+        }
+        with self._lock:
+            started = self._executor is not None
+            if not started:
+                # `_start` sends it to the workers once they are up
+                self._waiting.append((job_id, video_url, mode))
+        if started:
+            self._dispatch(job_id, video_url, mode)
+        logger.info(f"Queued job {job_id} for {video_url}")
+        return job_id
+
+    def _finish(self, job_id: str, future):
+        job = dict(self._states[job_id])
+        job.pop("partial", None)  # Superseded by the result
+        try:
+            result = future.result()
+            if result["accent"] == "Error":
+                # The analyzer reports its own failures as an "Error" result
+                raise RuntimeError(result.get("error") or result["summary"])
+            self._results[job_id] = result
+            job["state"] = DONE
+            self._record_history(job_id, job)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            job["state"] = FAILED
+            job["error"] = str(e)
+        job["updated"] = time.time()
+        self._states[job_id] = job
+        with self._lock:
+            self._pending -= 1
+            self._finished.append(job_id)
+            while len(self._finished) > self._keep_finished:
+                old_id = self._finished.popleft()
+                self._states.pop(old_id, None)
+                self._states.pop(_transcript_key(old_id), None)
+                self._results.pop(old_id, None)
+                self._history_ids.pop(old_id, None)
+
+    def _record_history(self, job_id: str, job: dict):
+        result = self._results[job_id]
+        try:
+            row_id = get_history().record(job["url"], result, mode=job["mode"])
+        except Exception as e:
+            logger.error(f"Could not record job {job_id} in history: {str(e)}")
+            return
+        if result.get("transcript_status") == "pending":
+            self._history_ids[job_id] = row_id
+
+    def status(self, job_id: str) -> dict:
+        """
+        Returns the job record with its current state.
+
+        The record has keys 'id', 'url', 'mode', 'state', 'submitted',
+        'updated', 'error' and, once the job is done, 'result'. While the
+        job is analyzing, 'partial' holds what is known so far: 'language'
+        and 'language_score', then 'accent', 'confidence' and
+        'all_scores', and the transcript 'segments' finished so far.
+        """
+        job = self._states.get(job_id)
+        if job is None:
+            raise KeyError(f"Unknown job id: {job_id}")
+        job = dict(job)
+        result = self._results.get(job_id)
+        transcript = self._states.get(_transcript_key(job_id))
+        if result is not None and transcript is not None:
+            # A deferred transcript finished after the job did
+            result = {
+                **result,
+                "transcript": transcript["text"],
+                "transcript_status": transcript["status"],
+            }
+            row_id = self._history_ids.pop(job_id, None)
+            if row_id is not None:
+                try:
+                    get_history().update_result(row_id, result)
+                except Exception as e:
+                    logger.error(f"Could not update history of job {job_id}: {str(e)}")
+        job["result"] = result
+        return job
+
+    def stats(self) -> dict:
+        """
+        Counts jobs per state and workers whose models are warm.
+
+        'started' is whether `start` was called and 'loading' whether the
+        shared models are still being loaded.
+        """
+        counts = {state: 0 for state in (QUEUED, DOWNLOADING, ANALYZING, DONE, FAILED)}
+        ready_workers = 0
+        for key, value in self._states.items():
+            if key.startswith("worker:"):
+                ready_workers += bool(value)
+            elif not key.startswith("transcript:"):
+                counts[value["state"]] += 1
+        return {
+            "started": self._starter is not None,
+            "loading": self._starter is not None and self._executor is None,
+            "workers": self.max_workers,
+            "ready_workers": ready_workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "jobs": counts,
+        }
+
+    def memory(self) -> dict:
+        """
+        Reports unique and shared memory of this process and each worker.
+
+        See `core.memory.memory_report`; workers appear once they are ready.
+        """
+        pids = {"parent": os.getpid()}
+        for key in self._states.keys():
+            if key.startswith("worker:"):
+                pids[key] = int(key.split(":", 1)[1])
+        return memory_report(pids)
+
+    def shutdown(self, wait: bool = True):
+        if self._starter is None:
+            return
+        self._starter.join()
+        self._executor.shutdown(wait=wait)
+        self._manager.shutdown()
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Returns the process-wide job manager, creating it on first use."""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager(
+                max_workers=int(os.environ.get("ACCENT_JOB_WORKERS", 2)),
+                max_pending=int(os.environ.get("ACCENT_JOB_MAX_PENDING", 8)),
+            )
+        return _job_manager
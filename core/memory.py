@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# smaps_rollup fields, in kB, summed into the report
+_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared",
+    "Shared_Dirty": "shared",
+    "Private_Clean": "unique",
+    "Private_Dirty": "unique",
+    "Swap": "swap",
+}
+
+
+def process_memory(pid: int) -> dict:
+    """
+    Reads a process's memory use from /proc/<pid>/smaps_rollup (Linux).
+
+    'unique' is memory only this process maps (what it would free on exit),
+    'shared' is mapped by other processes as well, such as model weights
+    inherited from the parent, and 'pss' splits shared pages evenly between
+    the processes mapping them.
+
+    Returns:
+        dict: 'pid', 'rss_mb', 'pss_mb', 'unique_mb', 'shared_mb' and
+            'swap_mb', or just 'pid' and 'error' if it cannot be read.
+    """
+    totals = dict.fromkeys(_FIELDS.values(), 0)
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if parts and parts[0].rstrip(":") in _FIELDS:
+                    totals[_FIELDS[parts[0].rstrip(":")]] += int(parts[1])
+    except OSError as e:
+        return {"pid": pid, "error": str(e)}
+    return {"pid": pid, **{f"{k}_mb": round(v / 1024, 1) for k, v in totals.items()}}
+
+
+def memory_report(pids: dict) -> dict:
+    """
+    Reports memory use of a group of processes.
+
+    Args:
+        pids (dict): Role name -> pid, for example {'parent': 10, 'worker-1': 11}.
+
+    Returns:
+        dict: {'processes': {role: process_memory(pid)}, 'total_unique_mb',
+            'total_pss_mb'}. The PSS total is what the group really costs
+            the host; a worker's unique memory is roughly what one more
+            worker would add.
+    """
+    processes = {role: process_memory(pid) for role, pid in pids.items()}
+    readable = [p for p in processes.values() if "error" not in p]
+    return {
+        "processes": processes,
+        "total_unique_mb": round(sum(p["unique_mb"] for p in readable), 1),
+        "total_pss_mb": round(sum(p["pss_mb"] for p in readable), 1),
+    }
+
+
+if __name__ == "__main__":
+    # python -m core.memory <pid> [<pid> ...]
+    pids = [int(pid) for pid in sys.argv[1:]] or [os.getpid()]
+    print(json.dumps(memory_report({str(pid): pid for pid in pids}), indent=2))
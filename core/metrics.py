@@ -0,0 +1,264 @@
+import os
+import re
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+METRICS_DIR = os.environ.get(
+    "ACCENT_METRICS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "metrics"),
+)
+
+# Histogram buckets in seconds, wide enough for hour-long transcriptions
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_HELP = {
+    "accent_stage_wall_seconds": "Wall time spent in each pipeline stage.",
+    "accent_stage_cpu_seconds": "Process CPU time spent in each pipeline stage.",
+    "accent_stage_total": "Number of times each pipeline stage ran.",
+    "accent_audio_seconds": "Duration of analyzed audio.",
+    "accent_model_load_seconds": "Time taken to load each model.",
+    "accent_model_loads_total": "Number of model loads.",
+    "accent_analyses_total": "Number of analyses by outcome.",
+    "accent_spool_evictions_total": "Audio spool files removed, by reason.",
+    "accent_spool_bytes": "Bytes stored in the audio spool.",
+    "accent_spool_files": "Files stored in the audio spool.",
+    "accent_spool_leased_bytes": "Audio spool bytes held by running jobs.",
+    "accent_progressive_windows": "Windows used by progressive accent inference.",
+}
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """In-process counters, gauges and histograms in Prometheus text format."""
+
+    def __init__(self):
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, buckets=DEFAULT_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = _Histogram(buckets)
+            self._histograms[key].observe(value)
+
+    def render(self, **const_labels) -> str:
+        """
+        Returns all metrics in the Prometheus text exposition format.
+
+        Args:
+            **const_labels: Labels added to every series, such as the pid.
+        """
+
+        def fmt(labels, extra=()):
+            pairs = list(const_labels.items()) + list(labels) + list(extra)
+            if not pairs:
+                return ""
+            body = ",".join(f'{k}="{str(v)}"' for k, v in pairs)
+            return "{" + body + "}"
+
+        lines = []
+        with self._lock:
+            seen = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{fmt(labels)} {value}")
+
+            for (name, labels), value in sorted(self._gauges.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name}{fmt(labels)} {value}")
+
+            for (name, labels), hist in sorted(self._histograms.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} histogram")
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(f"{name}_bucket{fmt(labels, [('le', bound)])} {count}")
+                lines.append(
+                    f"{name}_bucket{fmt(labels, [('le', '+Inf')])} {hist.count}"
+                )
+                lines.append(f"{name}_sum{fmt(labels)} {hist.sum}")
+                lines.append(f"{name}_count{fmt(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+@contextmanager
+def stage(name: str, timings: dict = None):
+    """
+    Times a pipeline stage.
+
+    Wall and CPU time are recorded in the process-wide histograms and, when
+    `timings` is given, stored as timings[name] = {'wall_s', 'cpu_s'}.
+    """
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        metrics.observe("accent_stage_wall_seconds", wall, stage=name)
+        metrics.observe("accent_stage_cpu_seconds", cpu, stage=name)
+        metrics.inc("accent_stage_total", stage=name)
+        if timings is not None:
+            timings[name] = {"wall_s": round(wall, 4), "cpu_s": round(cpu, 4)}
+
+
+def record_model_loads(events) -> list:
+    """
+    Records model-load events from `services.model_registry.load_events`.
+
+    Returns:
+        list[dict]: The events as {'model', 'seconds'} dicts.
+    """
+    loads = []
+    for name, seconds in events:
+        metrics.inc("accent_model_loads_total", model=name)
+        metrics.observe("accent_model_load_seconds", seconds, model=name)
+        loads.append({"model": name, "seconds": seconds})
+    return loads
+
+
+_METRICS_FILE = re.compile(r"accent_(\d+)\.prom$")
+_claimed_pid = None
+
+
+def metrics_path() -> str:
+    # One file per process so worker processes never overwrite each other
+    return os.path.join(METRICS_DIR, f"accent_{os.getpid()}.prom")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists but belongs to another user
+    return True
+
+
+def remove_stale_metrics(directory: str = METRICS_DIR) -> int:
+    """
+    Deletes .prom files written by processes that are no longer running.
+
+    Returns:
+        int: Number of files removed.
+    """
+    removed = 0
+    if not os.path.isdir(directory):
+        return removed
+    for name in os.listdir(directory):
+        match = _METRICS_FILE.match(name)
+        if match and not _pid_alive(int(match.group(1))):
+            try:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+            except FileNotFoundError:
+                pass  # Another process got to it first
+    return removed
+
+
+def _remove_own_metrics(path: str, pid: int):
+    # atexit handlers are inherited by forked children; only the writer cleans up
+    if os.getpid() == pid:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def write_prometheus(path: str = None) -> str:
+    """
+    Atomically writes the metrics to a textfile-collector style .prom file.
+
+    Without `path` each process writes its own metrics/accent_<pid>.prom
+    and labels every series with its `pid`, so node_exporter's textfile
+    collector can merge the files without duplicate series. The first
+    write in a process deletes files left by dead processes, and the
+    process deletes its own file when it exits.
+
+    Returns:
+        str: Path written.
+    """
+    global _claimed_pid
+    if path is None:
+        path = metrics_path()
+        text = metrics.render(pid=os.getpid())
+        if _claimed_pid != os.getpid():
+            _claimed_pid = os.getpid()
+            remove_stale_metrics(os.path.dirname(path))
+            atexit.register(_remove_own_metrics, path, _claimed_pid)
+    else:
+        text = metrics.render()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int = 9108, host: str = "127.0.0.1"):
+    """Serves /metrics for this process on a background thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,342 @@
+import os
+import time
+import uuid
+import shutil
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+SPOOL_DIR = os.environ.get(
+    "ACCENT_SPOOL_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "spool"),
+)
+SPOOL_MAX_BYTES = int(os.environ.get("ACCENT_SPOOL_MAX_BYTES", 1024**3))
+SPOOL_TTL = float(os.environ.get("ACCENT_SPOOL_TTL", 3600))
+SPOOL_JANITOR_INTERVAL = float(os.environ.get("ACCENT_SPOOL_JANITOR_INTERVAL", 60))
+
+_INDEX = "spool.sqlite"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists but belongs to another user
+    return True
+
+
+class AudioSpool:
+    """
+    Size- and age-bounded directory of audio files.
+
+    Files are indexed in a SQLite file next to them, so several worker
+    processes can share one spool. A file that is leased (see `lease`) is
+    never deleted; every other file is removed once it is older than
+    `ttl_seconds`, and the least recently used ones are removed while the
+    spool is over `max_bytes`. Eviction runs on `add` and on a background
+    janitor thread started with `start_janitor`. Leases held by processes
+    that died are dropped by the janitor.
+
+    Args:
+        directory (str): Where the files and the index live.
+        max_bytes (int): Byte budget for the stored files.
+        ttl_seconds (float): Age after which an unleased file is removed.
+    """
+
+    def __init__(
+        self,
+        directory: str = SPOOL_DIR,
+        max_bytes: int = SPOOL_MAX_BYTES,
+        ttl_seconds: float = SPOOL_TTL,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self._local = threading.local()
+        self._janitor = None
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        with self._transaction() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "name TEXT PRIMARY KEY, size INTEGER, created REAL, accessed REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS files_accessed ON files(accessed)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "id INTEGER PRIMARY KEY, name TEXT, pid INTEGER)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS leases_name ON leases(name)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross fork boundaries or threads
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(
+                os.path.join(self.directory, _INDEX), timeout=30, isolation_level=None
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def _count(self, db, name: str, value: int = 1):
+        db.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, value),
+        )
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _take(self, source: str, suffix: str = None) -> str:
+        suffix = suffix if suffix is not None else os.path.splitext(source)[1]
+        name = f"{uuid.uuid4().hex}{suffix}"
+        # A rename when both sides share a filesystem, so no data is copied
+        shutil.move(source, self.path(name) + ".part")
+        os.replace(self.path(name) + ".part", self.path(name))
+        return name
+
+    def _index(self, db, name: str):
+        now = time.time()
+        db.execute(
+            "INSERT INTO files (name, size, created, accessed) VALUES (?, ?, ?, ?)",
+            (name, os.path.getsize(self.path(name)), now, now),
+        )
+        self._count(db, "added")
+
+    def _lease(self, db, name: str) -> int:
+        return db.execute(
+            "INSERT INTO leases (name, pid) VALUES (?, ?)", (name, os.getpid())
+        ).lastrowid
+
+    def _release(self, lease_id: int):
+        with self._transaction() as db:
+            db.execute("DELETE FROM leases WHERE id = ?", (lease_id,))
+
+    def add(self, source: str, suffix: str = None) -> str:
+        """
+        Moves a file into the spool.
+
+        The file is not leased, so it can be evicted as soon as this
+        returns; use `hold` to keep it for the duration of a job.
+
+        Args:
+            source (str): File to take over; it no longer exists afterwards.
+            suffix (str): Extension of the spooled file, defaults to the
+                source's.
+
+        Returns:
+            str: Absolute path of the spooled file.
+        """
+        name = self._take(source, suffix)
+        with self._transaction() as db:
+            self._index(db, name)
+        self.evict(keep=name)
+        return os.path.abspath(self.path(name))
+
+    @contextmanager
+    def hold(self, source: str, suffix: str = None):
+        """
+        Moves a file into the spool and leases it while the block runs.
+
+        Unlike `add` followed by `lease`, the file is indexed and leased in
+        one transaction, so the janitor never sees it unleased.
+
+        Yields:
+            str: Absolute path of the spooled file.
+        """
+        name = self._take(source, suffix)
+        with self._transaction() as db:
+            self._index(db, name)
+            lease_id = self._lease(db, name)
+        try:
+            self.evict()
+            yield os.path.abspath(self.path(name))
+        finally:
+            self._release(lease_id)
+
+    @contextmanager
+    def lease(self, path: str):
+        """
+        Keeps a spooled file from being evicted while the block runs.
+
+        Yields:
+            str: The path, marked as just used.
+
+        Raises:
+            FileNotFoundError: If the file is not (or no longer) spooled.
+        """
+        name = os.path.basename(path)
+        with self._transaction() as db:
+            touched = db.execute(
+                "UPDATE files SET accessed = ? WHERE name = ?", (time.time(), name)
+            ).rowcount
+            if not touched:
+                raise FileNotFoundError(f"Not in the audio spool: {path}")
+            lease_id = self._lease(db, name)
+        try:
+            yield os.path.abspath(self.path(name))
+        finally:
+            self._release(lease_id)
+
+    def remove(self, path: str) -> bool:
+        """Deletes a spooled file now unless it is leased; returns whether it was."""
+        name = os.path.basename(path)
+        with self._transaction() as db:
+            if db.execute("SELECT 1 FROM leases WHERE name = ?", (name,)).fetchone():
+                return False
+            return self._delete(db, name)
+
+    def _delete(self, db, name: str) -> bool:
+        deleted = db.execute("DELETE FROM files WHERE name = ?", (name,)).rowcount
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+        return bool(deleted)
+
+    def evict(self, keep: str = None) -> dict:
+        """
+        Runs one janitor pass.
+
+        Drops leases of dead processes, removes unleased files past the TTL,
+        then the least recently used unleased files until the spool fits
+        its budget, and finally files left behind without an index entry.
+
+        Args:
+            keep (str): Name of a file to spare, such as the one just added.
+
+        Returns:
+            dict: Number of files removed as 'expired', 'lru' and 'orphaned'.
+        """
+        removed = {"expired": 0, "lru": 0, "orphaned": 0}
+        now = time.time()
+        with self._transaction() as db:
+            for (pid,) in db.execute("SELECT DISTINCT pid FROM leases").fetchall():
+                if not _pid_alive(pid):
+                    db.execute("DELETE FROM leases WHERE pid = ?", (pid,))
+
+            unleased = (
+                "SELECT name, size, created FROM files "
+                "WHERE name NOT IN (SELECT name FROM leases) ORDER BY accessed"
+            )
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM files").fetchone()[0]
+            for name, size, created in db.execute(unleased).fetchall():
+                if name == keep:
+                    continue
+                if now - created > self.ttl:
+                    reason = "expired"
+                elif total > self.max_bytes:
+                    reason = "lru"
+                else:
+                    continue
+                self._delete(db, name)
+                total -= size
+                removed[reason] += 1
+
+            known = {name for (name,) in db.execute("SELECT name FROM files")}
+            for name in os.listdir(self.directory):
+                if name.startswith(_INDEX) or name in known:
+                    continue
+                path = self.path(name)
+                try:
+                    if now - os.path.getmtime(path) > self.ttl:
+                        os.remove(path)
+                        removed["orphaned"] += 1
+                except OSError:
+                    pass  # Being written or removed by another process
+
+            for reason, count in removed.items():
+                if count:
+                    self._count(db, f"evicted_{reason}", count)
+                    metrics.inc("accent_spool_evictions_total", count, reason=reason)
+
+        stats = self.stats()
+        metrics.set("accent_spool_bytes", stats["bytes"])
+        metrics.set("accent_spool_files", stats["files"])
+        metrics.set("accent_spool_leased_bytes", stats["leased_bytes"])
+        return removed
+
+    def stats(self) -> dict:
+        """Returns file counts, bytes, leases and eviction counters."""
+        db = self._connect()
+        files, size = db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files"
+        ).fetchone()
+        leased_files, leased_bytes = db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files "
+            "WHERE name IN (SELECT name FROM leases)"
+        ).fetchone()
+        counters = dict(db.execute("SELECT name, value FROM counters"))
+        return {
+            "files": files,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "leased_files": leased_files,
+            "leased_bytes": leased_bytes,
+            "added": counters.get("added", 0),
+            "evicted_expired": counters.get("evicted_expired", 0),
+            "evicted_lru": counters.get("evicted_lru", 0),
+            "evicted_orphaned": counters.get("evicted_orphaned", 0),
+        }
+
+    def start_janitor(self, interval: float = SPOOL_JANITOR_INTERVAL):
+        """Runs `evict` every `interval` seconds on a daemon thread."""
+        if self._janitor is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.evict()
+                except Exception as e:
+                    logger.warning(f"Audio spool janitor failed: {str(e)}")
+
+        self._janitor = threading.Thread(target=run, name="spool-janitor", daemon=True)
+        self._janitor.start()
+
+    def close(self):
+        """Stops the janitor thread."""
+        self._stop.set()
+        if self._janitor is not None:
+            self._janitor.join()
+            self._janitor = None
+
+
+_spool = None
+_spool_lock = threading.Lock()
+
+
+def get_spool() -> AudioSpool:
+    """Returns the process-wide audio spool, starting its janitor on first use."""
+    global _spool
+    with _spool_lock:
+        if _spool is None:
+            _spool = AudioSpool()
+            _spool.start_janitor()
+        return _spool
@@ -0,0 +1,243 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Bump when a change to the detector should invalidate cached features
+VAD_VERSION = "v1"
+
+# Frames per FFT block; bounds memory on hour-long recordings
+_BLOCK_FRAMES = 8192
+
+
+class SpeechMap:
+    """
+    Maps times in a speech-only buffer back to the original recording.
+
+    Args:
+        starts (array-like): Original sample offset where each kept segment
+            begins.
+        ends (array-like): Original sample offset where each segment ends.
+        sr (int): Sample rate.
+        total_samples (int): Length of the original recording.
+    """
+
+    def __init__(self, starts, ends, sr: int, total_samples: int):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.sr = sr
+        self.total_samples = total_samples
+        # Offset of each segment inside the speech-only buffer
+        lengths = self.ends - self.starts
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+
+    @classmethod
+    def identity(cls, total_samples: int, sr: int):
+        """A map for a buffer that was kept whole."""
+        return cls([0], [total_samples], sr, total_samples)
+
+    @property
+    def speech_seconds(self) -> float:
+        return float((self.ends - self.starts).sum()) / self.sr
+
+    @property
+    def original_seconds(self) -> float:
+        return self.total_samples / self.sr
+
+    def segments(self) -> list:
+        """Kept segments as (start, end) times in seconds of the original."""
+        return [
+            (round(start / self.sr, 3), round(end / self.sr, 3))
+            for start, end in zip(self.starts.tolist(), self.ends.tolist())
+        ]
+
+    def to_original(self, t, end: bool = False):
+        """
+        Converts speech-buffer times to original times.
+
+        Args:
+            t (float | np.ndarray): Time(s) in seconds in the speech buffer.
+            end (bool): Treat `t` as the end of an interval, so a time that
+                falls exactly on a cut maps to the end of the earlier segment
+                rather than the start of the next one.
+
+        Returns:
+            float | np.ndarray: Time(s) in seconds in the original recording.
+        """
+        samples = np.asarray(t, dtype=np.float64) * self.sr
+        side = "left" if end else "right"
+        idx = np.clip(
+            np.searchsorted(self.offsets, samples, side=side) - 1,
+            0,
+            len(self.offsets) - 1,
+        )
+        original = self.starts[idx] + (samples - self.offsets[idx])
+        original = np.minimum(original, self.ends[idx]) / self.sr
+        return float(original) if np.ndim(original) == 0 else original
+
+    def remap_segments(self, segments: list) -> list:
+        """Returns copies of Whisper-style segments with original timestamps."""
+        remapped = []
+        for segment in segments:
+            segment = dict(segment)
+            segment["start"] = round(self.to_original(segment["start"]), 3)
+            segment["end"] = round(self.to_original(segment["end"], end=True), 3)
+            remapped.append(segment)
+        return remapped
+
+
+def _runs(mask: np.ndarray):
+    """Returns (starts, ends) of the True runs of a boolean array."""
+    edges = np.flatnonzero(np.diff(mask.astype(np.int8), prepend=0, append=0))
+    return edges[0::2], edges[1::2]
+
+
+def _moving_mean(x: np.ndarray, width: int) -> np.ndarray:
+    """Centered moving average with edge padding, via cumulative sums."""
+    if width <= 1 or len(x) == 0:
+        return x
+    padded = np.pad(x, (width // 2, width - 1 - width // 2), mode="edge")
+    cumsum = np.concatenate([[0.0], np.cumsum(padded)])
+    return (cumsum[width:] - cumsum[:-width]) / width
+
+
+def frame_features(audio: np.ndarray, sr: int = 16000, frame_ms: float = 30.0):
+    """
+    Computes per-frame VAD features over non-overlapping frames.
+
+    Returns:
+        tuple: (energy_db, flatness, band_ratio, frame_length) where each
+            feature is a float array with one entry per whole frame.
+    """
+    frame = int(sr * frame_ms / 1000)
+    n_frames = len(audio) // frame
+    frames = np.asarray(audio[: n_frames * frame], dtype=np.float32).reshape(
+        n_frames, frame
+    )
+
+    energy_db = 10 * np.log10(np.mean(frames.astype(np.float64) ** 2, axis=1) + 1e-10)
+
+    freqs = np.fft.rfftfreq(frame, 1 / sr)
+    in_band = (freqs >= 80) & (freqs <= 4000)
+    window = np.hanning(frame).astype(np.float32)
+    flatness = np.empty(n_frames)
+    band_ratio = np.empty(n_frames)
+    for start in range(0, n_frames, _BLOCK_FRAMES):
+        block = frames[start : start + _BLOCK_FRAMES] * window
+        power = np.abs(np.fft.rfft(block, axis=1)) ** 2 + 1e-12
+        flatness[start : start + len(block)] = np.exp(
+            np.mean(np.log(power), axis=1)
+        ) / np.mean(power, axis=1)
+        band_ratio[start : start + len(block)] = power[:, in_band].sum(
+            axis=1
+        ) / power.sum(axis=1)
+
+    return energy_db, flatness, band_ratio, frame
+
+
+def detect_speech(
+    audio: np.ndarray,
+    sr: int = 16000,
+    frame_ms: float = 30.0,
+    energy_margin_db: float = 12.0,
+    max_flatness: float = 0.4,
+    min_band_ratio: float = 0.6,
+    min_modulation_db: float = 4.0,
+    min_speech_ms: float = 200.0,
+    min_silence_ms: float = 1000.0,
+    pad_ms: float = 200.0,
+) -> tuple:
+    """
+    Finds the speech regions of a recording.
+
+    A frame counts as speech when it is loud relative to the recording's
+    noise floor, tonal rather than noise-like (low spectral flatness), has
+    most of its energy in the 80-4000 Hz voice band, and sits in a second
+    of audio whose loudness rises and falls at syllable rate. The last test
+    is what rejects sustained music and tones, which are loud and tonal but
+    barely modulated. Short bursts are dropped, short pauses are bridged
+    and each region is padded so word edges are not clipped.
+
+    Returns:
+        tuple: (starts, ends) sample offsets of speech regions as int arrays.
+    """
+    energy_db, flatness, band_ratio, frame = frame_features(audio, sr, frame_ms)
+    if len(energy_db) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = max(noise_floor + energy_margin_db, energy_db.max() - 50, -60)
+
+    # Standard deviation of frame loudness over about one second
+    width = max(1, int(1000 / frame_ms))
+    mean = _moving_mean(energy_db, width)
+    modulation = np.sqrt(np.maximum(_moving_mean(energy_db**2, width) - mean**2, 0.0))
+
+    mask = (
+        (energy_db > threshold)
+        & (flatness < max_flatness)
+        & (band_ratio > min_band_ratio)
+        & (modulation > min_modulation_db)
+    )
+
+    starts, ends = _runs(mask)
+    keep = (ends - starts) * frame_ms >= min_speech_ms
+    starts, ends = starts[keep], ends[keep]
+    if len(starts) == 0:
+        return starts.astype(np.int64), ends.astype(np.int64)
+
+    pad = int(round(pad_ms / frame_ms))
+    starts = np.maximum(starts - pad, 0)
+    ends = np.minimum(ends + pad, len(mask))
+
+    # Bridge pauses shorter than min_silence_ms (and overlaps left by padding)
+    gap_frames = int(round(min_silence_ms / frame_ms))
+    joined = starts[1:] - ends[:-1] < gap_frames
+    starts = starts[np.concatenate([[True], ~joined])]
+    ends = ends[np.concatenate([~joined, [True]])]
+
+    starts = starts.astype(np.int64) * frame
+    ends = ends.astype(np.int64) * frame
+    # The final partial frame follows the decision of the frame before it
+    if ends[-1] == len(mask) * frame:
+        ends[-1] = len(audio)
+    return starts, ends
+
+
+def select_speech(
+    audio: np.ndarray, sr: int = 16000, keep_ratio: float = 0.95, **kwargs
+) -> tuple:
+    """
+    Builds a speech-only buffer from a recording.
+
+    The recording is returned unchanged (with an identity map) when nearly
+    all of it is speech, saving the copy, or when no speech is found, so
+    downstream stages decide for themselves what to make of it.
+
+    Args:
+        audio (np.ndarray): Mono float32 samples.
+        sr (int): Sample rate.
+        keep_ratio (float): Speech fraction above which the recording is
+            kept whole.
+        **kwargs: Detector settings passed to `detect_speech`.
+
+    Returns:
+        tuple: (speech, speech_map) where speech is a float32 array and
+            speech_map is a `SpeechMap` back to `audio`.
+    """
+    starts, ends = detect_speech(audio, sr, **kwargs)
+    speech_samples = int((ends - starts).sum())
+
+    if speech_samples == 0:
+        logger.warning("No speech detected; keeping the whole recording")
+        return audio, SpeechMap.identity(len(audio), sr)
+    if speech_samples >= keep_ratio * len(audio):
+        return audio, SpeechMap.identity(len(audio), sr)
+
+    speech = np.concatenate([audio[start:end] for start, end in zip(starts, ends)])
+    logger.info(
+        f"VAD kept {speech_samples / sr:.1f}s of speech "
+        f"from {len(audio) / sr:.1f}s ({len(starts)} segments)"
+    )
+    return speech, SpeechMap(starts, ends, sr, len(audio))
@@ -0,0 +1,334 @@
+import os
+import time
+import logging
+import hashlib
+from contextlib import contextmanager
+
+import torch
+import torch.nn.functional as F
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Exported graphs are cached here, keyed by encoder and torch version
+EXPORT_DIR = os.environ.get(
+    "ACCENT_EXPORT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "exported"),
+)
+# Exports unused for this long are deleted
+EXPORT_TTL = float(os.environ.get("ACCENT_EXPORT_TTL", 7 * 24 * 3600))
+_EXPORT_PREFIX = "accent_graph-"
+
+# Largest embedding difference tolerated between an exported graph and eager
+PARITY_TOLERANCE = 1e-3
+
+
+class AccentGraph(torch.nn.Module):
+    """
+    Feature extraction, normalization and ECAPA embedding as one module.
+
+    Mirrors `EncoderClassifier.encode_batch`, written with batch-wide
+    tensor ops instead of per-sentence Python loops so that a single trace
+    covers any batch size and length. Only the ECAPA recipe's
+    configuration is supported: Fbank without deltas or context, and
+    sentence-level input normalization. The accent head is not part of the
+    export; the runners apply it eagerly, so a new head never re-exports.
+
+    Args:
+        encoder: A SpeechBrain `EncoderClassifier`.
+    """
+
+    def __init__(self, encoder):
+        super().__init__()
+        fbank = encoder.mods["compute_features"]
+        norm = encoder.mods["mean_var_norm"]
+        if fbank.deltas or fbank.context:
+            raise NotImplementedError("Fbank deltas and context are not supported")
+        if norm.norm_type != "sentence":
+            raise NotImplementedError(
+                f"{norm.norm_type} normalization is not supported"
+            )
+
+        stft = fbank.compute_STFT
+        self.n_fft = stft.n_fft
+        self.hop_length = stft.hop_length
+        self.win_length = stft.win_length
+        self.center = stft.center
+        self.pad_mode = stft.pad_mode
+        self.normalized = stft.normalized_stft
+        self.onesided = stft.onesided
+        self.register_buffer("window", stft.window.clone())
+        self.filterbank = fbank.compute_fbanks
+
+        self.mean_norm = norm.mean_norm
+        self.std_norm = norm.std_norm
+        self.eps = norm.eps
+
+        self.embedding_model = encoder.mods["embedding_model"]
+
+    def forward(self, wavs, wav_lens):
+        """
+        Args:
+            wavs (torch.Tensor): Zero-padded waveforms, (batch, samples).
+            wav_lens (torch.Tensor): Relative length of each waveform.
+
+        Returns:
+            torch.Tensor: Embeddings of shape (batch, 192).
+        """
+        # Real-valued STFT so the graph also exports to ONNX
+        if self.center:
+            pad = self.n_fft // 2
+            wavs = F.pad(wavs.unsqueeze(1), [pad, pad], mode=self.pad_mode).squeeze(1)
+        spec = torch.stft(
+            wavs,
+            self.n_fft,
+            self.hop_length,
+            self.win_length,
+            self.window,
+            center=False,
+            normalized=self.normalized,
+            onesided=self.onesided,
+            return_complex=False,
+        )
+        power = spec.pow(2).sum(-1).transpose(1, 2)
+        feats = self.filterbank(power)
+
+        # Sentence normalization over each recording's unpadded frames
+        frames = torch.arange(feats.shape[1], device=feats.device, dtype=feats.dtype)
+        valid = torch.round(wav_lens * feats.shape[1])
+        mask = (frames[None, :] < valid[:, None]).to(feats.dtype).unsqueeze(-1)
+        count = mask.sum(dim=1, keepdim=True)
+        mean = torch.zeros_like(count)
+        if self.mean_norm:
+            mean = (feats * mask).sum(dim=1, keepdim=True) / count
+        std = torch.ones_like(count)
+        if self.std_norm:
+            var = ((feats - mean).pow(2) * mask).sum(dim=1, keepdim=True) / (count - 1)
+            std = var.sqrt()
+        feats = (feats - mean) / torch.clamp(std, min=self.eps)
+
+        return self.embedding_model(feats, wav_lens).squeeze(1)
+
+
+class EagerGraph:
+    """Runs the encoder and head through SpeechBrain's own Python code."""
+
+    name = "eager"
+
+    def __init__(self, encoder, head):
+        self.encoder = encoder
+        self.head = head
+
+    def __call__(self, wavs, wav_lens):
+        with torch.no_grad():
+            embeddings = self.encoder.encode_batch(wavs, wav_lens).squeeze(1)
+            return embeddings, self.head(embeddings)
+
+
+class TorchScriptGraph:
+    """Runs a traced `AccentGraph` saved with `torch.jit.save`, then the head."""
+
+    name = "torchscript"
+
+    def __init__(self, path: str, head):
+        self.module = torch.jit.load(path, map_location="cpu").eval()
+        self.head = head
+
+    def __call__(self, wavs, wav_lens):
+        with torch.no_grad():
+            embeddings = self.module(wavs.cpu(), wav_lens.cpu())
+            return embeddings, self.head(embeddings)
+
+
+class OnnxGraph:
+    """Runs an exported `AccentGraph` with ONNX Runtime on the CPU, then the head."""
+
+    name = "onnx"
+
+    def __init__(self, path: str, head):
+        import onnxruntime
+
+        self.session = onnxruntime.InferenceSession(
+            path, providers=["CPUExecutionProvider"]
+        )
+        self.head = head
+
+    def __call__(self, wavs, wav_lens):
+        (embeddings,) = self.session.run(
+            None,
+            {
+                "wavs": wavs.cpu().numpy().astype("float32"),
+                "wav_lens": wav_lens.cpu().numpy().astype("float32"),
+            },
+        )
+        embeddings = torch.from_numpy(embeddings)
+        with torch.no_grad():
+            return embeddings, self.head(embeddings)
+
+
+@contextmanager
+def _traceable_masks():
+    """
+    Patches ECAPA's `length_to_mask` with a broadcasting equivalent.
+
+    The original sizes the mask with len(), which a trace freezes to the
+    example batch size; broadcasting keeps the batch dimension dynamic.
+    """
+    import speechbrain.lobes.models.ECAPA_TDNN as ecapa
+
+    original = ecapa.length_to_mask
+
+    def length_to_mask(length, max_len=None, dtype=None, device=None):
+        if max_len is None:
+            max_len = length.max().long().item()
+        positions = torch.arange(max_len, device=length.device, dtype=length.dtype)
+        mask = positions[None, :] < length.unsqueeze(1)
+        return torch.as_tensor(
+            mask, dtype=dtype or length.dtype, device=device or length.device
+        )
+
+    ecapa.length_to_mask = length_to_mask
+    try:
+        yield
+    finally:
+        ecapa.length_to_mask = original
+
+
+def _example_inputs():
+    # Two lengths so padding and masking are part of the trace
+    return torch.randn(2, 48000) * 0.1, torch.tensor([1.0, 0.5])
+
+
+def export_torchscript(graph: AccentGraph, path: str):
+    """Traces `graph` and saves it as TorchScript."""
+    with torch.no_grad(), _traceable_masks():
+        traced = torch.jit.trace(graph.eval(), _example_inputs(), check_trace=False)
+    torch.jit.save(traced, path + ".part")
+    os.replace(path + ".part", path)
+
+
+def export_onnx(graph: AccentGraph, path: str):
+    """Exports `graph` to ONNX with dynamic batch and length axes."""
+    with torch.no_grad(), _traceable_masks():
+        torch.onnx.export(
+            graph.eval(),
+            _example_inputs(),
+            path + ".part",
+            input_names=["wavs", "wav_lens"],
+            output_names=["embeddings"],
+            dynamic_axes={
+                "wavs": {0: "batch", 1: "samples"},
+                "wav_lens": {0: "batch"},
+                "embeddings": {0: "batch"},
+            },
+            opset_version=17,
+        )
+    os.replace(path + ".part", path)
+
+
+_EXPORTERS = {
+    "torchscript": (export_torchscript, TorchScriptGraph, ".pt"),
+    "onnx": (export_onnx, OnnxGraph, ".onnx"),
+}
+
+
+def export_path(backend: str, name: str) -> str:
+    """Export file of a backend; a new encoder or torch version re-exports."""
+    digest = hashlib.sha256(name.encode()).hexdigest()[:16]
+    suffix = _EXPORTERS[backend][2]
+    return os.path.join(
+        EXPORT_DIR, f"{_EXPORT_PREFIX}{digest}-torch{torch.__version__}{suffix}"
+    )
+
+
+def prune_exports(keep: str = None, ttl: float = EXPORT_TTL) -> list:
+    """
+    Deletes exports this torch version cannot load and ones unused for `ttl`.
+
+    Loading an export touches it, so files in use by any process stay.
+
+    Args:
+        keep (str): Path to spare, such as the export just loaded.
+
+    Returns:
+        list[str]: Deleted paths.
+    """
+    if not os.path.isdir(EXPORT_DIR):
+        return []
+    deleted = []
+    now = time.time()
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        if not name.startswith(_EXPORT_PREFIX) or path == keep:
+            continue
+        try:
+            stale = f"-torch{torch.__version__}." not in name
+            if stale or now - os.path.getmtime(path) > ttl:
+                os.remove(path)
+                deleted.append(path)
+        except OSError:
+            pass  # Removed or being written by another process
+    if deleted:
+        logger.info(f"Pruned {len(deleted)} stale accent graph exports")
+    return deleted
+
+
+def check_parity(graph, reference, tolerance: float = PARITY_TOLERANCE) -> float:
+    """
+    Compares two graphs on padded random input.
+
+    Returns:
+        float: Largest absolute embedding difference.
+
+    Raises:
+        AssertionError: If it exceeds `tolerance`.
+    """
+    wavs = torch.randn(3, 40000) * 0.1
+    wav_lens = torch.tensor([1.0, 0.8, 0.45])
+    wavs[1, 32000:] = 0
+    wavs[2, 18000:] = 0
+    embeddings, logits = graph(wavs, wav_lens)
+    expected_embeddings, expected_logits = reference(wavs, wav_lens)
+    error = float((embeddings - expected_embeddings).abs().max())
+    assert error <= tolerance, f"embedding mismatch {error:.2e} > {tolerance:.0e}"
+    assert logits.argmax(-1).tolist() == expected_logits.argmax(-1).tolist()
+    return error
+
+
+def load_accent_graph(backend: str, encoder, head, name: str):
+    """
+    Returns a callable mapping (wavs, wav_lens) to (embeddings, logits).
+
+    'onnx' and 'torchscript' graphs of the encoder are exported on first
+    use, cached in `EXPORT_DIR` and checked against eager outputs before
+    use; the head runs eagerly on their embeddings. Exports from other
+    torch versions or unused for `EXPORT_TTL` are deleted. If export,
+    loading or the parity check fails, the next backend in
+    onnx -> torchscript -> eager is tried, so inference always works.
+
+    Args:
+        backend (str): 'eager', 'torchscript' or 'onnx'.
+        encoder: The SpeechBrain `EncoderClassifier`.
+        head (torch.nn.Linear): Accent classification layer.
+        name (str): Stable name of the encoder, part of the cache key.
+    """
+    eager = EagerGraph(encoder, head)
+    chain = {"onnx": ["onnx", "torchscript"], "torchscript": ["torchscript"]}
+    for candidate in chain.get(backend, []):
+        export, runner, _ = _EXPORTERS[candidate]
+        path = export_path(candidate, name)
+        try:
+            if os.path.exists(path):
+                os.utime(path)  # Mark as in use for prune_exports
+            else:
+                logger.info(f"Exporting accent graph to {candidate}: {path}")
+                os.makedirs(EXPORT_DIR, exist_ok=True)
+                export(AccentGraph(encoder), path)
+            prune_exports(keep=path)
+            graph = runner(path, head)
+            error = check_parity(graph, eager)
+            logger.info(f"Using {candidate} accent graph (max error {error:.1e})")
+            return graph
+        except Exception as e:
+            logger.warning(f"Accent graph backend {candidate} unavailable: {e}")
+    return eager
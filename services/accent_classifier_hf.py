@@ -1,20 +1,34 @@
 import torch
-import librosa
 import numpy as np
 import logging
-from speechbrain.pretrained import EncoderClassifier
+from services.batching import get_accent_batcher
+from services.preprocessing import preprocess_batch, unpad
+from services.progressive import RunningPosterior
+from services.model_registry import (
+    get_accent_encoder,
+    get_accent_graph,
+    get_accent_head,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def window_starts(length, window, hop):
+    """Start samples of `window`-long windows every `hop`, covering the tail."""
+    if length <= window:
+        return [0]
+    starts = list(range(0, length - window + 1, hop))
+    # Cover the tail with one last window aligned to the end
+    if starts[-1] + window < length:
+        starts.append(length - window)
+    return starts
+
+
 class AccentClassifier:
     def __init__(self):
-        # Use SpeechBrain's pretrained ECAPA-TDNN model
-        self.model = EncoderClassifier.from_hparams(
-            source="speechbrain/spkrec-ecapa-voxceleb",
-            savedir="models/accent_classifier",
-        )
+        # Use SpeechBrain's pretrained ECAPA-TDNN model (shared per process)
+        self.model = get_accent_encoder()
         self.labels = {
             0: "US",
             1: "UK",
@@ -24,90 +38,376 @@ class AccentClassifier:
             5: "African",
             6: "Others",
         }
-        # Initialize the classification layer
-        self.classifier = torch.nn.Linear(
-            192, len(self.labels)
+        # Initialize the classification layer on the encoder's device once
+        self.classifier = get_accent_head(192, len(self.labels)).to(
+            self.model.device
         )  # ECAPA-TDNN outputs 192-dim embeddings
+        # Encoder and head as one graph (eager, TorchScript or ONNX Runtime)
+        self.graph = get_accent_graph(192, len(self.labels))
         self.confidence_threshold = 0.4  # Minimum confidence threshold
+        self.batch_size = 8  # Clips per encoder batch
+        self.max_windows = 32  # Cap on windows embedded per recording
+
+    def preprocess_audio(self, audio, sr, max_samples=160000):
+        """
+        Preprocess audio for better accent detection.
+
+        `max_samples` caps the output length (10 seconds by default);
+        pass None to keep the whole recording.
+        """
+        return self.preprocess_clips([audio], sr, max_samples)[0]
 
-    def preprocess_audio(self, audio, sr):
-        """Preprocess audio for better accent detection"""
+    def preprocess_clips(self, audios, sr, max_samples=160000):
+        """
+        Preprocesses several clips at once with whole-batch array ops.
+
+        Mono conversion, resampling to 16 kHz, peak normalization,
+        pre-emphasis and silence trimming match librosa's; see
+        `services.preprocessing.preprocess_batch`.
+
+        Returns:
+            list[np.ndarray]: One float32 clip per input, in input order.
+        """
         try:
-            # Convert to mono if stereo
-            if len(audio.shape) > 1:
-                audio = librosa.to_mono(audio)
+            return unpad(*preprocess_batch(audios, sr, max_samples))
+
+        except Exception as e:
+            logger.error(f"Error in audio preprocessing: {str(e)}")
+            raise
+
+    def _encode(self, clips, batch_size=None, return_probs=False):
+        """
+        Embeds preprocessed clips through the ECAPA encoder in batches.
+
+        Only clips of exactly the same length share a batch, in groups of
+        up to `batch_size`. Zero padding is not neutral for ECAPA: its
+        reflect-padded convolutions and the Fbank STFT see the padding
+        even with `wav_lens`, so a padded clip would not get the
+        embedding `predict` gives it alone.
+
+        Args:
+            clips (list[np.ndarray]): Preprocessed mono 16kHz clips.
+            batch_size (int): Clips per batch, defaults to `self.batch_size`.
+            return_probs (bool): Also return the head's softmax output,
+                computed in the same graph call.
+
+        Returns:
+            torch.Tensor: Embeddings of shape (len(clips), 192), in input
+                order, or (embeddings, probs) when `return_probs` is set.
+        """
+        batch_size = batch_size or self.batch_size
+        by_length = {}
+        for i, clip in enumerate(clips):
+            by_length.setdefault(len(clip), []).append(i)
+        embeddings = [None] * len(clips)
+        logits = [None] * len(clips)
+
+        with torch.no_grad():
+            for same_length in by_length.values():
+                for start in range(0, len(same_length), batch_size):
+                    bucket = same_length[start : start + batch_size]
+                    waveforms = torch.from_numpy(
+                        np.stack(
+                            [np.asarray(clips[i], dtype=np.float32) for i in bucket]
+                        )
+                    )
+                    wav_lens = torch.ones(len(bucket))
+
+                    batch_embeddings, batch_logits = self.graph(
+                        waveforms.to(self.model.device), wav_lens.to(self.model.device)
+                    )
+                    logger.info(f"Embeddings shape: {batch_embeddings.shape}")
 
-            # Resample to 16kHz if needed
-            if sr != 16000:
-                audio = librosa.resample(audio, orig_sr=sr, target_sr=16000)
+                    for row, i in enumerate(bucket):
+                        embeddings[i] = batch_embeddings[row]
+                        logits[i] = batch_logits[row]
 
-            # Normalize audio
-            audio = librosa.util.normalize(audio)
+        embeddings = torch.stack(embeddings)
+        if not return_probs:
+            return embeddings
+        probs = torch.nn.functional.softmax(torch.stack(logits), dim=-1)
+        return embeddings, probs.cpu().numpy()
 
-            # Apply pre-emphasis filter
-            audio = librosa.effects.preemphasis(audio)
+    def _run_batch(self, clips):
+        # A micro-batch from concurrent callers, equal-length clips batched
+        return list(self._encode(clips, batch_size=len(clips)).cpu().numpy())
 
-            # Trim silence
-            audio, _ = librosa.effects.trim(audio, top_db=20)
+    def _embed_clips(self, clips):
+        """
+        Embeds clips, through the shared micro-batcher when it is enabled so
+        that clips from concurrent requests share padded batches.
 
-            # Ensure minimum length (1 second)
-            if len(audio) < 16000:
-                audio = np.pad(audio, (0, 16000 - len(audio)))
+        Returns:
+            np.ndarray: float32 embeddings of shape (len(clips), 192).
+        """
+        batcher = get_accent_batcher(self._run_batch)
+        if batcher is None:
+            return self._encode(clips).cpu().numpy()
+        return np.stack(batcher.map(clips))
 
-            # Cap maximum length (10 seconds)
-            if len(audio) > 160000:  # 10 seconds at 16kHz
-                audio = audio[:160000]
+    def _posteriors(self, embeddings):
+        """Applies the classification head and returns softmax probabilities."""
+        with torch.no_grad():
+            embeddings = torch.as_tensor(embeddings, device=self.model.device)
+            logits = self.classifier(embeddings)
+            return torch.nn.functional.softmax(logits, dim=-1).cpu().numpy()
 
-            return audio
+    def _decide(self, probs):
+        """Turns one row of probabilities into (label, confidence, all_scores)."""
+        top_idx = int(probs.argmax())
+        top_label = self.labels[top_idx]
+        confidence = round(float(probs[top_idx]) * 100, 2)
+
+        # Calculate all accent scores
+        all_scores = {
+            self.labels[i]: round(float(p) * 100, 2) for i, p in enumerate(probs)
+        }
+
+        # Log prediction details
+        logger.info(f"Predicted accent: {top_label} with confidence: {confidence}%")
+        logger.info(f"All accent scores: {all_scores}")
+
+        # Apply confidence threshold
+        if confidence < (self.confidence_threshold * 100):
+            logger.warning(
+                f"Low confidence prediction ({confidence}% < {self.confidence_threshold*100}%)"
+            )
+            return "Uncertain", confidence, all_scores
+
+        return top_label, confidence, all_scores
+
+    def predict_batch(self, audios, sr=16000, batch_size=None):
+        """
+        Predicts the accent of several clips at once.
+
+        Each clip gets the result `predict` would give it; clips that are
+        the same length after preprocessing (such as every clip with at
+        least 10 seconds of speech) run through the encoder together.
+
+        Args:
+            audios (list[np.ndarray]): Audio clips sharing the sample rate `sr`.
+            sr (int): Sample rate of the clips.
+            batch_size (int): Clips per encoder batch.
+
+        Returns:
+            list[tuple]: One (accent, confidence, all_scores) per input clip.
+        """
+        try:
+            if not audios:
+                return []
+            clips = self.preprocess_clips(audios, sr)
+            logger.info(f"Preprocessed {len(clips)} clips for batched prediction")
+
+            _, probs = self._encode(clips, batch_size, return_probs=True)
+            return [self._decide(row) for row in probs]
 
         except Exception as e:
-            logger.error(f"Error in audio preprocessing: {str(e)}")
+            logger.error(f"Error in batched accent prediction: {str(e)}")
             raise
 
+    def embed(self, audio, sr):
+        """
+        Computes the ECAPA embedding of the first 10 seconds of speech.
+
+        Returns:
+            np.ndarray: float32 embedding of shape (192,).
+        """
+        audio = self.preprocess_audio(audio, sr)
+        logger.info(f"Preprocessed audio shape: {audio.shape}")
+        return self._embed_clips([audio])[0]
+
+    def classify_embedding(self, embedding):
+        """Scores one embedding; returns (accent, confidence, all_scores)."""
+        return self._decide(self._posteriors(np.asarray(embedding)[None, :])[0])
+
+    def rescore(self, store, head=None, config=None):
+        """
+        Scores embeddings in an `EmbeddingStore` with a head, the current
+        labels and confidence threshold, without re-running the encoder.
+
+        Args:
+            store (EmbeddingStore): Archive of embeddings.
+            head: Path of a saved state_dict or a state_dict; defaults to
+                this classifier's head. See `core.embedding_store.head_weights`.
+            config (str): Only score embeddings of this '<encoder>|<audio
+                mode>', as produced by `AccentAnalyzer`.
+        """
+        from core.embedding_store import head_weights
+
+        weight, bias = head_weights(
+            head if head is not None else self.classifier.state_dict()
+        )
+        return store.rescore(
+            weight, bias, self.labels, self.confidence_threshold, config=config
+        )
+
     def predict(self, audio, sr):
         try:
-            # Preprocess audio
-            audio = self.preprocess_audio(audio, sr)
-            logger.info(f"Preprocessed audio shape: {audio.shape}")
-
-            # Convert to tensor
-            waveform = torch.FloatTensor(audio).unsqueeze(0)
-
-            # Get embeddings
-            with torch.no_grad():
-                # Move to the same device as the model
-                waveform = waveform.to(self.model.device)
-                embeddings = self.model.encode_batch(waveform)
-                logger.info(f"Embeddings shape: {embeddings.shape}")
-
-                # Move classifier to same device and get predictions
-                self.classifier = self.classifier.to(self.model.device)
-                logits = self.classifier(embeddings.squeeze(1))
-                probs = torch.nn.functional.softmax(logits, dim=-1)[0].cpu().numpy()
-
-            # Get prediction details
-            top_idx = probs.argmax()
-            top_label = self.labels[top_idx]
-            confidence = round(float(probs[top_idx]) * 100, 2)
-
-            # Calculate all accent scores
-            all_scores = {
-                self.labels[i]: round(float(p) * 100, 2) for i, p in enumerate(probs)
-            }
-
-            # Log prediction details
-            logger.info(f"Predicted accent: {top_label} with confidence: {confidence}%")
-            logger.info(f"All accent scores: {all_scores}")
-
-            # Apply confidence threshold
-            if confidence < (self.confidence_threshold * 100):
-                logger.warning(
-                    f"Low confidence prediction ({confidence}% < {self.confidence_threshold*100}%)"
+            return self.classify_embedding(self.embed(audio, sr))
+
+        except Exception as e:
+            logger.error(f"Error in accent prediction: {str(e)}")
+            raise
+
+    def embed_windows(
+        self, audio, sr, window_seconds=10.0, hop_seconds=5.0, max_windows=None
+    ):
+        """
+        Computes ECAPA embeddings for overlapping windows of the recording.
+
+        The recording is split into `window_seconds` windows every
+        `hop_seconds`; if there are more than `max_windows`, an evenly spaced
+        subset is kept so cost stays bounded.
+
+        Returns:
+            tuple: (spans, embeddings) where spans is a list of (start, end)
+                times in seconds from the first non-silent sample and
+                embeddings is a float32 array of shape (len(spans), 192).
+        """
+        max_windows = max_windows or self.max_windows
+        audio = self.preprocess_audio(audio, sr, max_samples=None)
+
+        window = int(window_seconds * 16000)
+        starts = window_starts(len(audio), window, int(hop_seconds * 16000))
+        if len(starts) > max_windows:
+            keep = np.linspace(0, len(starts) - 1, max_windows).round()
+            starts = [starts[int(i)] for i in np.unique(keep)]
+        logger.info(f"Embedding {len(starts)} windows of {window_seconds}s")
+
+        clips = [audio[start : start + window] for start in starts]
+        spans = [
+            (round(start / 16000, 2), round((start + len(clip)) / 16000, 2))
+            for start, clip in zip(starts, clips)
+        ]
+        return spans, self._embed_clips(clips)
+
+    def classify_windows(self, spans, embeddings):
+        """
+        Averages window posteriors into a single prediction.
+
+        Returns:
+            tuple: (accent, confidence, all_scores, timeline) where timeline is
+                a list of {'start', 'end', 'accent', 'confidence'} dicts.
+        """
+        probs = self._posteriors(np.asarray(embeddings))
+
+        timeline = [
+            self._timeline_entry(start, end, row)
+            for (start, end), row in zip(spans, probs)
+        ]
+
+        accent, confidence, all_scores = self._decide(probs.mean(axis=0))
+        return accent, confidence, all_scores, timeline
+
+    def _timeline_entry(self, start, end, probs):
+        top_idx = int(probs.argmax())
+        return {
+            "start": start,
+            "end": end,
+            "accent": self.labels[top_idx],
+            "confidence": round(float(probs[top_idx]) * 100, 2),
+        }
+
+    def predict_windowed(
+        self, audio, sr, window_seconds=10.0, hop_seconds=5.0, max_windows=None
+    ):
+        """
+        Predicts the accent over the whole recording with overlapping windows.
+
+        See `embed_windows` for how windows are chosen and `classify_windows`
+        for how they are combined.
+
+        Args:
+            audio (np.ndarray): Audio samples.
+            sr (int): Sample rate of `audio`.
+            window_seconds (float): Length of each window.
+            hop_seconds (float): Step between window starts.
+            max_windows (int): Window cap, defaults to `self.max_windows`.
+
+        Returns:
+            tuple: (accent, confidence, all_scores, timeline)
+        """
+        try:
+            spans, embeddings = self.embed_windows(
+                audio, sr, window_seconds, hop_seconds, max_windows
+            )
+            return self.classify_windows(spans, embeddings)
+
+        except Exception as e:
+            logger.error(f"Error in windowed accent prediction: {str(e)}")
+            raise
+
+    def predict_progressive(
+        self,
+        audio,
+        sr,
+        window_seconds=10.0,
+        max_windows=None,
+        posterior=None,
+    ):
+        """
+        Predicts the accent by embedding one speech window at a time until
+        the running posterior is settled.
+
+        Windows follow each other without overlap from the start of the
+        speech. After each one the window posteriors are averaged, and the
+        loop stops as soon as `posterior` is confident or out of time (see
+        `services.progressive.RunningPosterior`), so a clear speaker costs
+        one or two encoder calls and only hard cases use the whole budget.
+
+        Args:
+            audio (np.ndarray): Audio samples.
+            sr (int): Sample rate of `audio`.
+            window_seconds (float): Length of each window.
+            max_windows (int): Window cap, defaults to `self.max_windows`.
+            posterior (RunningPosterior): Stopping rule, whose time budget
+                runs from its creation; a default one configured from the
+                environment is created if None.
+
+        Returns:
+            tuple: (accent, confidence, all_scores, timeline, windows_used,
+                stop_reason) where stop_reason is 'confident', 'time_budget'
+                or 'exhausted' when every window was used.
+        """
+        try:
+            if posterior is None:
+                posterior = RunningPosterior()
+            max_windows = max_windows or self.max_windows
+            audio = self.preprocess_audio(audio, sr, max_samples=None)
+
+            window = int(window_seconds * 16000)
+            starts = window_starts(len(audio), window, window)[:max_windows]
+
+            timeline, reason = [], "exhausted"
+            for start in starts:
+                clip = audio[start : start + window]
+                probs = self._posteriors(self._embed_clips([clip]))[0]
+                posterior.update(probs)
+                timeline.append(
+                    self._timeline_entry(
+                        round(start / 16000, 2),
+                        round((start + len(clip)) / 16000, 2),
+                        probs,
+                    )
                 )
-                return "Uncertain", confidence, all_scores
+                reason = posterior.stop_reason() or reason
+                if reason != "exhausted":
+                    break
 
-            return top_label, confidence, all_scores
+            logger.info(
+                f"Progressive accent inference used {posterior.windows}/"
+                f"{len(starts)} windows ({reason})"
+            )
+            accent, confidence, all_scores = self._decide(posterior.mean)
+            return (
+                accent,
+                confidence,
+                all_scores,
+                timeline,
+                posterior.windows,
+                reason,
+            )
 
         except Exception as e:
-            logger.error(f"Error in accent prediction: {str(e)}")
+            logger.error(f"Error in progressive accent prediction: {str(e)}")
             raise
@@ -0,0 +1,204 @@
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Micro-batching of accent embeddings across concurrent callers (opt-in)
+MICROBATCH = os.environ.get("ACCENT_MICROBATCH", "0") == "1"
+BATCH_MAX_SIZE = int(os.environ.get("ACCENT_BATCH_MAX_SIZE", 8))
+BATCH_MAX_WAIT_MS = float(os.environ.get("ACCENT_BATCH_MAX_WAIT_MS", 5))
+REPLICAS = int(os.environ.get("ACCENT_REPLICAS", 1))
+
+_STOP = object()
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def threads_per_share(shares: int) -> int:
+    """Splits this machine's cores evenly into `shares` thread budgets."""
+    return max(1, (os.cpu_count() or 1) // max(1, shares))
+
+
+def set_torch_threads(threads: int):
+    """
+    Fixes torch's intra-op thread count for this process.
+
+    The count is process-wide, not per thread: every thread that runs an
+    op afterwards uses up to `threads` intra-op threads. Worker processes
+    set their share once at startup.
+    """
+    import torch
+
+    torch.set_num_threads(threads)
+
+
+def _process_threads() -> int:
+    # The budget this process was given, or the whole machine without torch
+    try:
+        import torch
+    except ImportError:
+        return os.cpu_count() or 1
+    return torch.get_num_threads()
+
+
+class MicroBatcher:
+    """
+    Merges requests that arrive within a few milliseconds into one batch.
+
+    Each replica is a thread that waits for a request, keeps collecting
+    until `max_batch_size` requests are in hand or `max_wait_ms` has passed
+    since the first, runs them through `run_batch` in one call and hands
+    each caller its own result. Replicas share the model weights (inference
+    only reads them). torch's thread count is process-wide, so the batcher
+    sets it once to `threads_per_replica`: each batch running at the same
+    time then uses that many threads, and together the replicas stay
+    within the process's budget instead of oversubscribing the CPU.
+
+    Args:
+        run_batch (callable): Maps a list of items to a list of results in
+            the same order.
+        max_batch_size (int): Most requests run together.
+        max_wait_ms (float): Longest a request waits for others to join.
+        replicas (int): Number of batches that can run at the same time.
+        threads_per_replica (int): torch intra-op threads per replica,
+            defaults to an even split of the process's current torch
+            thread count (a worker's share, or the machine's cores).
+        name (str): Prefix of the replica thread names.
+    """
+
+    def __init__(
+        self,
+        run_batch,
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_wait_ms: float = BATCH_MAX_WAIT_MS,
+        replicas: int = REPLICAS,
+        threads_per_replica: int = None,
+        name: str = "batcher",
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.replicas = replicas
+        self.threads_per_replica = threads_per_replica or max(
+            1, _process_threads() // max(1, replicas)
+        )
+        try:
+            set_torch_threads(self.threads_per_replica)
+        except ImportError:
+            pass
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._threads = [
+            threading.Thread(target=self._serve, name=f"{name}-{index}", daemon=True)
+            for index in range(replicas)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(
+            f"Micro-batcher {name}: {replicas} replicas x "
+            f"{self.threads_per_replica} threads, batches of up to "
+            f"{max_batch_size} within {max_wait_ms}ms"
+        )
+
+    def submit(self, item) -> Future:
+        """Queues one item; the returned future resolves to its result."""
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def map(self, items) -> list:
+        """Runs items through the batcher and waits for all of their results."""
+        futures = [self.submit(item) for item in items]
+        return [future.result() for future in futures]
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            self._queue.put(_STOP)  # Let the other replicas see it too
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(request)
+        return batch
+
+    def _serve(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # Drop requests whose callers cancelled while they waited
+            batch = [(item, f) for item, f in batch if f.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                results = self.run_batch([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+
+    def stats(self) -> dict:
+        """Returns batch counts, mean batch size and the configuration."""
+        with self._lock:
+            batches, items = self._batches, self._items
+        return {
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": round(items / batches, 2) if batches else 0.0,
+            "queued": self._queue.qsize(),
+            "replicas": self.replicas,
+            "threads_per_replica": self.threads_per_replica,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+    def close(self):
+        """Stops the replicas once the requests already queued are served."""
+        self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+
+def get_accent_batcher(run_batch):
+    """
+    Returns the process-wide accent embedding batcher, or None when
+    micro-batching is disabled (set ACCENT_MICROBATCH=1 to enable it).
+
+    Args:
+        run_batch (callable): Embeds a list of preprocessed clips; only
+            used by the call that creates the batcher.
+    """
+    global _batcher
+    if not MICROBATCH:
+        return None
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher(run_batch, name="accent-batcher")
+        return _batcher
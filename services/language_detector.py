@@ -1,28 +1,34 @@
 import whisper
+import numpy as np
 import logging
+from services.model_registry import get_whisper_model
 
 logger = logging.getLogger(__name__)
 
 
 class LanguageDetector:
-    def __init__(self):
-        self.model = whisper.load_model("base")
+    def __init__(self, model_size: str = "base"):
+        self.model = get_whisper_model(model_size)
 
-    def detect(self, audio_path: str) -> tuple[str, float]:
+    def detect(self, audio) -> tuple[str, float]:
         """
         Detect the language of the audio file.
 
         Args:
-            audio_path: Path to the audio file
+            audio: Path to the audio file, or a decoded mono 16 kHz float32 buffer
 
         Returns:
             tuple: (language_code, confidence_score)
         """
         try:
-            # Use whisper to detect language
-            result = self.model.detect_language(audio_path)
-            language = result[0]
-            confidence = float(result[1])
+            # Use whisper to detect language on the first 30-second window
+            if isinstance(audio, str):
+                audio = whisper.load_audio(audio)
+            audio = whisper.pad_or_trim(np.asarray(audio, dtype=np.float32))
+            mel = whisper.log_mel_spectrogram(audio).to(self.model.device)
+            _, probs = self.model.detect_language(mel)
+            language = max(probs, key=probs.get)
+            confidence = float(probs[language])
 
             logger.info(
                 f"Detected language: {language} with confidence: {confidence:.2f}"
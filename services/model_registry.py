@@ -0,0 +1,340 @@
+import os
+import threading
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Process-wide cache of loaded models, keyed by a stable name
+_models = {}
+_warm = set()
+_load_seconds = {}
+_load_events = []
+_lock = threading.RLock()
+
+WHISPER_MODEL_SIZE = "base"
+ACCENT_ENCODER_SOURCE = "speechbrain/spkrec-ecapa-voxceleb"
+ACCENT_ENCODER_SAVEDIR = "models/accent_classifier"
+
+# Accent head: a saved state_dict if one exists, else seeded initial weights
+ACCENT_HEAD_PATH = os.environ.get("ACCENT_HEAD_PATH", "models/accent_head.pt")
+ACCENT_HEAD_SEED = int(os.environ.get("ACCENT_HEAD_SEED", 0))
+ACCENT_EMBEDDING_DIM = 192
+ACCENT_NUM_LABELS = 7
+
+# "fp32", or "int8" for Whisper with dynamically quantized Linear layers on CPU
+PRECISIONS = ("fp32", "int8")
+MODEL_PRECISION = os.environ.get("ACCENT_MODEL_PRECISION", "fp32")
+
+# How the accent encoder and head run: "eager", "torchscript" or "onnx"
+ACCENT_BACKENDS = ("eager", "torchscript", "onnx")
+ACCENT_BACKEND = os.environ.get("ACCENT_BACKEND", "eager")
+
+# Load models once in the parent and share their weights with worker processes
+SHARE_WEIGHTS = os.environ.get("ACCENT_SHARE_WEIGHTS", "1") == "1"
+
+
+def get_model(name: str, loader):
+    """
+    Returns the model registered under `name`, loading it on first use.
+
+    Args:
+        name (str): Unique registry key for the model.
+        loader (callable): Zero-argument function that loads the model.
+
+    Returns:
+        The loaded model instance, shared by every caller in this process.
+    """
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    with _lock:
+        # Another thread may have finished loading while we waited
+        model = _models.get(name)
+        if model is None:
+            logger.info(f"Loading model into registry: {name}")
+            start = time.perf_counter()
+            model = loader()
+            _load_seconds[name] = round(time.perf_counter() - start, 3)
+            _load_events.append((name, _load_seconds[name]))
+            _models[name] = model
+            logger.info(f"Model {name} loaded in {_load_seconds[name]}s")
+    return model
+
+
+def load_events(since: int = 0) -> list:
+    """
+    Returns the (name, seconds) model loads of this process, oldest first.
+
+    Args:
+        since (int): Number of events the caller has already seen.
+    """
+    with _lock:
+        return list(_load_events[since:])
+
+
+def _check_precision(precision: str) -> str:
+    precision = precision or MODEL_PRECISION
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown model precision {precision!r}, use {PRECISIONS}")
+    return precision
+
+
+def whisper_key(model_size: str = WHISPER_MODEL_SIZE, precision: str = None) -> str:
+    """Registry name of a Whisper model; also used in cache keys."""
+    precision = _check_precision(precision)
+    key = f"whisper:{model_size}"
+    return key if precision == "fp32" else f"{key}:{precision}"
+
+
+def encoder_key(source: str = ACCENT_ENCODER_SOURCE) -> str:
+    """Registry name of an ECAPA encoder; also used in cache keys."""
+    return f"ecapa:{source}"
+
+
+def get_whisper_model(model_size: str = WHISPER_MODEL_SIZE, precision: str = None):
+    """
+    Returns the shared Whisper model of the given size.
+
+    Args:
+        model_size (str): Whisper model size.
+        precision (str): 'fp32' or 'int8', defaults to `MODEL_PRECISION`.
+            The int8 model is quantized once and cached on disk.
+    """
+    precision = _check_precision(precision)
+
+    def _load():
+        import whisper
+
+        if precision == "int8":
+            from services.quantization import load_or_quantize
+
+            return load_or_quantize(
+                f"whisper-{model_size}",
+                lambda: whisper.load_model(model_size, device="cpu"),
+            )
+        return whisper.load_model(model_size)
+
+    return get_model(whisper_key(model_size, precision), _load)
+
+
+def get_accent_encoder(
+    source: str = ACCENT_ENCODER_SOURCE, savedir: str = ACCENT_ENCODER_SAVEDIR
+):
+    """
+    Returns the shared SpeechBrain ECAPA-TDNN encoder.
+
+    It always runs in fp32, whatever `MODEL_PRECISION` says: ECAPA-TDNN is
+    built from Conv1d layers and has no nn.Linear for dynamic quantization
+    to replace.
+    """
+
+    def _load():
+        from speechbrain.pretrained import EncoderClassifier
+
+        return EncoderClassifier.from_hparams(source=source, savedir=savedir)
+
+    return get_model(encoder_key(source), _load)
+
+
+def get_accent_head(
+    in_features: int = ACCENT_EMBEDDING_DIM,
+    num_labels: int = ACCENT_NUM_LABELS,
+    path: str = ACCENT_HEAD_PATH,
+):
+    """
+    Returns the shared accent classification layer.
+
+    The weights come from the state_dict saved at `path` when there is
+    one. Otherwise they are initialized from `ACCENT_HEAD_SEED`, so every
+    process and worker scores embeddings with the same head and a clip
+    gets the same label whichever worker runs it.
+    """
+
+    def _load():
+        import torch
+
+        if os.path.exists(path):
+            head = torch.nn.Linear(in_features, num_labels)
+            head.load_state_dict(torch.load(path, map_location="cpu"))
+            logger.info(f"Loaded accent head from {path}")
+            return head.eval()
+        # Seed a private RNG state so the global one is left untouched
+        with torch.random.fork_rng(devices=[]):
+            torch.manual_seed(ACCENT_HEAD_SEED)
+            return torch.nn.Linear(in_features, num_labels).eval()
+
+    return get_model(f"accent_head:{in_features}x{num_labels}", _load)
+
+
+def head_key(head=None) -> str:
+    """
+    Fingerprint of the accent head's weights, for cache keys of results
+    scored with it. Defaults to the shared head of this process.
+    """
+    import hashlib
+
+    head = head if head is not None else get_accent_head()
+    digest = hashlib.sha256()
+    for name, tensor in sorted(head.state_dict().items()):
+        digest.update(name.encode())
+        digest.update(tensor.detach().cpu().numpy().tobytes())
+    return f"accent_head:{digest.hexdigest()[:16]}"
+
+
+def get_accent_graph(in_features: int, num_labels: int, backend: str = None):
+    """
+    Returns the shared accent inference graph: the ECAPA encoder and the
+    accent head behind one (wavs, wav_lens) -> (embeddings, logits) call.
+
+    Args:
+        in_features (int): Embedding size of the head.
+        num_labels (int): Number of accent labels.
+        backend (str): 'eager', 'torchscript' or 'onnx', defaults to
+            `ACCENT_BACKEND`. Exported backends fall back to eager when
+            they cannot be built; see `services.accent_backend`.
+    """
+    backend = backend or ACCENT_BACKEND
+    if backend not in ACCENT_BACKENDS:
+        raise ValueError(f"Unknown accent backend {backend!r}, use {ACCENT_BACKENDS}")
+
+    def _load():
+        from services.accent_backend import load_accent_graph
+
+        return load_accent_graph(
+            backend,
+            get_accent_encoder(),
+            get_accent_head(in_features, num_labels),
+            encoder_key(),
+        )
+
+    return get_model(f"accent_graph:{backend}:{encoder_key()}", _load)
+
+
+def share_models(start_method: str = "fork") -> dict:
+    """
+    Loads Whisper, the ECAPA encoder and the accent head here for worker
+    processes to use.
+
+    Workers forked afterwards inherit the weights copy-on-write; inference
+    never writes to them, so their pages stay shared between all workers.
+    For 'spawn' and 'forkserver' workers the weights are moved into shared
+    memory, and the models pickled to the workers map it instead of
+    holding a copy. Int8 models keep packed weights outside of tensors, so
+    only forked workers share those. Models that cannot be shared this way
+    (exported graphs, for example) are left for each worker to load.
+
+    Args:
+        start_method (str): Start method of the worker processes.
+
+    Returns:
+        dict: Name -> model, to pass to `adopt_models` in each worker.
+    """
+    from multiprocessing.reduction import ForkingPickler
+
+    get_whisper_model()
+    get_accent_encoder()
+    get_accent_head()
+    with _lock:
+        models = dict(_models)
+
+    shared = {}
+    for name, model in models.items():
+        # SpeechBrain interfaces keep their torch modules in `mods`
+        modules = getattr(model, "mods", model)
+        if not hasattr(modules, "share_memory"):
+            continue
+        if start_method != "fork":
+            try:
+                modules.share_memory()
+                ForkingPickler.dumps(model)
+            except Exception as e:
+                logger.warning(f"Not sharing {name} with workers: {str(e)}")
+                continue
+        shared[name] = model
+    logger.info(f"Sharing models with {start_method} workers: {sorted(shared)}")
+    return shared
+
+
+def adopt_models(models: dict):
+    """Registers models loaded by another process, see `share_models`."""
+    with _lock:
+        for name, model in models.items():
+            _models.setdefault(name, model)
+            _load_seconds.setdefault(name, 0.0)
+
+
+def _warmup_whisper(model):
+    import numpy as np
+    import whisper
+
+    audio = whisper.pad_or_trim(np.zeros(16000, dtype=np.float32))
+    mel = whisper.log_mel_spectrogram(audio).to(model.device)
+    model.detect_language(mel)
+
+
+def _warmup_encoder(encoder):
+    import torch
+
+    with torch.no_grad():
+        encoder.encode_batch(torch.zeros(1, 16000, device=encoder.device))
+
+
+def warmup(whisper_size: str = WHISPER_MODEL_SIZE):
+    """
+    Loads every pipeline model and runs one dummy forward pass through each.
+
+    Safe to call repeatedly; models that are already warm are skipped.
+
+    Args:
+        whisper_size (str): Whisper model size used by the pipeline.
+
+    Returns:
+        dict: Readiness report, see `readiness()`.
+    """
+    steps = [
+        (
+            whisper_key(whisper_size),
+            lambda: get_whisper_model(whisper_size),
+            _warmup_whisper,
+        ),
+        (encoder_key(), get_accent_encoder, _warmup_encoder),
+    ]
+    for name, load, run in steps:
+        if name in _warm:
+            continue
+        try:
+            run(load())
+            _warm.add(name)
+            logger.info(f"Model {name} is warm")
+        except Exception as e:
+            logger.error(f"Warmup failed for {name}: {str(e)}")
+    return readiness()
+
+
+def readiness() -> dict:
+    """
+    Reports which models are loaded and warm in this process.
+
+    Returns:
+        dict: {
+            'ready': True when the Whisper and ECAPA models are warm,
+            'models': {name: {'loaded': bool, 'warm': bool, 'load_seconds': float}}
+        }
+    """
+    with _lock:
+        models = {
+            name: {
+                "loaded": True,
+                "warm": name in _warm,
+                "load_seconds": _load_seconds.get(name),
+            }
+            for name in _models
+        }
+    required = {whisper_key(), encoder_key()}
+    return {
+        "ready": required <= _warm,
+        "models": models,
+    }
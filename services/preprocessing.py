@@ -0,0 +1,176 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TARGET_SR = 16000
+MIN_SAMPLES = 16000  # Clips shorter than one second are zero-padded
+PREEMPHASIS = 0.97
+TRIM_TOP_DB = 20
+TRIM_FRAME = 2048
+TRIM_HOP = 512
+# Samples (rows x columns) whose running sum is held in memory at once
+TRIM_BLOCK = 1 << 22
+
+
+def pad_batch(clips) -> tuple:
+    """
+    Stacks 1-D clips into a zero-padded float32 batch.
+
+    Returns:
+        tuple: (batch of shape (len(clips), longest), int64 lengths)
+    """
+    lengths = np.array([len(clip) for clip in clips], dtype=np.int64)
+    batch = np.zeros((len(clips), lengths.max(initial=0)), dtype=np.float32)
+    for row, clip in enumerate(clips):
+        batch[row, : len(clip)] = clip
+    return batch, lengths
+
+
+def _valid(lengths, width: int) -> np.ndarray:
+    return np.arange(width)[None, :] < lengths[:, None]
+
+
+def resample_batch(batch, lengths, orig_sr: int, target_sr: int = TARGET_SR):
+    """
+    Resamples every row in one soxr call, as librosa.resample does per clip.
+
+    Channels are filtered independently, and the zeros after a clip are what
+    the resampler flushes a lone clip with, so each row matches resampling
+    its clip alone.
+    """
+    import soxr
+
+    ratio = target_sr / orig_sr
+    new_lengths = np.ceil(lengths * ratio).astype(np.int64)
+    width = int(np.ceil(batch.shape[1] * ratio))
+    # soxr takes (frames, channels)
+    resampled = soxr.resample(batch.T, orig_sr, target_sr, quality="soxr_hq").T
+    out = np.zeros((len(batch), width), dtype=np.float32)
+    out[:, : min(width, resampled.shape[1])] = resampled[:, :width]
+    out *= _valid(new_lengths, width)
+    return out, new_lengths
+
+
+def normalize_batch(batch):
+    """Peak-normalizes each row; silent rows are left as they are."""
+    peak = np.abs(batch).max(axis=1, keepdims=True)
+    return batch / np.where(peak < np.finfo(batch.dtype).tiny, 1, peak)
+
+
+def preemphasis_batch(batch, lengths, coef: float = PREEMPHASIS):
+    """
+    librosa.effects.preemphasis on each row: y[n] - coef * y[n - 1], with
+    librosa's linear-extrapolation initial state for the first sample.
+    """
+    out = np.empty_like(batch)
+    out[:, 1:] = batch[:, 1:] - coef * batch[:, :-1]
+    out[:, 0] = 3 * batch[:, 0] - batch[:, 1] if batch.shape[1] > 1 else batch[:, 0]
+    out *= _valid(lengths, batch.shape[1])
+    return out
+
+
+def trim_bounds(
+    batch,
+    lengths,
+    top_db: float = TRIM_TOP_DB,
+    frame_length: int = TRIM_FRAME,
+    hop_length: int = TRIM_HOP,
+) -> tuple:
+    """
+    Finds the non-silent span of each row like librosa.effects.trim.
+
+    Frame energies come from a running sum of squares instead of a framed
+    copy of the signal. The sum is taken over blocks of about
+    `TRIM_BLOCK` samples, so memory stays bounded whatever the length of
+    the recording.
+
+    Returns:
+        tuple: (starts, ends) sample indices per row.
+    """
+    n_frames = 1 + batch.shape[1] // hop_length
+    power = _frame_power(batch, n_frames, frame_length, hop_length)
+    # Frames past a row's own length do not exist for that clip
+    power[np.arange(n_frames)[None, :] >= (1 + lengths // hop_length)[:, None]] = 0
+
+    # power_to_db(...) > -top_db, relative to each row's loudest frame
+    amin = 1e-10
+    ref = np.maximum(amin, power.max(axis=1, keepdims=True))
+    loud = np.maximum(amin, power) > ref * 10 ** (-top_db / 10)
+
+    any_loud = loud.any(axis=1)
+    first = np.argmax(loud, axis=1)
+    last = n_frames - 1 - np.argmax(loud[:, ::-1], axis=1)
+    starts = np.where(any_loud, first * hop_length, 0)
+    ends = np.where(any_loud, np.minimum(lengths, (last + 1) * hop_length), 0)
+    return starts, ends
+
+
+def _frame_power(batch, n_frames: int, frame_length: int, hop_length: int):
+    """Mean square of each centered, zero-padded frame, one block at a time."""
+    rows, width = batch.shape
+    half = frame_length // 2
+    power = np.empty((rows, n_frames))
+    frames_per_block = max(1, TRIM_BLOCK // max(1, rows * hop_length))
+    for first in range(0, n_frames, frames_per_block):
+        count = min(frames_per_block, n_frames - first)
+        # Frame f covers samples [f * hop - half, f * hop - half + frame_length)
+        lo = first * hop_length - half
+        hi = (first + count - 1) * hop_length - half + frame_length
+        squares = np.zeros((rows, hi - lo))
+        src_lo, src_hi = max(lo, 0), min(hi, width)
+        if src_hi > src_lo:
+            squares[:, src_lo - lo : src_hi - lo] = batch[:, src_lo:src_hi]
+        squares **= 2
+        cumsum = np.zeros((rows, hi - lo + 1))
+        np.cumsum(squares, axis=1, out=cumsum[:, 1:])
+        starts = np.arange(count) * hop_length
+        power[:, first : first + count] = (
+            cumsum[:, starts + frame_length] - cumsum[:, starts]
+        ) / frame_length
+    return power
+
+
+def preprocess_batch(audios, sr: int, max_samples: int = 160000) -> tuple:
+    """
+    Prepares clips for the accent encoder with whole-batch array ops.
+
+    Matches running each clip through librosa's to_mono, resample
+    (soxr_hq), normalize, preemphasis and trim(top_db=20), then padding to
+    at least one second and cutting to `max_samples`. The samples agree
+    to within float32 rounding (about 1e-5), not bit for bit.
+
+    Args:
+        audios (list[np.ndarray]): Clips sharing the sample rate `sr`;
+            multi-channel clips are (channels, samples).
+        sr (int): Sample rate of the clips.
+        max_samples (int): Cap on each output clip, None for no cap.
+
+    Returns:
+        tuple: (batch, lengths) with each 16 kHz clip left-aligned in a
+            zero-padded float32 array of shape (len(audios), max(lengths)).
+    """
+    clips = [
+        np.mean(audio, axis=tuple(range(audio.ndim - 1))) if audio.ndim > 1 else audio
+        for audio in map(np.asarray, audios)
+    ]
+    batch, lengths = pad_batch(clips)
+    if sr != TARGET_SR:
+        batch, lengths = resample_batch(batch, lengths, sr)
+
+    batch = preemphasis_batch(normalize_batch(batch), lengths)
+    starts, ends = trim_bounds(batch, lengths)
+
+    out_lengths = np.maximum(ends - starts, MIN_SAMPLES)
+    if max_samples is not None:
+        out_lengths = np.minimum(out_lengths, max_samples)
+    out = np.zeros((len(clips), out_lengths.max(initial=0)), dtype=np.float32)
+    for row, (start, end, length) in enumerate(zip(starts, ends, out_lengths)):
+        kept = min(end - start, length)
+        out[row, :kept] = batch[row, start : start + kept]
+    return out, out_lengths
+
+
+def unpad(batch, lengths) -> list:
+    """Splits a padded batch back into per-clip views."""
+    return [batch[row, :length] for row, length in enumerate(lengths)]
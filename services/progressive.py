@@ -0,0 +1,79 @@
+import os
+import time
+import numpy as np
+
+# Early stopping of progressive accent inference
+STOP_CONFIDENCE = float(os.environ.get("ACCENT_STOP_CONFIDENCE", 0.8))
+STOP_MARGIN = float(os.environ.get("ACCENT_STOP_MARGIN", 0.5))
+TIME_BUDGET = float(os.environ.get("ACCENT_TIME_BUDGET", 10))
+
+
+class RunningPosterior:
+    """
+    Mean of per-window accent posteriors, updated one window at a time.
+
+    The mean over all windows is what `AccentClassifier.classify_windows`
+    reports, so a run that never stops early gives the same answer. The
+    run is settled once the mean's top probability reaches
+    `min_confidence` or leads the runner-up by `min_margin`, after at
+    least `min_windows` windows, or once `time_budget` seconds have
+    passed since the posterior was created.
+
+    Args:
+        min_confidence (float): Top probability that settles the run.
+        min_margin (float): Lead over the second label that settles it.
+        time_budget (float): Seconds before the run is cut off, None for
+            no limit.
+        min_windows (int): Windows to see before stopping on confidence.
+    """
+
+    def __init__(
+        self,
+        min_confidence: float = STOP_CONFIDENCE,
+        min_margin: float = STOP_MARGIN,
+        time_budget: float = TIME_BUDGET,
+        min_windows: int = 1,
+    ):
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin
+        self.min_windows = min_windows
+        self.deadline = None if time_budget is None else time.monotonic() + time_budget
+        self.windows = 0
+        self._sum = None
+
+    def update(self, probs) -> np.ndarray:
+        """Adds one window's probabilities and returns the running mean."""
+        probs = np.asarray(probs, dtype=np.float64)
+        self._sum = probs.copy() if self._sum is None else self._sum + probs
+        self.windows += 1
+        return self.mean
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self._sum / self.windows
+
+    def margin(self) -> float:
+        """Lead of the top label over the runner-up."""
+        top = np.sort(self.mean)[::-1]
+        return float(top[0] - top[1]) if len(top) > 1 else float(top[0])
+
+    def confident(self) -> bool:
+        if self.windows < self.min_windows:
+            return False
+        return (
+            float(self.mean.max()) >= self.min_confidence
+            or self.margin() >= self.min_margin
+        )
+
+    def stop_reason(self) -> str:
+        """
+        Says why the run should stop now, or None to embed another window.
+
+        Returns:
+            str: 'confident', 'time_budget' or None.
+        """
+        if self.windows and self.confident():
+            return "confident"
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return "time_budget"
+        return None
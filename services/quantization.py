@@ -0,0 +1,115 @@
+import os
+import re
+import logging
+import torch
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Quantized models are cached here so startup does not quantize again
+QUANTIZED_DIR = os.environ.get(
+    "ACCENT_QUANTIZED_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "quantized"),
+)
+
+
+def _plain_linears(module: torch.nn.Module) -> int:
+    """
+    Replaces subclasses of nn.Linear with plain nn.Linear, in place.
+
+    Dynamic quantization only swaps modules whose type is exactly
+    nn.Linear; Whisper uses a subclass that merely casts weights to the
+    input dtype, which is a no-op for fp32 on CPU. Weights are shared,
+    not copied.
+
+    Returns:
+        int: Number of Linear layers in the module.
+    """
+    count = 0
+    for name, child in module.named_children():
+        if isinstance(child, torch.nn.Linear):
+            if type(child) is not torch.nn.Linear:
+                plain = torch.nn.Linear(
+                    child.in_features, child.out_features, bias=child.bias is not None
+                )
+                plain.weight = child.weight
+                plain.bias = child.bias
+                setattr(module, name, plain)
+            count += 1
+        else:
+            count += _plain_linears(child)
+    return count
+
+
+def quantize_int8(module: torch.nn.Module) -> torch.nn.Module:
+    """
+    Applies dynamic int8 quantization to every Linear layer of a CPU model.
+
+    Weights are stored as int8 and activations are quantized on the fly,
+    so no calibration data is needed. The module is modified in place.
+
+    Returns:
+        torch.nn.Module: The quantized module.
+
+    Raises:
+        ValueError: If the module has no Linear layer, so quantizing it
+            would change nothing.
+    """
+    module = module.cpu().eval()
+    count = _plain_linears(module)
+    if not count:
+        raise ValueError(f"{type(module).__name__} has no Linear layers to quantize")
+    logger.info(f"Quantizing {count} Linear layers of {type(module).__name__}")
+    return torch.ao.quantization.quantize_dynamic(
+        module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+
+
+def quantized_path(name: str) -> str:
+    """Cache file of a quantized model; tied to the torch version."""
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+    return os.path.join(QUANTIZED_DIR, f"{safe_name}-int8-torch{torch.__version__}.pt")
+
+
+def load_or_quantize(name: str, build) -> torch.nn.Module:
+    """
+    Returns the int8 model cached under `name`, quantizing it on a miss.
+
+    Args:
+        name (str): Cache name of the model, e.g. 'whisper-base'.
+        build (callable): Zero-argument function returning the fp32 module.
+            Only called when no cached quantized model exists.
+
+    Returns:
+        torch.nn.Module: The quantized module, in eval mode on the CPU.
+    """
+    path = quantized_path(name)
+    if os.path.exists(path):
+        try:
+            # Whole-module pickle written by this process tree, see below
+            module = torch.load(path, map_location="cpu", weights_only=False)
+            logger.info(f"Loaded quantized model from {path}")
+            return module.eval()
+        except Exception as e:
+            logger.warning(f"Discarding unreadable quantized model {path}: {e}")
+
+    module = quantize_int8(build())
+    try:
+        os.makedirs(QUANTIZED_DIR, exist_ok=True)
+        torch.save(module, path + ".part")
+        os.replace(path + ".part", path)
+        logger.info(f"Saved quantized model to {path}")
+    except OSError as e:
+        logger.warning(f"Could not cache quantized model: {str(e)}")
+    return module
+
+
+def model_bytes(module: torch.nn.Module) -> int:
+    """Size of a module's weights and buffers, including packed int8 weights."""
+    total = 0
+    for value in module.state_dict().values():
+        tensors = value if isinstance(value, tuple) else (value,)
+        for tensor in tensors:
+            if isinstance(tensor, torch.Tensor):
+                total += tensor.numel() * tensor.element_size()
+    return total
@@ -2,6 +2,7 @@ import os
 from speechbrain.inference import EncoderClassifier
 import torch
 import logging
+from services.model_registry import get_model
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -14,9 +15,12 @@ class AccentClassifier:
 
     def __init__(self):
         logger.info("Loading SpeechBrain ECAPA model...")
-        self.classifier = EncoderClassifier.from_hparams(
-            source="speechbrain/lang-id-commonlanguage_ecapa",
-            savedir="pretrained_models/lang-id-commonlanguage_ecapa",
+        self.classifier = get_model(
+            "ecapa:speechbrain/lang-id-commonlanguage_ecapa",
+            lambda: EncoderClassifier.from_hparams(
+                source="speechbrain/lang-id-commonlanguage_ecapa",
+                savedir="pretrained_models/lang-id-commonlanguage_ecapa",
+            ),
         )
 
     def classify_accent(self, audio_path: str) -> dict:
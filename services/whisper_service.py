@@ -2,11 +2,22 @@ import whisper
 import logging
 import os
 import numpy as np
+from services.model_registry import get_whisper_model
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
+def _window_end(audio, start: int, window: int, search: int, frame: int) -> int:
+    """End of the window at `start`: the quietest frame of its last `search` samples."""
+    end = start + window
+    if end >= len(audio):
+        return len(audio)
+    tail = audio[end - search : end]
+    energy = np.square(tail[: len(tail) // frame * frame].reshape(-1, frame)).sum(1)
+    return end - search + int(np.argmin(energy)) * frame + frame // 2
+
+
 class WhisperTranscriber:
     """
     A wrapper for OpenAI Whisper model (base).
@@ -15,48 +26,60 @@ class WhisperTranscriber:
     def __init__(self, model_size: str = "base"):
         try:
             logger.info(f"Loading Whisper model: {model_size}")
-            self.model = whisper.load_model(model_size)
+            self.model = get_whisper_model(model_size)
         except Exception as e:
             logger.error(f"Error loading Whisper model: {str(e)}")
             raise
 
-    def transcribe(self, audio_path: str) -> dict:
+    def transcribe(self, audio, language: str = None) -> dict:
         """
         Transcribes speech from an audio file and detects language.
 
         Args:
-            audio_path (str): Path to the WAV file
+            audio (str | np.ndarray): Path to the WAV file, or an already
+                decoded mono 16 kHz float32 buffer
+            language (str): Language code detected upstream. When given,
+                language detection is skipped and Whisper decodes directly
+                in that language.
 
         Returns:
             dict: Transcription result with keys:
                   'text', 'language', 'segments', 'language_confidence'
+                  ('language_confidence' is None when `language` is given)
         """
         try:
-            logger.info(f"Transcribing audio: {audio_path}")
-            if not os.path.isfile(audio_path):
-                logger.error(f"Audio file does not exist: {audio_path}")
-                raise FileNotFoundError(f"Audio file does not exist: {audio_path}")
+            if isinstance(audio, str):
+                logger.info(f"Transcribing audio: {audio}")
+                if not os.path.isfile(audio):
+                    logger.error(f"Audio file does not exist: {audio}")
+                    raise FileNotFoundError(f"Audio file does not exist: {audio}")
 
-            # Load audio using whisper's built-in function
-            audio = whisper.load_audio(audio_path)
-            audio = whisper.pad_or_trim(audio)
+                # Decode once with whisper's built-in function
+                audio = whisper.load_audio(audio)
 
+            audio = np.asarray(audio, dtype=np.float32)
             logger.info(f"Loaded audio shape: {audio.shape}")
 
-            # Make log-Mel spectrogram and move to the same device as the model
-            mel = whisper.log_mel_spectrogram(audio).to(self.model.device)
+            if language is None:
+                # Make log-Mel spectrogram of the first 30 seconds on the model device
+                mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio)).to(
+                    self.model.device
+                )
 
-            # Detect the language
-            _, probs = self.model.detect_language(mel)
-            detected_lang = max(probs, key=probs.get)
-            language_confidence = probs[detected_lang]
+                # Detect the language
+                _, probs = self.model.detect_language(mel)
+                detected_lang = max(probs, key=probs.get)
+                language_confidence = round(probs[detected_lang] * 100, 2)
 
-            logger.info(
-                f"Detected language: {detected_lang} with confidence: {language_confidence:.2f}"
-            )
+                logger.info(
+                    f"Detected language: {detected_lang} with confidence: {language_confidence:.2f}%"
+                )
+            else:
+                detected_lang = language
+                language_confidence = None
 
-            # Transcribe the audio
-            result = self.model.transcribe(audio_path)
+            # Transcribe the decoded buffer (no second ffmpeg pass or detection)
+            result = self.model.transcribe(audio, language=detected_lang)
 
             # Ensure we have text
             if not result.get("text"):
@@ -67,7 +90,7 @@ class WhisperTranscriber:
                 "text": result["text"],
                 "language": detected_lang,
                 "segments": result.get("segments", []),
-                "language_confidence": round(language_confidence * 100, 2),
+                "language_confidence": language_confidence,
             }
 
         except Exception as e:
@@ -78,3 +101,45 @@ class WhisperTranscriber:
                 "segments": [],
                 "language_confidence": 0.0,
             }
+
+    def transcribe_stream(self, audio, language: str, window_seconds: float = 30.0):
+        """
+        Transcribes a decoded buffer one window at a time.
+
+        Segments are yielded as soon as their window is decoded, so the
+        first ones arrive after a few seconds whatever the recording's
+        length. Each window ends at the quietest 20 ms of its last two
+        seconds, so cuts rarely split a word, and the previous window's
+        text is passed as the prompt to keep the decoding consistent.
+
+        Args:
+            audio (np.ndarray): Mono 16 kHz float32 buffer.
+            language (str): Language code to decode in.
+            window_seconds (float): Longest window handed to Whisper.
+
+        Yields:
+            dict: Whisper segments ('id', 'start', 'end', 'text', ...) with
+                times in seconds from the start of `audio`.
+        """
+        audio = np.asarray(audio, dtype=np.float32)
+        sr = whisper.audio.SAMPLE_RATE
+        window = int(window_seconds * sr)
+        start, prompt, count = 0, None, 0
+        while start < len(audio):
+            end = _window_end(audio, start, window, search=2 * sr, frame=sr // 50)
+            result = self.model.transcribe(
+                audio[start:end], language=language, initial_prompt=prompt
+            )
+            offset = start / sr
+            for segment in result.get("segments", []):
+                yield {
+                    **segment,
+                    "id": count,
+                    "start": round(segment["start"] + offset, 3),
+                    "end": round(segment["end"] + offset, 3),
+                }
+                count += 1
+            # Whisper only reads the last 224 prompt tokens; a few hundred
+            # characters cover them
+            prompt = result.get("text", "")[-800:] or None
+            start = end
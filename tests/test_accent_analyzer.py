@@ -0,0 +1,214 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("whisper")
+pytest.importorskip("speechbrain")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core import accent_analyzer
+from core.cache import DiskCache
+from core.accent_analyzer import AccentAnalyzer
+
+
+class FakeDetector:
+    def __init__(self, language="en", probability=0.99):
+        self.language = language
+        self.probability = probability
+        self.calls = []
+
+    def detect(self, audio):
+        self.calls.append(audio)
+        return self.language, self.probability
+
+
+class FakeTranscriber:
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, language=None):
+        self.calls.append((audio, language))
+        return {
+            "text": " hello there",
+            "language": language,
+            "segments": [{"id": 0, "start": 0.0, "end": 1.0, "text": " hello there"}],
+            "language_confidence": None,
+        }
+
+    def transcribe_stream(self, audio, language):
+        # Windowed decoding can punctuate differently from a single pass
+        self.calls.append((audio, language))
+        yield {"id": 0, "start": 0.0, "end": 0.5, "text": " hello"}
+        yield {"id": 1, "start": 0.5, "end": 1.0, "text": " there!"}
+
+
+class FakeClassifier:
+    def __init__(self):
+        self.classifier = torch.nn.Linear(192, 7)
+        self.calls = []
+
+    def embed(self, audio, sr):
+        self.calls.append(audio)
+        return np.ones(192, dtype=np.float32)
+
+    def classify_embedding(self, embedding):
+        return "UK", 90.0, {"UK": 90.0, "US": 10.0}
+
+
+@pytest.fixture
+def make_analyzer(monkeypatch):
+    """Builds an analyzer whose models are stand-ins; nothing is loaded."""
+    monkeypatch.setattr(accent_analyzer, "write_prometheus", lambda: None)
+
+    def make(detector=None, **kwargs):
+        detector = detector or FakeDetector()
+        monkeypatch.setattr(accent_analyzer, "AccentClassifier", FakeClassifier)
+        monkeypatch.setattr(accent_analyzer, "LanguageDetector", lambda: detector)
+        monkeypatch.setattr(accent_analyzer, "WhisperTranscriber", FakeTranscriber)
+        kwargs = {"use_cache": False, "store_embeddings": False, "vad": False, **kwargs}
+        return AccentAnalyzer(**kwargs)
+
+    return make
+
+
+def speech(seed, seconds=2):
+    return (
+        np.random.default_rng(seed).normal(0, 0.1, seconds * 16000).astype(np.float32)
+    )
+
+
+def test_finished_deferred_transcriptions_are_pruned(make_analyzer, monkeypatch):
+    monkeypatch.setattr(accent_analyzer, "KEEP_TRANSCRIPTIONS", 2)
+    analyzer = make_analyzer(mode="deferred")
+
+    for seed in range(5):
+        result = analyzer.analyze(speech(seed))
+        assert result["transcript_status"] == "pending"
+        analyzer.transcription(result["audio_id"]).result()
+
+    # Two finished ones kept, plus the newest
+    assert len(analyzer._transcriptions) == 3
+    assert analyzer.transcript(result)["transcript"] == " hello there"
+
+
+def test_progressive_results_are_keyed_by_time_budget(make_analyzer, monkeypatch):
+    analyzer = make_analyzer(progressive=True)
+    key = analyzer._config_key()
+
+    monkeypatch.setattr(accent_analyzer, "TIME_BUDGET", 2.5)
+    assert analyzer._config_key() != key
+
+
+def test_streamed_and_plain_transcripts_are_cached_apart(
+    make_analyzer, monkeypatch, tmp_path
+):
+    caches = {}
+    monkeypatch.setattr(
+        accent_analyzer,
+        "get_cache",
+        lambda tier: caches.setdefault(
+            tier, DiskCache(str(tmp_path / f"{tier}.sqlite"), 10**8)
+        ),
+    )
+    analyzer = make_analyzer(use_cache=True)
+    audio = speech(0)
+
+    assert analyzer.analyze(audio)["transcript"] == " hello there"
+    events = list(analyzer.analyze_stream(audio))
+    assert [e["segment"]["text"] for e in events if e["stage"] == "segment"] == [
+        " hello",
+        " there!",
+    ]
+    assert events[-1]["result"]["transcript"] == " hello there!"
+
+    # Both are cached now, each under its own key
+    calls = len(analyzer.transcriber.calls)
+    assert analyzer.analyze(audio)["transcript"] == " hello there"
+    assert list(analyzer.analyze_stream(audio))[-1]["result"]["transcript"] == (
+        " hello there!"
+    )
+    assert len(analyzer.transcriber.calls) == calls
+
+
+def test_audio_is_decoded_once_for_every_stage(make_analyzer, monkeypatch):
+    decoded = speech(0)
+    decodes = []
+
+    def decode_audio(path):
+        decodes.append(path)
+        return decoded
+
+    monkeypatch.setattr(accent_analyzer, "decode_audio", decode_audio)
+    analyzer = make_analyzer()
+    timings = {}
+    result = analyzer.analyze("clip.wav", timings=timings)
+
+    assert decodes == ["clip.wav"] and "decode" in timings
+    # Every model stage got the same buffer, not a copy read again from disk
+    assert len(analyzer.language_detector.calls) == 1
+    assert analyzer.language_detector.calls[0] is decoded
+    assert analyzer.accent_classifier.calls[0] is decoded
+    assert analyzer.transcriber.calls[0][0] is decoded
+    assert result["accent"] == "UK" and result["transcript"] == " hello there"
+
+
+@pytest.mark.parametrize(
+    "language, probability", [("fr", 0.99), ("en", 0.5)], ids=["french", "unclear"]
+)
+def test_non_english_audio_skips_accent_and_transcription(
+    make_analyzer, language, probability
+):
+    analyzer = make_analyzer(detector=FakeDetector(language, probability))
+    result = analyzer.analyze(speech(0))
+
+    assert result["accent"] == "Non-English or unclear"
+    assert result["language"] == language
+    assert result["transcript"] == "" and result["transcript_status"] == "skipped"
+    assert analyzer.accent_classifier.calls == []
+    assert analyzer.transcriber.calls == []
+
+
+def test_batch_inputs_from_a_directory_or_a_manifest(tmp_path):
+    (tmp_path / "calls" / "march").mkdir(parents=True)
+    for name in ("calls/b.mp4", "calls/march/a.WAV", "calls/notes.txt"):
+        (tmp_path / name).touch()
+    assert accent_analyzer.collect_inputs(str(tmp_path / "calls")) == [
+        str(tmp_path / "calls" / "b.mp4"),
+        str(tmp_path / "calls" / "march" / "a.WAV"),
+    ]
+
+    manifest = tmp_path / "inputs.txt"
+    manifest.write_text("# March calls\nhttps://example.com/a.mp4\n\n  b.wav  \n")
+    assert accent_analyzer.collect_inputs(str(manifest)) == [
+        "https://example.com/a.mp4",
+        "b.wav",
+    ]
+
+
+def test_batch_resume_skips_finished_inputs(tmp_path):
+    manifest = tmp_path / "inputs.txt"
+    manifest.write_text("a.wav\nb.wav\nc.wav\n")
+    output = tmp_path / "results.jsonl"
+    output.write_text(
+        '{"input": "a.wav", "status": "ok", "accent": "UK"}\n'
+        '{"input": "b.wav", "status": "error", "error": "boom"}\n'
+        # Cut short when the previous run was killed
+        '{"input": "c.wav", "status": "o'
+    )
+    assert accent_analyzer.completed_inputs(str(output)) == {"a.wav"}
+    assert accent_analyzer.completed_inputs(str(tmp_path / "missing.jsonl")) == set()
+
+    output.write_text(
+        "".join(f'{{"input": "{name}.wav", "status": "ok"}}\n' for name in "abc")
+    )
+    # Nothing left to do, so no worker is started
+    assert accent_analyzer.run_batch(str(manifest), str(output)) == {
+        "total": 3,
+        "skipped": 3,
+        "ok": 0,
+        "error": 0,
+    }
@@ -0,0 +1,113 @@
+import os
+import sys
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("speechbrain")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from speechbrain.lobes.features import Fbank
+from speechbrain.lobes.models.ECAPA_TDNN import ECAPA_TDNN
+from speechbrain.processing.features import InputNormalization
+
+from services import accent_backend
+
+
+class TinyEncoder:
+    """Randomly initialised ECAPA with the pretrained recipe's modules."""
+
+    device = "cpu"
+
+    def __init__(self, norm_type="sentence"):
+        torch.manual_seed(0)
+        self.mods = torch.nn.ModuleDict(
+            {
+                "compute_features": Fbank(n_mels=80),
+                "mean_var_norm": InputNormalization(
+                    norm_type=norm_type, std_norm=False
+                ),
+                "embedding_model": ECAPA_TDNN(
+                    80, channels=[64, 64, 64, 64, 192], lin_neurons=192
+                ),
+            }
+        ).eval()
+
+    def encode_batch(self, wavs, wav_lens):
+        # The steps of EncoderClassifier.encode_batch
+        feats = self.mods["compute_features"](wavs.float())
+        feats = self.mods["mean_var_norm"](feats, wav_lens)
+        return self.mods["embedding_model"](feats, wav_lens)
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(accent_backend, "EXPORT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def padded_batch():
+    # Batch size and lengths differ from the ones used for tracing
+    torch.manual_seed(1)
+    lengths = [24000, 16000, 30000, 9000]
+    wavs = torch.zeros(len(lengths), max(lengths))
+    for row, length in enumerate(lengths):
+        wavs[row, :length] = torch.randn(length) * 0.1
+    return wavs, torch.tensor(lengths) / max(lengths)
+
+
+@pytest.mark.parametrize("backend", ["torchscript", "onnx"])
+def test_exported_graph_matches_eager(backend, export_dir):
+    if backend == "onnx":
+        pytest.importorskip("onnxruntime")
+    encoder, head = TinyEncoder(), torch.nn.Linear(192, 7).eval()
+
+    graph = accent_backend.load_accent_graph(backend, encoder, head, "tiny")
+    assert graph.name == backend
+    assert len(list(export_dir.iterdir())) == 1
+
+    wavs, wav_lens = padded_batch()
+    embeddings, logits = graph(wavs, wav_lens)
+    expected_embeddings, expected_logits = accent_backend.EagerGraph(encoder, head)(
+        wavs, wav_lens
+    )
+    assert torch.allclose(embeddings, expected_embeddings, atol=1e-4)
+    assert torch.allclose(logits, expected_logits, atol=1e-4)
+
+
+def test_new_head_reuses_the_export(export_dir):
+    encoder = TinyEncoder()
+    accent_backend.load_accent_graph(
+        "torchscript", encoder, torch.nn.Linear(192, 7).eval(), "tiny"
+    )
+    exported = list(export_dir.iterdir())
+
+    head = torch.nn.Linear(192, 7).eval()
+    graph = accent_backend.load_accent_graph("torchscript", encoder, head, "tiny")
+    assert list(export_dir.iterdir()) == exported
+
+    wavs, wav_lens = padded_batch()
+    embeddings, logits = graph(wavs, wav_lens)
+    assert torch.allclose(logits, head(embeddings))
+
+
+def test_prune_exports_keeps_fresh_current_files(export_dir):
+    current = accent_backend.export_path("torchscript", "tiny")
+    other_torch = export_dir / "accent_graph-0123456789abcdef-torch0.0.1.pt"
+    unused = accent_backend.export_path("onnx", "old-encoder")
+    for path in (current, other_torch, unused):
+        open(path, "wb").close()
+    os.utime(unused, (0, 0))
+
+    deleted = accent_backend.prune_exports(keep=current)
+    assert sorted(deleted) == sorted([str(other_torch), unused])
+    assert os.path.exists(current)
+
+
+def test_unsupported_encoder_falls_back_to_eager(export_dir):
+    encoder = TinyEncoder(norm_type="global")
+    graph = accent_backend.load_accent_graph(
+        "torchscript", encoder, torch.nn.Linear(192, 7), "tiny-global"
+    )
+    assert isinstance(graph, accent_backend.EagerGraph)
@@ -0,0 +1,84 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("speechbrain")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services import accent_backend, accent_classifier_hf
+from services.accent_classifier_hf import AccentClassifier
+from test_accent_backend import TinyEncoder
+
+
+@pytest.fixture
+def classifier(monkeypatch):
+    """An AccentClassifier around the tiny random ECAPA; nothing is downloaded."""
+    encoder = TinyEncoder()
+    torch.manual_seed(0)
+    head = torch.nn.Linear(192, 7).eval()
+    monkeypatch.setattr(accent_classifier_hf, "get_accent_encoder", lambda: encoder)
+    monkeypatch.setattr(accent_classifier_hf, "get_accent_head", lambda *args: head)
+    monkeypatch.setattr(
+        accent_classifier_hf,
+        "get_accent_graph",
+        lambda *args: accent_backend.EagerGraph(encoder, head),
+    )
+    monkeypatch.setattr(accent_classifier_hf, "get_accent_batcher", lambda run: None)
+    return AccentClassifier()
+
+
+def test_predict_batch_matches_predict_on_mixed_lengths(classifier):
+    rng = np.random.default_rng(0)
+    # Under one second, a few seconds, and over the 10 second cap (twice)
+    seconds = [0.5, 2.0, 3.5, 12.0, 2.0, 15.0]
+    audios = [rng.normal(0, 0.1, int(s * 16000)).astype(np.float32) for s in seconds]
+
+    batched = classifier.predict_batch(audios, sr=16000, batch_size=4)
+    assert len(batched) == len(audios)
+    for audio, (accent, confidence, scores) in zip(audios, batched):
+        expected_accent, expected_confidence, expected_scores = classifier.predict(
+            audio, 16000
+        )
+        assert confidence == pytest.approx(expected_confidence, abs=0.02)
+        assert scores == pytest.approx(expected_scores, abs=0.02)
+        assert accent == expected_accent
+
+
+def test_window_starts_cover_the_tail():
+    assert accent_classifier_hf.window_starts(9000, 16000, 8000) == [0]
+    # The last window is aligned to the end instead of running past it
+    assert accent_classifier_hf.window_starts(35000, 16000, 8000) == [
+        0,
+        8000,
+        16000,
+        19000,
+    ]
+
+
+def test_windows_span_the_whole_recording_up_to_the_cap(classifier):
+    audio = np.random.default_rng(0).normal(0, 0.1, 60 * 16000).astype(np.float32)
+
+    spans, embeddings = classifier.embed_windows(audio, 16000)
+    # 10 s windows every 5 s over 60 s of sound
+    assert len(spans) == 11 and embeddings.shape == (11, 192)
+    assert spans[0][0] == 0.0 and spans[-1][1] == 60.0
+
+    spans, embeddings = classifier.embed_windows(audio, 16000, max_windows=4)
+    assert spans == [(0.0, 10.0), (15.0, 25.0), (35.0, 45.0), (50.0, 60.0)]
+    assert embeddings.shape == (4, 192)
+
+
+def test_window_posteriors_are_averaged(classifier):
+    embeddings = np.random.default_rng(0).normal(size=(3, 192)).astype(np.float32)
+    spans = [(0.0, 10.0), (5.0, 15.0), (10.0, 20.0)]
+
+    accent, confidence, scores, timeline = classifier.classify_windows(
+        spans, embeddings
+    )
+    expected = classifier._decide(classifier._posteriors(embeddings).mean(axis=0))
+    assert (accent, confidence, scores) == expected
+    assert [(entry["start"], entry["end"]) for entry in timeline] == spans
@@ -0,0 +1,88 @@
+import os
+import sys
+import shutil
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core import audio_downloader
+from core.audio_downloader import fetch_audio, process_video_url, spooled_audio
+from core.spool import AudioSpool
+
+requires_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None, reason="ffmpeg is not installed"
+)
+
+
+def write_tone(path, seconds=1.0, sr=16000, freq=220.0):
+    t = np.arange(int(seconds * sr)) / sr
+    samples = (0.5 * np.sin(2 * np.pi * freq * t) * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sr)
+        wav.writeframes(samples.tobytes())
+    return samples.astype(np.float32) / 32768.0
+
+
+@requires_ffmpeg
+def test_fetch_audio_local_path(tmp_path):
+    expected = write_tone(tmp_path / "tone.wav")
+    audio = fetch_audio(str(tmp_path / "tone.wav"))
+    assert audio.dtype == np.float32
+    assert np.allclose(audio, expected, atol=1e-4)
+
+
+@requires_ffmpeg
+def test_fetch_audio_file_url_resamples(tmp_path):
+    write_tone(tmp_path / "tone.wav", seconds=2.0, sr=44100)
+    audio = fetch_audio((tmp_path / "tone.wav").as_uri())
+    assert abs(len(audio) - 32000) <= 16
+
+
+def test_synthetic_speech_fixture_is_deterministic(tmp_path):
+    from benchmarks.fixtures import synth_speech, write_wav
+
+    audio = synth_speech(3.0)
+    assert audio.dtype == np.float32 and len(audio) == 48000
+    assert np.abs(audio).max() <= 1.0
+    assert np.array_equal(audio, synth_speech(3.0))
+
+    write_wav(str(tmp_path / "speech.wav"), audio)
+    with wave.open(str(tmp_path / "speech.wav")) as wav:
+        assert (wav.getframerate(), wav.getnframes()) == (16000, 48000)
+
+
+@requires_ffmpeg
+def test_process_video_url_persists_only_when_asked(tmp_path, monkeypatch):
+    spool = AudioSpool(str(tmp_path / "spool"), max_bytes=10**7, ttl_seconds=3600)
+    monkeypatch.setattr("core.spool.get_spool", lambda: spool)
+    expected = write_tone(tmp_path / "tone.wav")
+
+    audio = process_video_url(str(tmp_path / "tone.wav"), persist=False)
+    assert np.allclose(audio, expected, atol=1e-4)
+    assert spool.stats()["files"] == 0
+
+    path = process_video_url(str(tmp_path / "tone.wav"))
+    assert os.path.dirname(path) == spool.directory
+    assert np.allclose(audio_downloader.decode_audio(path), expected, atol=1e-4)
+
+
+@requires_ffmpeg
+def test_spooled_audio_is_leased_for_the_block(tmp_path, monkeypatch):
+    spool = AudioSpool(str(tmp_path / "spool"), max_bytes=1, ttl_seconds=0)
+    monkeypatch.setattr("core.spool.get_spool", lambda: spool)
+    write_tone(tmp_path / "tone.wav")
+
+    with spooled_audio(str(tmp_path / "tone.wav")) as path:
+        # Over budget and past the TTL, but held
+        assert spool.evict() == {"expired": 0, "lru": 0, "orphaned": 0}
+        assert spool.stats()["leased_files"] == 1
+        assert os.path.exists(path)
+
+    assert spool.evict()["expired"] == 1
+    assert not os.path.exists(path)
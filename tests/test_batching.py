@@ -0,0 +1,61 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.batching import MicroBatcher
+
+
+class Recorder:
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, items):
+        with self.lock:
+            self.batches.append(list(items))
+        return [item * 2 for item in items]
+
+
+def test_concurrent_requests_share_batches_and_get_own_results():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=4, max_wait_ms=200, replicas=1)
+    start = threading.Barrier(10)
+
+    def request(item):
+        start.wait()
+        return batcher.submit(item).result(timeout=5)
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = list(pool.map(request, range(10)))
+    batcher.close()
+
+    assert results == [item * 2 for item in range(10)]
+    assert all(len(batch) <= 4 for batch in recorder.batches)
+    assert len(recorder.batches) < 10
+    stats = batcher.stats()
+    assert stats["items"] == 10 and stats["batches"] == len(recorder.batches)
+
+
+def test_lone_request_waits_at_most_max_wait():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=8, max_wait_ms=10, replicas=2)
+    assert batcher.map([21]) == [42]
+    assert batcher.map([1, 2, 3]) == [2, 4, 6]
+    batcher.close()
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    def fail(items):
+        raise ValueError("encoder failed")
+
+    batcher = MicroBatcher(fail, max_batch_size=4, max_wait_ms=50, replicas=1)
+    futures = [batcher.submit(item) for item in range(3)]
+    for future in futures:
+        with pytest.raises(ValueError, match="encoder failed"):
+            future.result(timeout=5)
+    batcher.close()
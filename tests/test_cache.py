@@ -0,0 +1,68 @@
+import os
+import sys
+import sqlite3
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core import cache as cache_module
+from core.cache import DiskCache, audio_hash
+
+
+def test_cache_round_trip_and_counters(tmp_path):
+    cache = DiskCache(str(tmp_path / "tier.sqlite"), max_bytes=1024**2)
+    audio = np.linspace(-1, 1, 1600, dtype=np.float32)
+
+    assert cache.get("missing") is None
+    cache.set("clip", audio)
+    assert np.array_equal(cache.get("clip"), audio)
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path / "tier.sqlite"), max_bytes=3000)
+    for key in ("a", "b"):
+        cache.set(key, b"x" * 1000)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", b"x" * 1000)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_reads_do_not_wait_for_a_writer(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "TOUCH_INTERVAL", 3600)
+    cache = DiskCache(str(tmp_path / "tier.sqlite"), max_bytes=1024**2)
+    cache.set("clip", b"x" * 100)
+
+    writer = sqlite3.connect(str(tmp_path / "tier.sqlite"), isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        # Would block on the write lock if get() wrote anything
+        assert cache.get("clip") == b"x" * 100
+        assert cache.get("missing") is None
+    finally:
+        writer.execute("ROLLBACK")
+
+    stats = cache.stats()  # Writes the deferred counts
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_oversized_entries_are_not_stored(tmp_path):
+    cache = DiskCache(str(tmp_path / "tier.sqlite"), 1024**2, max_entry_bytes=500)
+    cache.set("big", b"x" * 1000)
+    cache.set("small", b"x" * 100)
+    assert cache.get("big") is None
+    assert cache.get("small") is not None
+
+
+def test_audio_hash_is_content_based():
+    audio = np.zeros(100, dtype=np.float32)
+    assert audio_hash(audio) == audio_hash(audio.copy())
+    assert audio_hash(audio) != audio_hash(audio + 0.1)
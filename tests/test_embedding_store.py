@@ -0,0 +1,72 @@
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("filelock")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.embedding_store import EmbeddingStore, embedding_key, head_weights
+
+
+def test_append_is_idempotent_and_memory_mapped(tmp_path):
+    store = EmbeddingStore(str(tmp_path), dim=4)
+    assert store.append("a", [1, 0, 0, 0]) == 0
+    assert store.append("b", [0, 1, 0, 0]) == 1
+    assert store.append("a", [9, 9, 9, 9]) == 0
+
+    reopened = EmbeddingStore(str(tmp_path), dim=4)
+    assert reopened.keys() == ["a", "b"]
+    assert np.array_equal(reopened.get("b"), [0, 1, 0, 0])
+    assert isinstance(reopened.matrix(), np.memmap)
+
+
+def test_rescore_matches_per_row_softmax(tmp_path):
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(10, 4)).astype(np.float32)
+    store = EmbeddingStore(str(tmp_path), dim=4)
+    for i, embedding in enumerate(embeddings):
+        store.append(f"clip{i}", embedding)
+
+    weight = rng.normal(size=(3, 4)).astype(np.float32)
+    bias = np.zeros(3, dtype=np.float32)
+    labels = {0: "US", 1: "UK", 2: "India"}
+    scored = store.rescore(weight, bias, labels, confidence_threshold=0.0, chunk_rows=3)
+
+    logits = embeddings @ weight.T
+    expected = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+    assert np.allclose(scored["probs"], expected, atol=1e-6)
+    assert list(scored["accent"]) == [labels[i] for i in expected.argmax(axis=1)]
+
+    strict = store.rescore(weight, bias, labels, confidence_threshold=1.0)
+    assert set(strict["accent"]) == {"Uncertain"}
+
+
+def test_rescore_one_configuration_with_a_saved_head(tmp_path):
+    store = EmbeddingStore(str(tmp_path), dim=2)
+    store.append(embedding_key("clip0", "ecapa", "vad-1"), [1, 0])
+    store.append(embedding_key("clip0", "ecapa:int8", "vad-1"), [0, 1])
+    store.append(embedding_key("clip1", "ecapa", "raw"), [0, 1])
+    store.append(embedding_key("clip1", "ecapa", "vad-1"), [0, 1])
+
+    weight, bias = head_weights(
+        {"weight": np.array([[5.0, 0.0], [0.0, 5.0]]), "bias": np.zeros(2)}
+    )
+    labels = {0: "US", 1: "UK"}
+    scored = store.rescore(
+        weight, bias, labels, 0.0, chunk_rows=1, config="ecapa|vad-1"
+    )
+    assert scored["keys"] == ["clip0|ecapa|vad-1", "clip1|ecapa|vad-1"]
+    assert list(scored["accent"]) == ["US", "UK"]
+
+
+def test_head_weights_from_a_saved_state_dict(tmp_path):
+    torch = pytest.importorskip("torch")
+    head = torch.nn.Linear(4, 3)
+    torch.save(head.state_dict(), tmp_path / "head.pt")
+
+    weight, bias = head_weights(str(tmp_path / "head.pt"))
+    assert np.array_equal(weight, head.weight.detach().numpy())
+    assert np.array_equal(bias, head.bias.detach().numpy())
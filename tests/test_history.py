@@ -0,0 +1,118 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.history import HistoryStore
+
+DAY = 86400
+
+
+def result(accent, confidence=80.0, language="en", audio_id="a" * 64):
+    return {
+        "accent": accent,
+        "confidence": confidence,
+        "language": language,
+        "language_score": 99.0,
+        "transcript": "hello",
+        "transcript_status": "done",
+        "audio_id": audio_id,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / "history.sqlite"))
+
+
+def test_keyset_pages_cover_every_row_once(store):
+    for i in range(25):
+        store.record(f"https://example.com/{i % 5}", result("UK" if i % 2 else "US"))
+
+    seen, cursor = [], None
+    while True:
+        page = store.query(limit=10, before=cursor, accent="UK")
+        seen += [row["id"] for row in page["rows"]]
+        cursor = page["next"]
+        if cursor is None:
+            break
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == 12
+
+    latest = store.latest(url="https://example.com/3")
+    assert latest["id"] == 24 and latest["result"]["transcript"] == "hello"
+    assert "result" not in store.query(limit=1)["rows"][0]
+    with pytest.raises(ValueError):
+        store.query(transcript="hello")
+
+
+def test_aggregates_come_from_the_daily_rollup(store):
+    start = 1_700_000_000
+    store.record("u1", result("UK", 90.0), created=start)
+    store.record("u2", result("UK", 70.0), created=start + 60)
+    store.record("u3", result("US", 60.0), created=start + DAY)
+    store.record("u4", result("Non-English or unclear", 0.0, "fr"), created=start)
+
+    distribution = store.accent_distribution(since=start + DAY)
+    assert distribution == [
+        {"day": "2023-11-15", "accent": "US", "analyses": 1, "mean_confidence": 60.0}
+    ]
+    uk = [row for row in store.accent_distribution() if row["accent"] == "UK"]
+    assert uk[0]["analyses"] == 2 and uk[0]["mean_confidence"] == 80.0
+
+    stats = store.stats()
+    assert stats["analyses"] == 4
+    assert stats["accents"]["UK"] == 2 and stats["languages"] == {"en": 3, "fr": 1}
+
+
+def test_filtered_pages_use_an_index(store):
+    db = store._connect()
+    for column in ("url", "audio_id", "accent", "language"):
+        plan = " ".join(
+            row[-1]
+            for row in db.execute(
+                f"EXPLAIN QUERY PLAN SELECT id FROM analyses WHERE {column} = ? "
+                "AND id < ? ORDER BY id DESC LIMIT 51",
+                ("x", 10),
+            )
+        )
+        assert f"analyses_{column}" in plan and "TEMP B-TREE" not in plan
+
+
+def test_update_result_replaces_a_deferred_transcript(store):
+    pending = {**result("UK"), "transcript": "", "transcript_status": "pending"}
+    row_id = store.record("u", pending, mode="deferred")
+    store.update_result(
+        row_id, {**pending, "transcript": "hi", "transcript_status": "done"}
+    )
+    record = store.get(row_id)
+    assert (
+        record["transcript_status"] == "done" and record["result"]["transcript"] == "hi"
+    )
+    assert record["mode"] == "deferred"
+
+
+def test_missing_language_rolls_up_into_one_row(store):
+    start = 1_700_000_000
+    for i in range(3):
+        store.record(f"u{i}", result("Uncertain", 30.0, language=None), created=start)
+
+    rows = store._connect().execute("SELECT * FROM daily").fetchall()
+    assert len(rows) == 1 and rows[0]["analyses"] == 3
+    assert store.stats()["languages"] == {None: 3}
+    assert store.accent_distribution()[0]["analyses"] == 3
+
+
+def test_failed_analyses_are_not_history(store):
+    store.record("u", result("UK"))
+    assert store.record("u", {**result("Error", 0.0), "error": "boom"}) is None
+    # As written by versions that stored failures
+    store._connect().execute(
+        "INSERT INTO analyses (created, url, accent, result) "
+        "VALUES (1e10, 'u', 'Error', '{}')"
+    )
+
+    assert store.latest(url="u")["accent"] == "UK"
+    assert store.stats()["accents"] == {"UK": 1}
@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core import jobs
+from core.history import HistoryStore
+
+
+def _init_stub(states, threads=None, shared=None):
+    # Stands in for _init_worker without loading any model
+    jobs._worker_states = states
+    states[f"worker:{os.getpid()}"] = True
+
+
+def _result(accent="UK", **extra):
+    return {
+        "accent": accent,
+        "confidence": 91.0,
+        "language": "en",
+        "language_score": 99.0,
+        "transcript": "hello",
+        "transcript_status": "done",
+        "summary": "",
+        "all_scores": {accent: 91.0},
+        "audio_id": "abc",
+        **extra,
+    }
+
+
+def _ok_job(job_id, video_url, mode="full"):
+    jobs._set_state(job_id, jobs.ANALYZING)
+    return _result()
+
+
+def _deferred_job(job_id, video_url, mode="full"):
+    # The transcript lands before the parent has finished the job
+    transcript = Future()
+    transcript.set_result({"text": "hello there"})
+    jobs._publish_transcript(job_id, transcript)
+    return _result(transcript="", transcript_status="pending")
+
+
+def _slow_job(job_id, video_url, mode="full"):
+    time.sleep(1)
+    return _result()
+
+
+def _error_result_job(job_id, video_url, mode="full"):
+    return _result("Error", error="encoder exploded")
+
+
+def _raising_job(job_id, video_url, mode="full"):
+    raise RuntimeError("download failed")
+
+
+@pytest.fixture
+def make_manager(tmp_path, monkeypatch):
+    history = HistoryStore(str(tmp_path / "history.sqlite"))
+    monkeypatch.setattr(jobs, "_init_worker", _init_stub)
+    monkeypatch.setattr(jobs, "_shared_models", lambda start_method: {})
+    monkeypatch.setattr(jobs, "get_history", lambda: history)
+    managers = []
+
+    def make(run_job, **kwargs):
+        monkeypatch.setattr(jobs, "_run_job", run_job)
+        manager = jobs.JobManager(max_workers=1, **kwargs)
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.shutdown()
+
+
+def wait_until_finished(manager, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.status(job_id)
+        if job["state"] in (jobs.DONE, jobs.FAILED):
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(f"Job {job_id} did not finish")
+
+
+def test_submit_and_status(make_manager):
+    manager = make_manager(_ok_job)
+    assert manager.stats()["started"] is False
+
+    job_id = manager.submit("file:///clip.wav", mode="accent_only")
+    job = wait_until_finished(manager, job_id)
+
+    assert job["state"] == jobs.DONE
+    assert job["url"] == "file:///clip.wav" and job["mode"] == "accent_only"
+    assert job["result"]["accent"] == "UK"
+    assert manager.stats()["jobs"][jobs.DONE] == 1
+    assert jobs.get_history().latest(url="file:///clip.wav")["accent"] == "UK"
+    with pytest.raises(KeyError):
+        manager.status("unknown")
+
+
+def test_submit_does_not_wait_for_the_models(make_manager, monkeypatch):
+    loaded = threading.Event()
+
+    def load_slowly(start_method):
+        loaded.wait(30)
+        return {}
+
+    monkeypatch.setattr(jobs, "_shared_models", load_slowly)
+    manager = make_manager(_ok_job)
+    manager.start()
+
+    job_id = manager.submit("https://example.com/a.mp4")
+    assert manager.stats()["loading"] is True
+    assert manager.status(job_id)["state"] == jobs.QUEUED
+
+    loaded.set()
+    assert wait_until_finished(manager, job_id)["state"] == jobs.DONE
+    assert manager.stats()["loading"] is False
+
+
+def test_full_queue_rejects_submissions(make_manager):
+    manager = make_manager(_slow_job, max_pending=1)
+    job_id = manager.submit("https://example.com/a.mp4")
+    with pytest.raises(jobs.QueueFullError):
+        manager.submit("https://example.com/b.mp4")
+
+    wait_until_finished(manager, job_id)
+    manager.submit("https://example.com/c.mp4")
+
+
+def test_deferred_transcript_survives_finish(make_manager):
+    manager = make_manager(_deferred_job)
+    job_id = manager.submit("https://example.com/a.mp4", mode="deferred")
+    job = wait_until_finished(manager, job_id)
+
+    assert job["result"]["transcript"] == "hello there"
+    assert job["result"]["transcript_status"] == "done"
+    assert manager.stats()["jobs"][jobs.DONE] == 1
+    stored = jobs.get_history().latest(url="https://example.com/a.mp4")
+    assert stored["result"]["transcript"] == "hello there"
+
+
+@pytest.mark.parametrize(
+    "run_job, error",
+    [(_raising_job, "download failed"), (_error_result_job, "encoder exploded")],
+)
+def test_failed_jobs(make_manager, run_job, error):
+    manager = make_manager(run_job)
+    job = wait_until_finished(manager, manager.submit("https://example.com/a.mp4"))
+
+    assert job["state"] == jobs.FAILED
+    assert job["error"] == error
+    assert job["result"] is None
+    assert jobs.get_history().stats()["analyses"] == 0
@@ -0,0 +1,79 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+pytest.importorskip("streamlit", reason="the app tests need requirements.txt")
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY_MODULES = ("torch", "whisper", "speechbrain", "pandas", "plotly")
+
+
+def test_importing_the_app_loads_no_heavy_modules():
+    # A fresh interpreter, so modules imported by other tests do not count.
+    # Streamlit itself imports plotly when it is installed, so only what the
+    # app adds on top counts; the model downloads and workers are not started.
+    script = (
+        "import sys\n"
+        f"sys.path[:0] = [{os.path.join(ROOT, 'app')!r}, {ROOT!r}]\n"
+        "import streamlit, model_downloader, routes\n"
+        "model_downloader.download_models = lambda models: None\n"
+        "routes.start_workers = lambda: None\n"
+        "before = set(sys.modules)\n"
+        "import main\n"
+        "added = set(sys.modules) - before\n"
+        f"print('heavy:', [m for m in {HEAVY_MODULES!r} if m in added])\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "heavy: []" in result.stdout.splitlines()
+
+
+def test_a_reused_result_renders_its_report(tmp_path, monkeypatch):
+    from streamlit.testing.v1 import AppTest
+
+    monkeypatch.syspath_prepend(os.path.join(ROOT, "app"))
+    monkeypatch.syspath_prepend(ROOT)
+    import model_downloader
+    import routes
+    from core import history
+    from core.history import HistoryStore
+
+    url = "https://example.com/talk.mp4"
+    store = HistoryStore(str(tmp_path / "history.sqlite"))
+    store.record(
+        url,
+        {
+            "accent": "UK",
+            "confidence": 91.0,
+            "language": "en",
+            "language_score": 99.0,
+            "transcript": "hello",
+            "summary": "A British speaker.",
+            "all_scores": {"UK": 91.0, "US": 9.0},
+            "audio_id": "abc",
+        },
+    )
+    monkeypatch.setattr(history, "_history", store)
+    monkeypatch.setattr(model_downloader, "download_models", lambda models: None)
+    monkeypatch.setattr(routes, "start_workers", lambda: None)
+
+    app = AppTest.from_file(os.path.join(ROOT, "app", "main.py"), default_timeout=60)
+    app.run()
+    app.text_input[0].input(url)
+    app.checkbox[0].check()
+    app.button[0].click()
+    app.run()
+
+    assert not app.exception
+    assert app.info[0].value.startswith("Stored result from")
+    assert any("UK" in markdown.value for markdown in app.markdown)
+    assert app.get("download_button")
@@ -0,0 +1,51 @@
+import os
+import sys
+import multiprocessing
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.memory import memory_report, process_memory
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists("/proc/self/smaps_rollup"), reason="needs Linux smaps_rollup"
+)
+
+# Stands in for model weights loaded before the workers fork
+WEIGHTS = None
+
+
+def _child_memory(queue):
+    float(WEIGHTS.sum())  # Read every page, as inference would
+    queue.put(process_memory(os.getpid()))
+
+
+def test_process_memory_fields():
+    memory = process_memory(os.getpid())
+    assert memory["rss_mb"] > 0
+    assert memory["unique_mb"] + memory["shared_mb"] == pytest.approx(
+        memory["rss_mb"], abs=0.5
+    )
+
+
+def test_forked_worker_shares_parent_pages():
+    global WEIGHTS
+    WEIGHTS = np.ones(64 * 1024**2 // 8)
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    child = context.Process(target=_child_memory, args=(queue,))
+    child.start()
+    memory = queue.get(timeout=30)
+    child.join()
+    WEIGHTS = None
+
+    assert memory["shared_mb"] >= 60
+    assert memory["unique_mb"] < memory["shared_mb"]
+
+
+def test_report_totals_skip_unreadable_processes():
+    report = memory_report({"self": os.getpid(), "gone": 2**22 + 1})
+    assert "error" in report["processes"]["gone"]
+    assert report["total_pss_mb"] == report["processes"]["self"]["pss_mb"]
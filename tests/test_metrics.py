@@ -0,0 +1,48 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import core.metrics
+from core.metrics import MetricsRegistry, stage, write_prometheus
+
+
+def test_stage_records_wall_and_cpu_time():
+    timings = {}
+    with stage("unit_test_stage", timings):
+        sum(range(1000))
+    assert set(timings["unit_test_stage"]) == {"wall_s", "cpu_s"}
+
+
+def test_prometheus_rendering(tmp_path):
+    registry = MetricsRegistry()
+    registry.inc("accent_analyses_total", outcome="ok")
+    registry.observe("accent_stage_wall_seconds", 0.3, stage="transcription")
+    registry.set("accent_spool_bytes", 2048)
+
+    text = registry.render()
+    assert 'accent_analyses_total{outcome="ok"} 1' in text
+    assert "# TYPE accent_stage_wall_seconds histogram" in text
+    assert "# TYPE accent_spool_bytes gauge" in text
+    assert "accent_spool_bytes 2048" in text
+    assert 'accent_stage_wall_seconds_bucket{stage="transcription",le="0.25"} 0' in text
+    assert 'accent_stage_wall_seconds_bucket{stage="transcription",le="0.5"} 1' in text
+    assert 'accent_stage_wall_seconds_count{stage="transcription"} 1' in text
+
+    path = write_prometheus(str(tmp_path / "accent.prom"))
+    assert os.path.exists(path)
+
+
+def test_process_files_are_labelled_and_stale_ones_removed(tmp_path, monkeypatch):
+    monkeypatch.setattr(core.metrics, "METRICS_DIR", str(tmp_path))
+    monkeypatch.setattr(core.metrics, "_claimed_pid", None)
+    monkeypatch.setattr(core.metrics.atexit, "register", lambda *args: None)
+    core.metrics.metrics.inc("accent_analyses_total", outcome="ok")
+    # Left behind by a worker that has exited
+    (tmp_path / f"accent_{2**22 + 1}.prom").write_text("stale\n")
+
+    path = write_prometheus()
+
+    assert os.listdir(tmp_path) == [f"accent_{os.getpid()}.prom"]
+    text = open(path).read()
+    assert f'accent_analyses_total{{pid="{os.getpid()}",outcome="ok"}}' in text
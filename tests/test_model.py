@@ -0,0 +1,110 @@
+import os
+import sys
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services import model_registry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """An empty model registry, so tests never see each other's models."""
+    monkeypatch.setattr(model_registry, "_models", {})
+    monkeypatch.setattr(model_registry, "_warm", set())
+    monkeypatch.setattr(model_registry, "_load_seconds", {})
+    monkeypatch.setattr(model_registry, "_load_events", [])
+    return model_registry
+
+
+def test_registry_loads_each_model_once(registry):
+    loads = []
+    barrier = threading.Barrier(8)
+
+    def loader():
+        loads.append(1)
+        return object()
+
+    def get():
+        barrier.wait()
+        return registry.get_model("tiny", loader)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == [1]
+    assert len({id(model) for model in results}) == 1
+    assert registry.get_model("tiny", loader) is results[0]
+    assert [name for name, _ in registry.load_events()] == ["tiny"]
+    assert registry.load_events(since=1) == []
+
+
+def test_warmup_reports_readiness(registry, monkeypatch):
+    runs = []
+    monkeypatch.setattr(registry, "get_whisper_model", lambda size: "whisper")
+    monkeypatch.setattr(
+        registry,
+        "get_accent_encoder",
+        lambda: registry.get_model(registry.encoder_key(), lambda: "ecapa"),
+    )
+    monkeypatch.setattr(registry, "_warmup_whisper", lambda model: runs.append(model))
+
+    def failing_warmup(model):
+        raise RuntimeError("out of memory")
+
+    monkeypatch.setattr(registry, "_warmup_encoder", failing_warmup)
+    report = registry.warmup()
+    assert report["ready"] is False
+    encoder = report["models"][registry.encoder_key()]
+    assert encoder["loaded"] is True and encoder["warm"] is False
+
+    monkeypatch.setattr(registry, "_warmup_encoder", lambda model: runs.append(model))
+    assert registry.warmup()["ready"] is True
+    # Whisper was already warm and is not run again
+    assert runs == ["whisper", "ecapa"]
+
+
+def _head_scores(embeddings):
+    import torch
+    from services.model_registry import get_accent_head
+
+    with torch.no_grad():
+        return get_accent_head()(torch.as_tensor(embeddings)).numpy()
+
+
+def _scores_in_new_worker(embeddings):
+    # A fresh process each time, like separate job and batch workers
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(_head_scores, embeddings).result()
+
+
+def test_workers_score_with_the_same_head(tmp_path, monkeypatch):
+    pytest.importorskip("torch")
+    monkeypatch.setenv("ACCENT_HEAD_PATH", str(tmp_path / "no_head.pt"))
+    embeddings = np.random.default_rng(0).normal(size=(4, 192)).astype(np.float32)
+
+    first = _scores_in_new_worker(embeddings)
+    second = _scores_in_new_worker(embeddings)
+    assert np.array_equal(first, second)
+
+
+def test_saved_head_is_loaded(tmp_path, monkeypatch):
+    torch = pytest.importorskip("torch")
+    head = torch.nn.Linear(192, 7)
+    torch.nn.init.zeros_(head.weight)
+    torch.nn.init.constant_(head.bias, 0.5)
+    torch.save(head.state_dict(), tmp_path / "accent_head.pt")
+    monkeypatch.setenv("ACCENT_HEAD_PATH", str(tmp_path / "accent_head.pt"))
+
+    scores = _scores_in_new_worker(np.ones((2, 192), dtype=np.float32))
+    assert np.allclose(scores, 0.5)
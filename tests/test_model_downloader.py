@@ -0,0 +1,176 @@
+import os
+import sys
+import json
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("filelock")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.model_downloader import CHUNK_SIZE, download_model_if_needed, download_models
+
+PAYLOAD = os.urandom(3 * 1024 * 1024 + 123)
+PAYLOAD_SHA256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class ModelServer(BaseHTTPRequestHandler):
+    """Serves PAYLOAD with Range support, like a CDN for model checkpoints."""
+
+    requests_seen = []
+    drop_after = None  # Close the first response after this many bytes
+
+    def do_GET(self):
+        range_header = self.headers.get("Range")
+        type(self).requests_seen.append(range_header)
+        start = 0
+        if range_header:
+            start = int(range_header.split("=")[1].split("-")[0])
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}"
+            )
+        else:
+            self.send_response(200)
+        body = PAYLOAD[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        drop_after = type(self).drop_after
+        if drop_after is not None:
+            type(self).drop_after = None
+            self.wfile.write(body[:drop_after])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        type(self).requests_seen.append("HEAD")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    ModelServer.requests_seen = []
+    ModelServer.drop_after = None
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ModelServer)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/model.ckpt"
+    httpd.shutdown()
+
+
+def test_download_verifies_and_renames_atomically(server, tmp_path):
+    model_path = str(tmp_path / "models" / "model.ckpt")
+    manifest = str(tmp_path / "manifest.json")
+
+    assert download_model_if_needed(
+        model_path, server, sha256=PAYLOAD_SHA256, manifest_path=manifest
+    )
+    assert open(model_path, "rb").read() == PAYLOAD
+    assert not os.path.exists(model_path + ".part")
+
+    # Present and intact: no second request
+    assert not download_model_if_needed(
+        model_path, server, sha256=PAYLOAD_SHA256, manifest_path=manifest
+    )
+    assert len(ModelServer.requests_seen) == 1
+
+
+def test_download_resumes_partial_file_with_range(server, tmp_path):
+    model_path = str(tmp_path / "model.ckpt")
+    with open(model_path + ".part", "wb") as f:
+        f.write(PAYLOAD[:1000000])
+
+    assert download_model_if_needed(
+        model_path,
+        server,
+        sha256=PAYLOAD_SHA256,
+        manifest_path=str(tmp_path / "manifest.json"),
+    )
+    assert ModelServer.requests_seen == ["bytes=1000000-"]
+    assert open(model_path, "rb").read() == PAYLOAD
+
+
+def test_dropped_connection_is_resumed(server, tmp_path):
+    # Whole chunks that reached disk before the drop are kept
+    ModelServer.drop_after = CHUNK_SIZE + 500000
+    model_path = str(tmp_path / "model.ckpt")
+
+    assert download_model_if_needed(
+        model_path,
+        server,
+        sha256=PAYLOAD_SHA256,
+        manifest_path=str(tmp_path / "manifest.json"),
+    )
+    assert ModelServer.requests_seen == [None, f"bytes={CHUNK_SIZE}-"]
+    assert open(model_path, "rb").read() == PAYLOAD
+
+
+def test_checksum_mismatch_leaves_no_model(server, tmp_path):
+    model_path = str(tmp_path / "model.ckpt")
+
+    assert not download_model_if_needed(
+        model_path,
+        server,
+        sha256="0" * 64,
+        manifest_path=str(tmp_path / "manifest.json"),
+    )
+    assert not os.path.exists(model_path)
+    assert not os.path.exists(model_path + ".part")
+
+
+def test_parallel_downloads_record_manifest(server, tmp_path):
+    manifest = str(tmp_path / "manifest.json")
+    models = [
+        {"path": str(tmp_path / name / "model.ckpt"), "url": server}
+        for name in ("a", "b", "c")
+    ]
+
+    results = download_models(models, max_workers=3, manifest_path=manifest)
+    assert all(results.values())
+    for model in models:
+        assert open(model["path"], "rb").read() == PAYLOAD
+
+    recorded = json.load(open(manifest))
+    assert len(recorded) == 3
+    for entry in recorded.values():
+        assert entry == {"sha256": PAYLOAD_SHA256, "size": len(PAYLOAD)}
+
+
+def test_truncated_model_without_checksum_is_downloaded_again(server, tmp_path):
+    model_path = str(tmp_path / "model.ckpt")
+    with open(model_path, "wb") as f:
+        f.write(PAYLOAD[:1000])
+
+    # No checksum anywhere: the size the server reports gives it away
+    assert download_model_if_needed(
+        model_path, server, manifest_path=str(tmp_path / "manifest.json")
+    )
+    assert ModelServer.requests_seen == ["HEAD", None]
+    assert open(model_path, "rb").read() == PAYLOAD
+
+
+def test_legacy_manifest_entry_is_still_verified(server, tmp_path):
+    model_path = str(tmp_path / "model.ckpt")
+    manifest = str(tmp_path / "manifest.json")
+    with open(model_path, "wb") as f:
+        f.write(PAYLOAD)
+    with open(manifest, "w") as f:
+        json.dump({model_path: PAYLOAD_SHA256}, f)
+
+    # A bare digest entry is enough, so the server is never asked
+    assert not download_model_if_needed(model_path, server, manifest_path=manifest)
+    assert ModelServer.requests_seen == []
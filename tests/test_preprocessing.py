@@ -0,0 +1,68 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+librosa = pytest.importorskip("librosa")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services import preprocessing
+from services.preprocessing import preprocess_batch, trim_bounds, unpad
+
+
+def librosa_preprocess(audio, sr, max_samples=160000):
+    # The per-clip pipeline the batch engine replaces
+    if len(audio.shape) > 1:
+        audio = librosa.to_mono(audio)
+    if sr != 16000:
+        audio = librosa.resample(audio, orig_sr=sr, target_sr=16000)
+    audio = librosa.util.normalize(audio)
+    audio = librosa.effects.preemphasis(audio)
+    audio, _ = librosa.effects.trim(audio, top_db=20)
+    if len(audio) < 16000:
+        audio = np.pad(audio, (0, 16000 - len(audio)))
+    if max_samples is not None and len(audio) > max_samples:
+        audio = audio[:max_samples]
+    return audio
+
+
+def tone_with_silence(seconds, sr, seed):
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sr)
+    audio = 0.3 * np.sin(2 * np.pi * 220 * np.arange(n) / sr) * (0.2 + rng.random())
+    audio[: n // 5] *= 1e-3
+    audio[-n // 4 :] *= 5e-4
+    return (audio + rng.normal(0, 1e-4, n)).astype(np.float32)
+
+
+@pytest.mark.parametrize("sr", [16000, 44100, 8000])
+@pytest.mark.parametrize("max_samples", [160000, None])
+def test_batch_matches_librosa_per_clip(sr, max_samples):
+    clips = [tone_with_silence(s, sr, seed) for seed, s in enumerate([0.5, 3.2, 13])]
+    clips.append(np.stack([clips[1], clips[1] * 0.5]))  # Stereo
+    clips.append(np.zeros(sr, dtype=np.float32))  # Silence
+
+    batch, lengths = preprocess_batch(clips, sr, max_samples)
+    assert batch.dtype == np.float32 and batch.shape == (len(clips), max(lengths))
+
+    for clip, processed in zip(clips, unpad(batch, lengths)):
+        expected = librosa_preprocess(clip, sr, max_samples)
+        assert len(processed) == len(expected)
+        np.testing.assert_allclose(processed, expected, atol=1e-5)
+    # Padding after each clip stays zero
+    for row, length in enumerate(lengths):
+        assert not batch[row, length:].any()
+
+
+def test_trim_bounds_do_not_depend_on_the_block_size(monkeypatch):
+    clips = [tone_with_silence(s, 16000, seed) for seed, s in enumerate([0.7, 4, 9])]
+    batch, lengths = preprocess_batch(clips, 16000, max_samples=None)
+    expected = trim_bounds(batch, lengths)
+
+    # A few frames per block, so frames straddle block edges
+    monkeypatch.setattr(preprocessing, "TRIM_BLOCK", 3 * 512 * len(clips))
+    starts, ends = trim_bounds(batch, lengths)
+    np.testing.assert_array_equal(starts, expected[0])
+    np.testing.assert_array_equal(ends, expected[1])
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.progressive import RunningPosterior
+
+
+def test_clear_window_stops_at_once():
+    posterior = RunningPosterior(min_confidence=0.8, min_margin=0.5)
+    posterior.update([0.9, 0.05, 0.05])
+    assert posterior.stop_reason() == "confident"
+    assert posterior.windows == 1
+
+
+def test_margin_settles_before_confidence():
+    posterior = RunningPosterior(min_confidence=0.95, min_margin=0.3)
+    posterior.update([0.6, 0.4, 0.0])
+    assert posterior.stop_reason() is None
+
+    posterior.update([0.8, 0.1, 0.1])
+    # Mean is [0.7, 0.25, 0.05]: below 0.95, but 0.45 ahead
+    assert np.allclose(posterior.mean, [0.7, 0.25, 0.05])
+    assert posterior.stop_reason() == "confident"
+
+
+def test_min_windows_and_time_budget():
+    posterior = RunningPosterior(min_confidence=0.5, min_windows=2)
+    posterior.update([1.0, 0.0])
+    assert posterior.stop_reason() is None
+    posterior.update([1.0, 0.0])
+    assert posterior.stop_reason() == "confident"
+
+    posterior = RunningPosterior(min_confidence=1.1, min_margin=1.1, time_budget=0)
+    posterior.update([0.5, 0.5])
+    assert posterior.stop_reason() == "time_budget"
+
+    posterior = RunningPosterior(min_confidence=1.1, min_margin=1.1, time_budget=None)
+    for _ in range(50):
+        posterior.update([0.5, 0.5])
+    assert posterior.stop_reason() is None
+
+
+def test_full_run_matches_the_windowed_mean():
+    probs = np.random.default_rng(0).dirichlet(np.ones(7), size=5)
+    posterior = RunningPosterior(min_confidence=1.1, min_margin=1.1, time_budget=None)
+    for row in probs:
+        posterior.update(row)
+    assert np.allclose(posterior.mean, probs.mean(axis=0))
@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services import quantization
+
+
+class CastingLinear(torch.nn.Linear):
+    # Same shape as Whisper's Linear, which dynamic quantization skips
+    def forward(self, x):
+        return torch.nn.functional.linear(x, self.weight.to(x.dtype), self.bias)
+
+
+def small_model():
+    torch.manual_seed(0)
+    return torch.nn.Sequential(
+        CastingLinear(64, 128), torch.nn.ReLU(), torch.nn.Linear(128, 8)
+    ).eval()
+
+
+def test_quantize_int8_swaps_linear_subclasses():
+    x = torch.randn(4, 64)
+    expected = small_model()(x)
+
+    model = quantization.quantize_int8(small_model())
+    quantized = [
+        m
+        for m in model.modules()
+        if isinstance(m, torch.ao.nn.quantized.dynamic.Linear)
+    ]
+    assert len(quantized) == 2
+    assert torch.allclose(model(x), expected, atol=0.05)
+    assert quantization.model_bytes(model) < quantization.model_bytes(small_model())
+
+
+def test_model_without_linear_layers_is_not_quantized(tmp_path, monkeypatch):
+    # Like ECAPA-TDNN, which is built from Conv1d layers
+    monkeypatch.setattr(quantization, "QUANTIZED_DIR", str(tmp_path))
+    convs = torch.nn.Sequential(torch.nn.Conv1d(8, 8, 3), torch.nn.ReLU())
+
+    with pytest.raises(ValueError):
+        quantization.load_or_quantize("convs", lambda: convs)
+    assert not os.listdir(tmp_path)
+
+
+def test_load_or_quantize_caches_on_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(quantization, "QUANTIZED_DIR", str(tmp_path))
+    builds = []
+
+    def build():
+        builds.append(1)
+        return small_model()
+
+    first = quantization.load_or_quantize("tiny", build)
+    second = quantization.load_or_quantize("tiny", build)
+
+    assert builds == [1]
+    assert os.path.exists(quantization.quantized_path("tiny"))
+    x = torch.randn(2, 64)
+    assert torch.equal(first(x), second(x))
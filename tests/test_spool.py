@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.spool import AudioSpool
+
+
+def write_file(directory, name, size):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    return path
+
+
+def test_add_moves_file_and_evicts_least_recently_used(tmp_path):
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    spool = AudioSpool(str(tmp_path / "spool"), max_bytes=2500, ttl_seconds=3600)
+
+    first = spool.add(write_file(incoming, "a.wav", 1000))
+    second = spool.add(write_file(incoming, "b.wav", 1000))
+    assert not os.listdir(incoming)
+    assert first.endswith(".wav") and os.path.exists(first)
+
+    # Using the first file makes the second the least recently used
+    with spool.lease(first):
+        pass
+    third = spool.add(write_file(incoming, "c.wav", 1000))
+
+    assert os.path.exists(first) and os.path.exists(third)
+    assert not os.path.exists(second)
+    stats = spool.stats()
+    assert stats["files"] == 2 and stats["bytes"] == 2000
+    assert stats["added"] == 3 and stats["evicted_lru"] == 1
+
+
+def test_leased_files_survive_ttl_and_budget(tmp_path):
+    spool = AudioSpool(str(tmp_path / "spool"), max_bytes=100, ttl_seconds=0.01)
+    path = spool.add(write_file(tmp_path, "a.wav", 500), suffix=".wav")
+
+    with spool.lease(path) as leased:
+        time.sleep(0.05)
+        assert spool.evict() == {"expired": 0, "lru": 0, "orphaned": 0}
+        assert spool.remove(leased) is False
+        assert spool.stats()["leased_bytes"] == 500
+        assert os.path.exists(leased)
+
+    assert spool.evict()["expired"] == 1
+    assert not os.path.exists(path)
+
+
+def test_janitor_removes_orphans_and_dead_leases(tmp_path):
+    spool = AudioSpool(str(tmp_path / "spool"), max_bytes=10**6, ttl_seconds=3600)
+    path = spool.add(write_file(tmp_path, "a.wav", 10))
+    with spool._transaction() as db:
+        # A lease left behind by a worker that crashed
+        db.execute(
+            "INSERT INTO leases (name, pid) VALUES (?, ?)",
+            (os.path.basename(path), 2**22 + 1),
+        )
+    orphan = write_file(spool.directory, "left-behind.wav.part", 10)
+    os.utime(orphan, (0, 0))
+
+    assert spool.evict()["orphaned"] == 1
+    assert not os.path.exists(orphan)
+    assert spool.stats()["leased_files"] == 0
+    assert spool.remove(path) is True
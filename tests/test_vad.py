@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.fixtures import synth_speech
+from core.vad import SpeechMap, select_speech
+
+SR = 16000
+
+
+def quiet(seconds, seed=1):
+    rng = np.random.default_rng(seed)
+    return (0.003 * rng.standard_normal(int(seconds * SR))).astype(np.float32)
+
+
+def chord(seconds):
+    # Sustained C major chord: loud and tonal, but not syllabic
+    t = np.arange(int(seconds * SR)) / SR
+    tones = sum(np.sin(2 * np.pi * f * t) for f in (262, 330, 392))
+    return (0.05 * tones).astype(np.float32) + quiet(seconds, seed=2)
+
+
+def test_silence_and_music_are_cut_and_mapped_back():
+    speech = synth_speech(10)
+    audio = np.concatenate([speech, quiet(10), chord(10), speech])
+
+    kept, speech_map = select_speech(audio, SR)
+
+    segments = speech_map.segments()
+    assert segments[0][0] == 0 and segments[0][1] < 10.5
+    assert 29.5 < segments[-1][0] < 31 and segments[-1][1] == 40
+    # At most a blip at the chord onset survives from the 20s in between
+    assert len(kept) == pytest.approx(20 * SR, rel=0.1)
+    assert not any(start < 29 and end > 21.5 for start, end in segments)
+    assert speech_map.speech_seconds == len(kept) / SR
+
+    # A time in the last kept segment lands in the second speech copy
+    offset = len(kept) / SR - (segments[-1][1] - segments[-1][0])
+    assert speech_map.to_original(offset + 1.0) == pytest.approx(segments[-1][0] + 1.0)
+    # A time on a cut, read as an end, stays before the gap
+    first = segments[0][1] - segments[0][0]
+    assert speech_map.to_original(first, end=True) == pytest.approx(segments[0][1])
+    start = int(segments[-1][0] * SR)
+    assert np.array_equal(
+        kept[int(offset * SR) : int(offset * SR) + 100], audio[start : start + 100]
+    )
+
+
+def test_continuous_speech_is_kept_whole():
+    speech = synth_speech(20)
+    kept, speech_map = select_speech(speech, SR)
+    assert kept is speech
+    assert speech_map.segments() == [(0.0, 20.0)]
+
+
+def test_no_speech_keeps_recording():
+    audio = quiet(5)
+    kept, speech_map = select_speech(audio, SR)
+    assert kept is audio
+    assert speech_map.to_original(2.5) == 2.5
+
+
+def test_remap_segments():
+    speech_map = SpeechMap([0, 5 * SR], [2 * SR, 8 * SR], SR, 10 * SR)
+    segments = speech_map.remap_segments(
+        [{"start": 0.5, "end": 2.0, "text": "a"}, {"start": 2.0, "end": 4.5}]
+    )
+    assert segments[0] == {"start": 0.5, "end": 2.0, "text": "a"}
+    assert segments[1] == {"start": 5.0, "end": 7.5}
@@ -0,0 +1,69 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("whisper")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.whisper_service import WhisperTranscriber, _window_end
+
+SR = 16000
+
+
+class FakeModel:
+    """Returns one segment per window and records the prompts it got."""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, language=None, initial_prompt=None):
+        self.calls.append((len(audio), initial_prompt))
+        duration = len(audio) / SR
+        text = f" window {len(self.calls)}"
+        return {
+            "text": text,
+            "segments": [{"start": 0.0, "end": duration, "text": text}],
+        }
+
+
+def streaming_transcriber():
+    transcriber = WhisperTranscriber.__new__(WhisperTranscriber)
+    transcriber.model = FakeModel()
+    return transcriber
+
+
+def test_window_ends_at_the_quietest_point_before_the_limit():
+    audio = np.full(40 * SR, 0.5, dtype=np.float32)
+    audio[int(29.2 * SR) : int(29.3 * SR)] = 0.0
+    end = _window_end(audio, 0, 30 * SR, search=2 * SR, frame=SR // 50)
+    assert int(29.2 * SR) <= end <= int(29.3 * SR)
+    assert _window_end(audio, 20 * SR, 30 * SR, search=2 * SR, frame=SR // 50) == len(
+        audio
+    )
+
+
+def test_segments_stream_in_order_with_absolute_times():
+    transcriber = streaming_transcriber()
+    audio = np.random.default_rng(0).normal(0, 0.1, 75 * SR).astype(np.float32)
+
+    stream = transcriber.transcribe_stream(audio, language="en")
+    first = next(stream)
+    # Only the first window has been decoded when its segment arrives
+    assert len(transcriber.model.calls) == 1
+    segments = [first, *stream]
+
+    assert [segment["id"] for segment in segments] == [0, 1, 2]
+    assert segments[0]["start"] == 0.0
+    for previous, segment in zip(segments, segments[1:]):
+        assert segment["start"] == pytest.approx(previous["end"], abs=1e-3)
+    assert segments[-1]["end"] == pytest.approx(75.0, abs=1e-3)
+    # Each window is decoded with the previous window's text as the prompt
+    assert [prompt for _, prompt in transcriber.model.calls] == [
+        None,
+        " window 1",
+        " window 2",
+    ]
+    assert all(length <= 30 * SR for length, _ in transcriber.model.calls)